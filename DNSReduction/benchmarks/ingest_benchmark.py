@@ -0,0 +1,64 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+"""
+Benchmark of the ingestion of a directory of DNS datafiles
+standalone script which is not part of the unit tests, run it as module
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file_ingest \
+    import ingest_files
+from mantidqtinterfaces.DNSReduction.tests.helpers_for_testing import \
+    write_fake_dnsfile
+
+
+def write_datafiles(datapath, number_of_files, tofchannels):
+    filenames = []
+    for i in range(number_of_files):
+        filename = 'p123_{:06d}.d_dat'.format(788000 + i)
+        write_fake_dnsfile(datapath, filename, 788000 + i, tofchannels, i)
+        filenames.append(filename)
+    return filenames
+
+
+def run_benchmark(datapath, filenames, max_workers, chunk_size):
+    """
+    returns the ingested files per second for 1 to max_workers processes
+    """
+    throughput = {}
+    for workers in range(1, max_workers + 1):
+        start = time.perf_counter()
+        for _chunk in ingest_files(datapath, filenames, workers,
+                                   chunk_size=chunk_size):
+            pass
+        throughput[workers] = len(filenames) / (time.perf_counter() - start)
+    return throughput
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--tofchannels', type=int, default=1000)
+    parser.add_argument('--workers', type=int,
+                        default=min(os.cpu_count() or 1, 8))
+    parser.add_argument('--chunk-size', type=int, default=100)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as datapath:
+        filenames = write_datafiles(datapath, args.files, args.tofchannels)
+        throughput = run_benchmark(datapath, filenames, args.workers,
+                                   args.chunk_size)
+    print('ingest throughput (files/s): ' + ', '.join(
+        '{} workers {:.0f}'.format(workers, files_per_second)
+        for workers, files_per_second in throughput.items()))
+
+
+if __name__ == '__main__':
+    main()
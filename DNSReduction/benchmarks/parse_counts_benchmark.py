@@ -0,0 +1,55 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+"""
+Benchmark of the counts parsers of DNS datafiles
+standalone script which is not part of the unit tests, run it as module
+"""
+
+import argparse
+import os
+import tempfile
+import timeit
+
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file import (
+    DATA_LINE, parse_counts_block, parse_counts_by_line)
+from mantidqtinterfaces.DNSReduction.tests.helpers_for_testing import \
+    write_fake_dnsfile
+
+
+def get_data_lines(tofchannels):
+    with tempfile.TemporaryDirectory() as datapath:
+        write_fake_dnsfile(datapath, 'p123_788058.d_dat',
+                           tofchannels=tofchannels)
+        with open(os.path.join(datapath, 'p123_788058.d_dat')) as f:
+            return f.readlines()[DATA_LINE:]
+
+
+def run_benchmark(tofchannels=1000, number=20):
+    """
+    returns the parsed files per second of the line by line and of the
+    block parser
+    """
+    lines = get_data_lines(tofchannels)
+    by_line = timeit.timeit(lambda: parse_counts_by_line(lines, tofchannels),
+                            number=number)
+    block = timeit.timeit(lambda: parse_counts_block(lines, tofchannels),
+                          number=number)
+    return number / by_line, number / block
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tofchannels', type=int, default=1000)
+    parser.add_argument('--number', type=int, default=20)
+    args = parser.parse_args()
+    by_line, block = run_benchmark(args.tofchannels, args.number)
+    print('counts parser throughput (files/s): line by line {:.0f}, '
+          'block {:.0f}'.format(by_line, block))
+
+
+if __name__ == '__main__':
+    main()
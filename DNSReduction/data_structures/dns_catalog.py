@@ -0,0 +1,195 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+"""
+Columnar catalog of the metadata of many DNS datafiles
+"""
+
+import numpy as np
+
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file_meta import \
+    FILE_META_FIELDS, DNSFileMeta
+
+NUMERIC_COLUMNS = {
+    'filenumber': np.int64,
+    'det_rot': np.float64,
+    'sample_rot': np.float64,
+    'temp_samp': np.float64,
+    'tofchannels': np.int64,
+    'channelwidth': np.float64,
+    'wavelength': np.float64,
+    'selector_speed': np.float64,
+}
+STRING_COLUMNS = ('field', 'sample', 'endtime', 'filename', 'scannumber',
+                  'scancommand', 'scanpoints')
+
+
+class DNSStringColumn:
+    """
+    dictionary encoded column of strings, every row stores the index of its
+    value in the sorted array of unique values (categories)
+    """
+    def __init__(self, values=(), categories=None, codes=None):
+        if categories is None:
+            categories, codes = np.unique(np.asarray(values, dtype=str),
+                                          return_inverse=True)
+        self.categories = np.asarray(categories, dtype=str)
+        self.codes = np.asarray(codes, dtype=np.int32).ravel()
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, row):
+        return str(self.categories[self.codes[row]])
+
+    def _code(self, value):
+        code = np.searchsorted(self.categories, value)
+        if code < len(self.categories) and self.categories[code] == value:
+            return code
+        return -1
+
+    def equals(self, value):
+        return self.codes == self._code(value)
+
+    def contains(self, text):
+        """
+        mask of rows containing text, the substring test is done once
+        per category
+        """
+        matching = np.array([text in value for value in self.categories],
+                            dtype=bool)
+        if not len(matching):
+            return np.zeros(len(self), dtype=bool)
+        return matching[self.codes]
+
+    def take(self, mask):
+        return DNSStringColumn(categories=self.categories,
+                               codes=self.codes[mask])
+
+    def groups(self):
+        """
+        returns the rows of every value in the order the values appear
+        in the column
+        """
+        _, first_rows = np.unique(self.codes, return_index=True)
+        return [
+            np.flatnonzero(self.codes == self.codes[first_row])
+            for first_row in np.sort(first_rows)
+        ]
+
+    def tolist(self):
+        return self.categories[self.codes].tolist()
+
+
+class DNSCatalog:
+    """
+    metadata of dns datafiles stored as one numpy array per field,
+    strings are dictionary encoded, queries return boolean masks which can
+    be combined and passed to select
+    """
+    def __init__(self, columns=None):
+        if columns is None:
+            columns = self._empty_columns()
+        self.columns = columns
+
+    @staticmethod
+    def _empty_columns():
+        columns = {
+            name: np.zeros(0, dtype=dtype)
+            for name, dtype in NUMERIC_COLUMNS.items()
+        }
+        for name in STRING_COLUMNS:
+            columns[name] = DNSStringColumn()
+        return columns
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        creates a catalog from DNSFileMeta records, DNSFiles or dictionaries
+        with the same keys
+        """
+        records = [DNSFileMeta.from_dnsfile(record) for record in records]
+        if not records:
+            return cls()
+        columns = {}
+        for name in FILE_META_FIELDS:
+            values = [getattr(record, name) for record in records]
+            if name in NUMERIC_COLUMNS:
+                columns[name] = np.asarray(values).astype(
+                    NUMERIC_COLUMNS[name])
+            else:
+                columns[name] = DNSStringColumn(values)
+        return cls(columns)
+
+    @classmethod
+    def from_entries(cls, entries, names):
+        """
+        creates a catalog with the columns names from dictionaries like the
+        ones of the file selector, names which are not numeric columns are
+        stored as strings
+        """
+        columns = {}
+        for name in names:
+            values = [entry[name] for entry in entries]
+            if name in NUMERIC_COLUMNS:
+                columns[name] = np.asarray(
+                    values, dtype=NUMERIC_COLUMNS[name]).ravel()
+            else:
+                columns[name] = DNSStringColumn(values)
+        return cls(columns)
+
+    def __len__(self):
+        return len(self.columns['filenumber'])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def select(self, mask):
+        """
+        returns a new catalog with the rows given by a boolean mask or an
+        array of row numbers
+        """
+        columns = {}
+        for name, column in self.columns.items():
+            if name in NUMERIC_COLUMNS:
+                columns[name] = column[mask]
+            else:
+                columns[name] = column.take(mask)
+        return DNSCatalog(columns)
+
+    # queries
+
+    def filenumber_range(self, start, end):
+        filenumbers = self.columns['filenumber']
+        return (filenumbers >= start) & (filenumbers <= end)
+
+    def equals(self, name, value):
+        if name in NUMERIC_COLUMNS:
+            return self.columns[name] == value
+        return self.columns[name].equals(value)
+
+    def contains(self, name, text):
+        return self.columns[name].contains(text)
+
+    def is_tof(self):
+        return self.columns['tofchannels'] > 1
+
+    # conversion
+
+    def get_values(self, name):
+        """
+        returns a decoded column as list
+        """
+        return self.columns[name].tolist()
+
+    def to_records(self):
+        values = [self.get_values(name) for name in FILE_META_FIELDS]
+        records = []
+        for row in zip(*values):
+            record = DNSFileMeta(*row)
+            record.filenumber = str(record.filenumber)
+            records.append(record)
+        return records
@@ -0,0 +1,121 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+"""
+Index of the DNS datafiles in a directory sorted by filenumber
+"""
+
+import os
+import re
+import time
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+# the filenumber is the last number before .d_dat
+DNS_FILE_PATTERN = re.compile(r'.*_([0-9]+)\.d_dat$')
+# files created in the same timestamp tick as a scan do not change the
+# mtime of the directory, so a directory modified this shortly (ns) before
+# the scan is scanned again
+MTIME_RESOLUTION = 2 * 10**9
+
+
+def get_filenumber(filename):
+    """
+    returns the filenumber of a dns datafile name as int or None
+    """
+    match = DNS_FILE_PATTERN.match(filename)
+    if match is None:
+        return None
+    return int(match.group(1))
+
+
+def select_filenumber_range(filenumbers, start, end):
+    """
+    returns the slice of the sorted sequence filenumbers with
+    start <= filenumber <= end found by binary search, start or end None
+    means no limit
+    """
+    first, last = 0, len(filenumbers)
+    if start is not None:
+        first = bisect_left(filenumbers, start)
+    if end is not None:
+        last = bisect_right(filenumbers, end)
+    return slice(first, max(first, last))
+
+
+class DNSDirectoryIndex:
+    """
+    names and filenumbers of the dns datafiles in a directory, sorted by
+    filenumber
+    the directory is only scanned again if its mtime changed or if it was
+    modified shortly before the last scan
+    """
+    def __init__(self, datadir):
+        self.datadir = datadir
+        self.filenames = []
+        self.filenumbers = np.zeros(0, dtype=np.int64)
+        self._dir_mtime = None
+        self._scan_time = None
+
+    def refresh(self):
+        """
+        scans the directory if it changed since the last scan, returns True
+        if it was scanned
+        """
+        try:
+            dir_mtime = os.stat(self.datadir).st_mtime_ns
+        except OSError:
+            dir_mtime = None
+        if (dir_mtime is not None and dir_mtime == self._dir_mtime
+                and self._scan_time - dir_mtime > MTIME_RESOLUTION):
+            return False
+        self._scan_time = time.time_ns()
+        self._scan()
+        self._dir_mtime = dir_mtime
+        return True
+
+    def _scan(self):
+        files = []
+        try:
+            filenames = os.listdir(self.datadir)
+        except OSError:
+            filenames = []
+        for filename in filenames:
+            match = DNS_FILE_PATTERN.match(filename)
+            if match is not None:
+                files.append((int(match.group(1)), filename))
+        files.sort()
+        self.filenames = [filename for _number, filename in files]
+        self.filenumbers = np.array([number for number, _filename in files],
+                                    dtype=np.int64)
+
+    def __len__(self):
+        return len(self.filenames)
+
+    def get_filenumber_range(self):
+        """
+        returns [lowest, highest] filenumber or [0, 0] if there are no
+        datafiles
+        """
+        if not self.filenames:
+            return [0, 0]
+        return [int(self.filenumbers[0]), int(self.filenumbers[-1])]
+
+
+_DIRECTORY_INDEXES = {}
+
+
+def get_directory_index(datadir):
+    """
+    returns the up to date index of datadir, indexes are kept for the
+    lifetime of the process
+    """
+    key = os.path.abspath(datadir)
+    if key not in _DIRECTORY_INDEXES:
+        _DIRECTORY_INDEXES[key] = DNSDirectoryIndex(datadir)
+    _DIRECTORY_INDEXES[key].refresh()
+    return _DIRECTORY_INDEXES[key]
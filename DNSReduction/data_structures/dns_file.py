@@ -9,174 +9,382 @@ Class which loads and stores a single DNS datafile in a dictionary
 """
 
 import os
+from itertools import islice
 
 import numpy as np
 
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file_cache import \
+    DNSFileCache
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file_meta import \
+    DNSFileMeta
 from mantidqtinterfaces.DNSReduction.data_structures.object_dict import \
     ObjectDict
 
+# first line of the counts block and number of detectors stored with counts
+DATA_LINE = 74
+NUMBER_OF_DETECTORS = 24
+# the data block has a line for every of the 64 detector channels
+NUMBER_OF_DATA_LINES = 64
+_TAIL_READ_SIZE = 4096
+
+
+def parse_counts_by_line(lines, tofchannels):
+    """
+    parses the counts block line by line, kept as reference for
+    parse_counts_block
+    """
+    counts = np.zeros((NUMBER_OF_DETECTORS, tofchannels),
+                      dtype=int)  # for python 2 use long
+    for ch in range(NUMBER_OF_DETECTORS):
+        counts[ch, :] = lines[ch].split()[1:]
+    return counts
+
+
+def parse_counts_block(lines, tofchannels):
+    """
+    parses the counts block in a single numpy call, the first column
+    containing the detector number is dropped
+    """
+    block = np.fromstring(''.join(lines[:NUMBER_OF_DETECTORS]),
+                          dtype=int,
+                          sep=' ')
+    if block.size != NUMBER_OF_DETECTORS * (tofchannels + 1):
+        # malformed block, let the line parser raise a meaningful error
+        return parse_counts_by_line(lines, tofchannels)
+    block = block.reshape(NUMBER_OF_DETECTORS, tofchannels + 1)
+    return np.ascontiguousarray(block[:, 1:])
+
+
+def get_counts_sidecar_path(memmap_dir, path):
+    """
+    returns the sidecar of the datafile path in memmap_dir, its name
+    contains the key of the datafile used by DNSFileCache, so files with the
+    same name in different directories and rewritten files get different
+    sidecars, raises OSError if path does not exist
+    """
+    return os.path.join(
+        memmap_dir, '{}.{}.npy'.format(os.path.basename(path),
+                                       DNSFileCache.get_key(path)[:16]))
+
+
+def save_counts_sidecar(sidecar, counts):
+    """
+    saves counts as fixed width .npy file, written to a temporary file
+    first so other processes never map a half written sidecar
+    """
+    os.makedirs(os.path.dirname(sidecar), exist_ok=True)
+    tmpfile = '{}.{}.tmp'.format(sidecar, os.getpid())
+    with open(tmpfile, 'wb') as f:
+        np.save(f, counts)
+    os.replace(tmpfile, sidecar)
+
+
+def format_header(header):
+    """
+    returns the header lines of a dns datafile as string, header is a
+    dictionary containing the metadata
+    """
+    # mostly stolen form nicos
+    txt = ''
+    separator = "#" + "-" * 74 + "\n"
+    wavelength = header['wavelength'] / 10.0  # written in nm
+    txt += "# DNS Data userid={},exp={},file={},sample={}\n".format(
+        header['users'], header['proposal'], header['filenumber'],
+        header['sample'])
+    txt += separator
+
+    txt += "# 2\n"
+    txt += "# User: {}\n".format(header['users'])
+    txt += "# Sample: {}\n".format(header['sample'])
+    txt += separator
+
+    txt += "# DNS   Mono  d-spacing[nm]  Theta[deg]   " \
+           "Lambda[nm]   Energy[meV]   Speed[m/sec]\n"
+    txt += "#      {}   {:6.4f}         {:6.2f}" \
+           "         {:6.3f}{:6.3f}      {:7.2f}\n" \
+           "".format("PG-002", 0.3350, header['mon_rot'],
+                     wavelength, header['energy'], header['speed'])
+
+    txt += "# Distances [cm] Sample_Chopper    " \
+           "Sample_Detector    Sample_Monochromator\n"
+    txt += "#                  36.00            80.00            220.00\n"
+    txt += separator
+
+    txt += "# Motors                      Position\n"
+    txt += "# Monochromator              {:6.2f} deg\n" \
+        .format(header['mon_rot'])
+    txt += "# DeteRota                   {:6.2f} deg\n" \
+        .format(header['det_rot'])
+    txt += "#\n"
+    txt += "# Huber                      {:6.2f} deg\n" \
+        .format(header['sample_rot'])
+    txt += "# Cradle_lower               {:6.2f} deg\n" \
+        .format(header['cradle_lo'])
+    txt += "# Cradle_upper               {:6.2f} deg\n" \
+        .format(header['cradle_up'])
+    txt += "#\n"
+    txt += "# Slit_i_vertical upper      {:6.1f} mm\n" \
+        .format(header['ap_sam_y_upper'])
+    txt += "#                 lower      {:6.1f} mm\n" \
+        .format(header['ap_sam_y_lower'])
+    txt += "# Slit_i_horizontal left     {:6.1f} mm\n" \
+        .format(header['ap_sam_x_left'])
+    txt += "#                   right    {:6.1f} mm\n" \
+        .format(header['ap_sam_x_right'])
+    txt += "#\n"
+    # dummy line
+    txt += "# Slit_f_upper                {:4d} mm\n".format(0)
+    # dummy line
+    txt += "# Slit_f_lower                {:4d} mm\n".format(0)
+    # dummy line
+    txt += "# Detector_Position_vertical  {:4d} mm\n".format(0)
+    txt += "#\n"
+    txt += "# Polariser\n"
+    txt += "#    Translation              {:4d} mm\n".format(
+        int(round(header['pol_trans_x'])))
+    txt += "#    Rotation              {:6.2f} deg\n".format(
+        header['pol_rot'])
+    txt += "#\n"
+    txt += "# Analysers                 undefined\n"
+    txt += separator
+    # write currents
+    txt += "# B-fields                   current[A]  field[G]\n"
+    txt += "#   Flipper_precession        {:6.3f} A     {:6.2f} G\n" \
+        .format(header['Co'], 0.0)
+    txt += "#   Flipper_z_compensation    {:6.3f} A     {:6.2f} G\n" \
+        .format(header['Fi'], 0.0)
+    txt += "#   C_a                       {:6.3f} A     {:6.2f} G\n" \
+        .format(header['A'], 0.0)
+    txt += "#   C_b                       {:6.3f} A     {:6.2f} G\n" \
+        .format(header['B'], 0.0)
+    txt += "#   C_c                       {:6.3f} A     {:6.2f} G\n" \
+        .format(header['C'], 0.0)
+    txt += "#   C_z                       {:6.3f} A     {:6.2f} G\n" \
+        .format(header['ZT'], 0.0)
+    txt += separator
+
+    txt += "# Temperatures/Lakeshore      T\n"
+    txt += "#  T1                         {:6.3f} K\n" \
+        .format(header['temp_tube'])
+    txt += "#  T2                         {:6.3f} K\n" \
+        .format(header['temp_samp'])
+    txt += "#  sample_setpoint            {:6.3f} K\n" \
+        .format(header['temp_set'])
+    txt += separator
+
+    txt += "# TOF parameters\n"
+    txt += "#  TOF channels                {:4d}\n" \
+        .format(header['tofchannels'])
+    txt += "#  Time per channel            {:6.1f} microsecs\n" \
+        .format(header['channelwidth'])
+    txt += "#  Delay time                  {:6.1f} microsecs\n" \
+        .format(header['tofdelay'])
+
+    txt += "#  Chopper slits\n"
+    txt += "#  Elastic time channel\n"
+    txt += "#  Chopper frequency\n"
+    txt += separator
+
+    txt += "# Active_Stop_Unit           TIMER\n"
+    txt += "#  Timer                    {:6.1f} sec\n" \
+        .format(header['timer'])
+    txt += "#  Monitor           {:16d}\n".format(header['monitor'])
+    txt += "#\n"
+    txt += "#    start   at      {}\n".format(header['starttime'])
+    txt += "#    stopped at      {}\n".format(header['endtime'])
+    txt += separator
+
+    txt += "# Extended data\n"
+    if header['scannumber']:
+        txt += "#  Scannumber               {:8d}\n" \
+            .format(int(header['scannumber']))
+    else:
+        txt += "#  Scannumber                       \n"
+    txt += "#  Scancommand              {}\n".format(header['scancommand'])
+    txt += "#  Scanposition             {:>8s}\n" \
+        .format(header['scanposition'])
+    txt += "#  pol_trans_x              {:8.1f} mm\n" \
+        .format(header['pol_trans_x'])
+    txt += "#  pol_trans_y              {:8.1f} mm\n" \
+        .format(header['pol_trans_y'])
+    txt += "#  field                    {:>8s}\n".format(header['field'])
+    txt += "#  selector_lift            {:8.1f} mm\n" \
+        .format(header['selector_lift'])
+    txt += "#  selector_speed           {:8.1f} rpm\n" \
+        .format(header['selector_speed'])
+    txt += separator
+
+    txt += "# DATA (number of detectors, number of TOF channels)\n"
+    txt += "# 64 {:4d}\n".format(header['tofchannels'])
+    return txt
+
+
+def format_counts_block(counts):
+    """
+    returns the data block of a dns datafile as string, the counts of the
+    24 detectors are followed by zeros for the unused detector channels,
+    everything is formatted in a single string formatting operation
+    """
+    tofchannels = counts.shape[1]
+    block = np.zeros((NUMBER_OF_DATA_LINES, tofchannels + 1), dtype=int)
+    block[:, 0] = np.arange(NUMBER_OF_DATA_LINES)
+    block[:NUMBER_OF_DETECTORS, 1:] = counts
+    line_format = "%2d " + " %8d" * tofchannels + "\n"
+    return (line_format * NUMBER_OF_DATA_LINES) % tuple(
+        block.ravel().tolist())
+
+
+def write_dnsfile(datapath, filename, header, counts):
+    """
+    writes a dns datafile from a header dictionary and a counts array
+    of shape (24, tofchannels) with a single write call
+    """
+    txt = format_header(header) + format_counts_block(counts)
+    with open(os.path.join(datapath, filename), 'w') as myfile:
+        myfile.write(txt)
+
+
+def write_dnsfiles(datapath, filenames, headers, counts):
+    """
+    writes many dns datafiles, e.g. for simulated data sets, filenames,
+    headers and counts are lists of equal length
+    """
+    if not len(filenames) == len(headers) == len(counts):
+        raise ValueError('filenames, headers and counts must have the same '
+                         'length')
+    for filename, header, file_counts in zip(filenames, headers, counts):
+        write_dnsfile(datapath, filename, header, file_counts)
+
+
+def _ends_with_last_data_line(f):
+    """
+    checks if the last line of a binary file starts with the number of the
+    last data line, the file is read backwards from the end
+    """
+    position = os.fstat(f.fileno()).st_size
+    tail = b''
+    while position > 0:
+        step = min(position, _TAIL_READ_SIZE)
+        position -= step
+        f.seek(position)
+        tail = f.read(step) + tail
+        lines = tail.rstrip().rsplit(b'\n', 1)
+        if len(lines) == 2 or position == 0:
+            return lines[-1].lstrip().startswith(
+                str(NUMBER_OF_DATA_LINES - 1).encode())
+    return False
+
 
 class DNSFile(ObjectDict):
     """
     class for reading, writing and storing data of a single dns datafile
     this is a dictionary  but can also be accessed like atributes
+    if header_only is True only the header lines are read, the counts are
+    read from the file on first access of counts
+    if memmap_dir is given, counts are a read only np.memmap of a binary
+    sidecar in memmap_dir, which is written on first parse of the file
+    if a DNSFileCache is given as cache, header and counts are taken from
+    the cache if the file did not change since it was parsed
     """
-    def __init__(self, datapath, filename):
+    _counts_path = None
+    _memmap_dir = None
+    _cache = None
+
+    def __init__(self, datapath, filename, header_only=False,
+                 memmap_dir=None, cache=None):
+        # pylint: disable=too-many-arguments
         super().__init__()
-        self.new_format = self.read(datapath, filename)
+        object.__setattr__(self, '_memmap_dir', memmap_dir)
+        object.__setattr__(self, '_cache', cache)
+        self.new_format = self.read(datapath, filename, header_only)
 
-    def write(self, datapath, filename):
-        # mostly stolen form nicos
-        txt = ''
-        separator = "#" + "-" * 74 + "\n"
-        wavelength = self['wavelength'] / 10.0  # written in nm
-        txt += "# DNS Data userid={},exp={},file={},sample={}\n".format(
-            self['users'], self['proposal'], self['filenumber'],
-            self['sample'])
-        txt += separator
-
-        txt += "# 2\n"
-        txt += "# User: {}\n".format(self['users'])
-        txt += "# Sample: {}\n".format(self['sample'])
-        txt += separator
-
-        txt += "# DNS   Mono  d-spacing[nm]  Theta[deg]   " \
-               "Lambda[nm]   Energy[meV]   Speed[m/sec]\n"
-        txt += "#      {}   {:6.4f}         {:6.2f}" \
-               "         {:6.3f}{:6.3f}      {:7.2f}\n" \
-               "".format("PG-002", 0.3350, self['mon_rot'],
-                         wavelength, self['energy'], self['speed'])
-
-        txt += "# Distances [cm] Sample_Chopper    " \
-               "Sample_Detector    Sample_Monochromator\n"
-        txt += "#                  36.00            80.00            220.00\n"
-        txt += separator
-
-        txt += "# Motors                      Position\n"
-        txt += "# Monochromator              {:6.2f} deg\n" \
-            .format(self['mon_rot'])
-        txt += "# DeteRota                   {:6.2f} deg\n" \
-            .format(self['det_rot'])
-        txt += "#\n"
-        txt += "# Huber                      {:6.2f} deg\n" \
-            .format(self['sample_rot'])
-        txt += "# Cradle_lower               {:6.2f} deg\n" \
-            .format(self['cradle_lo'])
-        txt += "# Cradle_upper               {:6.2f} deg\n" \
-            .format(self['cradle_up'])
-        txt += "#\n"
-        txt += "# Slit_i_vertical upper      {:6.1f} mm\n" \
-            .format(self['ap_sam_y_upper'])
-        txt += "#                 lower      {:6.1f} mm\n" \
-            .format(self['ap_sam_y_lower'])
-        txt += "# Slit_i_horizontal left     {:6.1f} mm\n" \
-            .format(self['ap_sam_x_left'])
-        txt += "#                   right    {:6.1f} mm\n" \
-            .format(self['ap_sam_x_right'])
-        txt += "#\n"
-        # dummy line
-        txt += "# Slit_f_upper                {:4d} mm\n".format(0)
-        # dummy line
-        txt += "# Slit_f_lower                {:4d} mm\n".format(0)
-        # dummy line
-        txt += "# Detector_Position_vertical  {:4d} mm\n".format(0)
-        txt += "#\n"
-        txt += "# Polariser\n"
-        txt += "#    Translation              {:4d} mm\n".format(
-            int(round(self['pol_trans_x'])))
-        txt += "#    Rotation              {:6.2f} deg\n".format(
-            self['pol_rot'])
-        txt += "#\n"
-        txt += "# Analysers                 undefined\n"
-        txt += separator
-        # write currents
-        txt += "# B-fields                   current[A]  field[G]\n"
-        txt += "#   Flipper_precession        {:6.3f} A     {:6.2f} G\n" \
-            .format(self['Co'], 0.0)
-        txt += "#   Flipper_z_compensation    {:6.3f} A     {:6.2f} G\n" \
-            .format(self['Fi'], 0.0)
-        txt += "#   C_a                       {:6.3f} A     {:6.2f} G\n" \
-            .format(self['A'], 0.0)
-        txt += "#   C_b                       {:6.3f} A     {:6.2f} G\n" \
-            .format(self['B'], 0.0)
-        txt += "#   C_c                       {:6.3f} A     {:6.2f} G\n" \
-            .format(self['C'], 0.0)
-        txt += "#   C_z                       {:6.3f} A     {:6.2f} G\n" \
-            .format(self['ZT'], 0.0)
-        txt += separator
-
-        txt += "# Temperatures/Lakeshore      T\n"
-        txt += "#  T1                         {:6.3f} K\n" \
-            .format(self['temp_tube'])
-        txt += "#  T2                         {:6.3f} K\n" \
-            .format(self['temp_samp'])
-        txt += "#  sample_setpoint            {:6.3f} K\n" \
-            .format(self['temp_set'])
-        txt += separator
-
-        txt += "# TOF parameters\n"
-        txt += "#  TOF channels                {:4d}\n" \
-            .format(self['tofchannels'])
-        txt += "#  Time per channel            {:6.1f} microsecs\n" \
-            .format(self['channelwidth'])
-        txt += "#  Delay time                  {:6.1f} microsecs\n" \
-            .format(self['tofdelay'])
-
-        txt += "#  Chopper slits\n"
-        txt += "#  Elastic time channel\n"
-        txt += "#  Chopper frequency\n"
-        txt += separator
-
-        txt += "# Active_Stop_Unit           TIMER\n"
-        txt += "#  Timer                    {:6.1f} sec\n" \
-            .format(self['timer'])
-        txt += "#  Monitor           {:16d}\n".format(self['monitor'])
-        txt += "#\n"
-        txt += "#    start   at      {}\n".format(self['starttime'])
-        txt += "#    stopped at      {}\n".format(self['endtime'])
-        txt += separator
-
-        txt += "# Extended data\n"
-        if self['scannumber']:
-            txt += "#  Scannumber               {:8d}\n" \
-                .format(int(self['scannumber']))
+    def __missing__(self, key):
+        if key == 'counts' and self._counts_path is not None:
+            self['counts'] = self._read_counts()
+            return self['counts']
+        raise KeyError(key)
+
+    def get_header(self):
+        return {
+            key: value
+            for key, value in self.items()
+            if key not in ('counts', 'new_format')
+        }
+
+    def get_meta(self):
+        """
+        returns the metadata used in the file selector as DNSFileMeta
+        """
+        return DNSFileMeta.from_dnsfile(self)
+
+    def _parse_counts(self, lines=None):
+        if self._cache is not None and lines is None:
+            counts = self._cache.load_counts(self._counts_path)
+            if counts is not None:
+                return counts
+        if lines is None:
+            with open(self._counts_path, 'r') as f:
+                lines = list(
+                    islice(f, DATA_LINE, DATA_LINE + NUMBER_OF_DETECTORS))
+        counts = parse_counts_block(lines, self['tofchannels'])
+        if self._cache is not None:
+            self._cache.store(self._counts_path, self.get_header(), counts)
+        return counts
+
+    def _read_counts(self, lines=None):
+        if self._memmap_dir is None:
+            counts = self._parse_counts(lines)
         else:
-            txt += "#  Scannumber                       \n"
-        txt += "#  Scancommand              {}\n".format(self['scancommand'])
-        txt += "#  Scanposition             {:>8s}\n" \
-            .format(self['scanposition'])
-        txt += "#  pol_trans_x              {:8.1f} mm\n" \
-            .format(self['pol_trans_x'])
-        txt += "#  pol_trans_y              {:8.1f} mm\n" \
-            .format(self['pol_trans_y'])
-        txt += "#  field                    {:>8s}\n".format(self['field'])
-        txt += "#  selector_lift            {:8.1f} mm\n" \
-            .format(self['selector_lift'])
-        txt += "#  selector_speed           {:8.1f} rpm\n" \
-            .format(self['selector_speed'])
-        txt += separator
-
-        # write array
-        txt += "# DATA (number of detectors, number of TOF channels)\n"
-        txt += "# 64 {:4d}\n".format(self['tofchannels'])
-        for ch in range(24):
-            txt += "{:2d} ".format(ch)
-            for q in range(self['tofchannels']):
-                txt += " {:8d}".format(self.counts[ch, q])
-            txt += "\n"
-        for ch in range(24, 64):
-            txt += "{:2d} ".format(ch)
-            for q in range(self['tofchannels']):
-                txt += " {:8d}".format(0)
-            txt += "\n"
-        with open(os.path.join(datapath, filename), 'w') as myfile:
-            myfile.write(txt)
-
-    def read(self, datapath, filename):
-        with open(os.path.join(datapath, filename), 'r') as f:
-            txt = f.readlines()
+            counts = self._read_counts_sidecar(lines)
+        object.__setattr__(self, '_counts_path', None)
+        return counts
+
+    def _read_counts_sidecar(self, lines=None):
+        path = self._counts_path
+        try:
+            sidecar = get_counts_sidecar_path(self._memmap_dir, path)
+        except OSError:  # datafile was removed, the parser raises
+            return self._parse_counts(lines)
+        if not os.path.isfile(sidecar):
+            counts = self._parse_counts(lines)
+            try:
+                save_counts_sidecar(sidecar, counts)
+            except OSError:  # sidecar dir not writable, keep copy
+                return counts
+        return np.load(sidecar, mmap_mode='r')
+
+    def write(self, datapath, filename):
+        write_dnsfile(datapath, filename, self, self['counts'])
+
+    def _read_from_cache(self, path, header_only):
+        header = self._cache.load_header(path)
+        if header is None:
+            return False
+        self.update(header)
+        object.__setattr__(self, '_counts_path', path)
+        if not header_only:
+            self['counts'] = self._read_counts()
+        return True
+
+    def read(self, datapath, filename, header_only=False):
+        path = os.path.join(datapath, filename)
+        if self._cache is not None and self._read_from_cache(
+                path, header_only):
+            return True
+        with open(path, 'r') as f:
+            if header_only:
+                txt = list(islice(f, DATA_LINE))
+                # truncated or half written files are rejected like in a
+                # full read without reading the data lines
+                length = len(txt)
+                if _ends_with_last_data_line(f.buffer):
+                    length += NUMBER_OF_DATA_LINES
+            else:
+                txt = f.readlines()
+                length = len(txt)
         del f
-        if len(txt) < 138 or not txt[0].startswith('# DNS Data'):
+        if (length < DATA_LINE + NUMBER_OF_DATA_LINES
+                or not txt[0].startswith('# DNS Data')):
             del txt
             return False
         self['filename'] = filename
@@ -232,9 +440,11 @@ class DNSFile(ObjectDict):
             self['scanpoints'] = self['scanposition'].split('/')[1]
         else:
             self['scanpoints'] = ''
-        self['counts'] = np.zeros((24, self['tofchannels']),
-                                  dtype=int)  # for python 2 use long
-        for ch in range(24):
-            self['counts'][ch, :] = txt[74 + ch].split()[1:]
+        object.__setattr__(self, '_counts_path', path)
+        # if header_only, counts are read in __missing__ if they are accessed
+        if not header_only:
+            self['counts'] = self._read_counts(txt[DATA_LINE:])
+        elif self._cache is not None:
+            self._cache.store(path, self.get_header())
         del txt
         return True
@@ -0,0 +1,150 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+"""
+Persistent cache of parsed DNS datafiles
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+
+class DNSFileCache:
+    """
+    stores the header dictionary and the counts of parsed dns datafiles as
+    .npz files in cache_dir
+    the key of an entry is build from path, size, mtime and inode of the
+    datafile, so rewritten files are parsed again, the total size of the
+    cache is bound by max_size (bytes), least recently used entries are
+    removed first
+    """
+    def __init__(self, cache_dir, max_size=1024**3):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self._size = None  # total size is determined on first store
+        # entries are stored by the threads loading datafiles
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(path):
+        stat = os.stat(path)
+        key = '{}|{}|{}|{}'.format(os.path.abspath(path), stat.st_size,
+                                   stat.st_mtime_ns, stat.st_ino)
+        return hashlib.sha1(key.encode()).hexdigest()
+
+    def _entry_path(self, path):
+        try:
+            key = self.get_key(path)
+        except OSError:
+            return None
+        return os.path.join(self.cache_dir, key + '.npz')
+
+    def _load(self, path, name):
+        entry = self._entry_path(path)
+        if entry is None:
+            return None
+        try:
+            with np.load(entry) as npz:
+                if name not in npz.files:
+                    return None
+                value = npz[name]
+            os.utime(entry)  # mark as recently used
+        except (OSError, ValueError):
+            return None
+        return value
+
+    def load_header(self, path):
+        """
+        returns the cached header dictionary of path or None
+        """
+        header = self._load(path, 'header')
+        if header is None:
+            return None
+        return json.loads(str(header))
+
+    def load_counts(self, path):
+        """
+        returns the cached counts of path or None
+        """
+        return self._load(path, 'counts')
+
+    def store(self, path, header, counts=None):
+        """
+        stores header and if given counts of path, entries without counts
+        are replaced if the counts are stored later
+        """
+        entry = self._entry_path(path)
+        if entry is None:
+            return
+        arrays = {'header': np.array(json.dumps(header))}
+        if counts is not None:
+            arrays['counts'] = np.asarray(counts)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            old_size = self._entry_size(entry)
+            tmpfile = '{}.{}.{}.tmp'.format(entry, os.getpid(),
+                                            threading.get_ident())
+            with open(tmpfile, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmpfile, entry)
+        except OSError:  # cache is not writable, cache stays unused
+            return
+        self._add_size(self._entry_size(entry) - old_size)
+
+    @staticmethod
+    def _entry_size(entry):
+        try:
+            return os.path.getsize(entry)
+        except OSError:
+            return 0
+
+    def _get_entries(self):
+        try:
+            return [
+                entry for entry in os.scandir(self.cache_dir)
+                if entry.name.endswith('.npz')
+            ]
+        except OSError:
+            return []
+
+    def get_size(self):
+        return sum(entry.stat().st_size for entry in self._get_entries())
+
+    def _add_size(self, size):
+        with self._lock:
+            if self._size is None:
+                self._size = self.get_size()
+            else:
+                self._size += size
+            if self._size > self.max_size:
+                self.evict()
+
+    def evict(self, max_size=None):
+        """
+        removes least recently used entries until the cache is smaller than
+        max_size, default is the size bound of the cache
+        """
+        if max_size is None:
+            max_size = self.max_size
+        entries = sorted(self._get_entries(),
+                         key=lambda entry: entry.stat().st_mtime_ns)
+        size = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if size <= max_size:
+                break
+            size -= entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+        self._size = size
+
+    def clear(self):
+        self.evict(max_size=0)
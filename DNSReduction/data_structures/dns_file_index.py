@@ -0,0 +1,119 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+"""
+SQLite index of the metadata of the DNS datafiles in a directory
+"""
+
+import sqlite3
+from contextlib import closing
+
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file_meta import \
+    FILE_META_FIELDS, DNSFileMeta
+
+INDEX_FILENAME = 'last_filelist.sqlite'
+# filename is the primary key and therefore not part of the value columns
+_VALUE_COLUMNS = tuple(
+    name for name in FILE_META_FIELDS if name != 'filename')
+_CREATE_TABLE = ('CREATE TABLE IF NOT EXISTS files ('
+                 'filename TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, '
+                 'filenumber INTEGER, det_rot REAL, sample_rot REAL, '
+                 'field TEXT, temp_samp REAL, sample TEXT, endtime TEXT, '
+                 'tofchannels INTEGER, channelwidth REAL, wavelength REAL, '
+                 'selector_speed REAL, scannumber TEXT, scancommand TEXT, '
+                 'scanpoints TEXT)')
+_CREATE_INDEX = ('CREATE INDEX IF NOT EXISTS files_filenumber '
+                 'ON files (filenumber)')
+_SELECT = 'SELECT filename, size, mtime, {} FROM files'.format(
+    ', '.join(_VALUE_COLUMNS))
+_UPSERT = ('INSERT OR REPLACE INTO files (filename, size, mtime, {}) '
+           'VALUES ({})'.format(', '.join(_VALUE_COLUMNS),
+                                ', '.join('?' * (len(_VALUE_COLUMNS) + 3))))
+
+
+def _record_from_row(row):
+    record = DNSFileMeta(**dict(zip(_VALUE_COLUMNS, row[3:])))
+    record.filename = row[0]
+    record.filenumber = str(record.filenumber)
+    return record
+
+
+class DNSFileIndex:
+    """
+    index of the metadata of datafiles stored in a sqlite database with one
+    row per file keyed by filename, together with size and mtime of the
+    file
+    the database uses write ahead logging so several processes can read
+    while new files are added
+    """
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+    def _connect(self):
+        connection = sqlite3.connect(self.db_path, timeout=10)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute(_CREATE_TABLE)
+        connection.execute(_CREATE_INDEX)
+        return connection
+
+    def upsert(self, records):
+        """
+        adds or replaces entries, records is a list of tuples of a
+        DNSFileMeta, the size and the mtime (ns) of the datafile
+        """
+        rows = [(record.filename, size, mtime) +
+                tuple(getattr(record, name) for name in _VALUE_COLUMNS)
+                for record, size, mtime in records]
+        with closing(self._connect()) as connection:
+            with connection:
+                connection.executemany(_UPSERT, rows)
+
+    def remove(self, filenames):
+        with closing(self._connect()) as connection:
+            with connection:
+                connection.executemany('DELETE FROM files WHERE filename = ?',
+                                       [(name, ) for name in filenames])
+
+    def load(self, stats=None):
+        """
+        returns a dictionary of all entries with filename as key and
+        DNSFileMeta as value
+        if stats, a dictionary with filename as key and the current
+        (size, mtime) as value, is given, only entries of unchanged files are
+        returned and entries of files missing in stats are removed
+        """
+        with closing(self._connect()) as connection:
+            rows = connection.execute(_SELECT).fetchall()
+        if stats:  # empty stats can be an unreadable directory
+            self._remove_missing(rows, stats)
+        if stats is not None:
+            rows = [row for row in rows if stats.get(row[0]) == row[1:3]]
+        return {row[0]: _record_from_row(row) for row in rows}
+
+    def filenumber_range(self, start, end):
+        """
+        returns the entries with start <= filenumber <= end sorted by
+        filenumber
+        """
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                _SELECT + ' WHERE filenumber BETWEEN ? AND ? '
+                'ORDER BY filenumber', (start, end)).fetchall()
+        return [_record_from_row(row) for row in rows]
+
+    def _remove_missing(self, rows, stats):
+        missing = [row[0] for row in rows if row[0] not in stats]
+        if not missing:
+            return
+        try:
+            self.remove(missing)
+        except sqlite3.Error:  # index is read only
+            pass
+
+    def __len__(self):
+        with closing(self._connect()) as connection:
+            return connection.execute(
+                'SELECT COUNT(*) FROM files').fetchone()[0]
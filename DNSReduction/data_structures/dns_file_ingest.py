@@ -0,0 +1,91 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+"""
+Parsing of many DNS datafiles in worker processes
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file import \
+    DNSFile
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file_meta import \
+    FILE_META_FIELDS, DNSFileMeta
+
+# number of files parsed by a worker process per task
+INGEST_CHUNK_SIZE = 500
+
+
+def parse_file_records(datapath, filenames, with_counts=False):
+    """
+    parses the datafiles and returns a list of compact records, tuples of
+    the values of FILE_META_FIELDS, size and mtime (ns) of the file and
+    the counts if with_counts else None
+    files with the old format are skipped
+    """
+    records = []
+    for filename in filenames:
+        try:
+            stat = os.stat(os.path.join(datapath, filename))
+            dnsfile = DNSFile(datapath, filename,
+                              header_only=not with_counts)
+        except (OSError, ValueError, IndexError):  # unreadable file
+            continue
+        if not dnsfile.new_format:
+            continue
+        values = tuple(dnsfile[key] for key in FILE_META_FIELDS)
+        counts = dnsfile.counts if with_counts else None
+        records.append((values, stat.st_size, stat.st_mtime_ns, counts))
+    return records
+
+
+def record_to_meta(record):
+    return DNSFileMeta(*record[0])
+
+
+def _get_chunks(filenames, chunk_size):
+    return [
+        filenames[i:i + chunk_size]
+        for i in range(0, len(filenames), chunk_size)
+    ]
+
+
+def ingest_files(datapath,
+                 filenames,
+                 workers=None,
+                 chunk_size=INGEST_CHUNK_SIZE,
+                 with_counts=False):
+    """
+    generator of lists of compact records (see parse_file_records), the
+    filenames are split into chunks which are parsed by a pool of workers
+    processes, default is one per cpu, chunks are delivered in order
+    with a single worker the files are parsed in this process
+    """
+    chunks = _get_chunks(list(filenames), chunk_size)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(chunks))
+    if workers < 2:
+        for chunk in chunks:
+            yield parse_file_records(datapath, chunk, with_counts)
+        return
+    # the pool is created in the loading thread of the gui, forking a
+    # process with several threads running can deadlock
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn')) as executor:
+        futures = [
+            executor.submit(parse_file_records, datapath, chunk, with_counts)
+            for chunk in chunks
+        ]
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,123 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+"""
+Compact record of the metadata of a single DNS datafile
+"""
+
+# order of the fields is the order of the columns in the DNSTreeModel
+FILE_META_FIELDS = ('filenumber', 'det_rot', 'sample_rot', 'field',
+                    'temp_samp', 'sample', 'endtime', 'tofchannels',
+                    'channelwidth', 'filename', 'wavelength',
+                    'selector_speed', 'scannumber', 'scancommand',
+                    'scanpoints')
+
+
+class DNSFileMeta:
+    """
+    metadata of a dns datafile used by DNSFile, the file list cache and
+    the DNSTreeModel, uses __slots__ to keep memory and attribute access
+    small for large directories
+    can be accessed like atributes or like a dictionary
+
+    filenumber, field, sample, endtime, filename, scannumber, scancommand
+    and scanpoints are strings, tofchannels is an int, the others are floats
+    """
+    __slots__ = FILE_META_FIELDS + ('new_format', )
+
+    def __init__(self,
+                 filenumber='',
+                 det_rot=0.0,
+                 sample_rot=0.0,
+                 field='',
+                 temp_samp=0.0,
+                 sample='',
+                 endtime='',
+                 tofchannels=0,
+                 channelwidth=0.0,
+                 filename='',
+                 wavelength=0.0,
+                 selector_speed=0.0,
+                 scannumber='',
+                 scancommand='',
+                 scanpoints='',
+                 new_format=True):
+        # pylint: disable=too-many-arguments, too-many-locals
+        self.filenumber = filenumber
+        self.det_rot = det_rot
+        self.sample_rot = sample_rot
+        self.field = field
+        self.temp_samp = temp_samp
+        self.sample = sample
+        self.endtime = endtime
+        self.tofchannels = tofchannels
+        self.channelwidth = channelwidth
+        self.filename = filename
+        self.wavelength = wavelength
+        self.selector_speed = selector_speed
+        self.scannumber = scannumber
+        self.scancommand = scancommand
+        self.scanpoints = scanpoints
+        self.new_format = new_format
+
+    @classmethod
+    def from_dnsfile(cls, dnsfile):
+        """
+        creates a record from a DNSFile or any dictionary with the same keys,
+        records are returned unchanged
+        """
+        if isinstance(dnsfile, cls):
+            return dnsfile
+        meta = cls(*[dnsfile[key] for key in FILE_META_FIELDS])
+        meta.new_format = dnsfile.get('new_format', True)
+        return meta
+
+    def to_list(self):
+        return [getattr(self, key) for key in FILE_META_FIELDS]
+
+    # dictionary compatible access for existing callers
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __eq__(self, other):
+        if isinstance(other, (DNSFileMeta, dict)):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def __repr__(self):
+        return 'DNSFileMeta({})'.format(dict(self.items()))
+
+    def get(self, key, default=None):
+        if key in self.__slots__:
+            return getattr(self, key)
+        return default
+
+    def keys(self):
+        return self.__slots__
+
+    def values(self):
+        return [getattr(self, key) for key in self.__slots__]
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in self.__slots__]
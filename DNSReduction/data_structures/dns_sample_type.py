@@ -0,0 +1,63 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+"""
+Classification of DNS samples into standard types by their name
+"""
+
+import re
+from enum import Enum
+
+
+class DNSSampleType(Enum):
+    SAMPLE = 'sample'
+    VANADIUM = 'vanadium'
+    NICR = 'nicr'
+    EMPTY = 'empty'
+
+
+# the type of the first rule with one of its texts in the sample name is
+# used, samples matching no rule are of type SAMPLE
+SAMPLE_TYPE_RULES = (
+    (DNSSampleType.VANADIUM, ('vanadium', 'vana')),
+    (DNSSampleType.NICR, ('nicr', 'NiCr')),
+    (DNSSampleType.EMPTY, ('empty', 'leer')),
+)
+
+
+class DNSSampleClassifier:
+    """
+    returns the DNSSampleType of sample names using rules like
+    SAMPLE_TYPE_RULES, the type of every name is only determined once
+    """
+    def __init__(self, rules=SAMPLE_TYPE_RULES):
+        self._rules = [
+            (sampletype, re.compile('|'.join(re.escape(text)
+                                             for text in texts)))
+            for sampletype, texts in rules
+        ]
+        self._types = {}
+
+    def classify(self, sample):
+        sampletype = self._types.get(sample)
+        if sampletype is None:
+            sampletype = DNSSampleType.SAMPLE
+            for rule_type, pattern in self._rules:
+                if pattern.search(sample):
+                    sampletype = rule_type
+                    break
+            self._types[sample] = sampletype
+        return sampletype
+
+
+_DEFAULT_CLASSIFIER = DNSSampleClassifier()
+
+
+def classify_sample(sample):
+    """
+    returns the DNSSampleType of sample with the default rules
+    """
+    return _DEFAULT_CLASSIFIER.classify(sample)
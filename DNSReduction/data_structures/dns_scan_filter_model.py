@@ -0,0 +1,108 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+"""
+Filter of the scans in a DNSTreeModel for the treeviews
+"""
+
+from qtpy.QtCore import QModelIndex, QSortFilterProxyModel
+
+
+class DNSScanFilterModel(QSortFilterProxyModel):
+    """
+    proxy model which only shows the scans of a DNSTreeModel matching the
+    filters, the datafiles of a shown scan are always shown
+    tof and sample type of a scan are stored when the scan is filtered the
+    first time, the rows of the scans containing the filter texts are
+    taken from the scan index of the source model
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._texts = ()
+        self._is_tof = None
+        self._sampletypes = None
+        self._keys = {}
+        self._text_rows = None
+        self._text_version = None
+
+    def setSourceModel(self, model):  # overrides QT function
+        super().setSourceModel(model)
+        self._keys = {}
+        model.modelReset.connect(self._clear_keys)
+        model.rowsRemoved.connect(self._clear_keys)
+
+    def _clear_keys(self):
+        self._keys = {}
+
+    def _get_text_rows(self):
+        version = self.sourceModel().get_scan_index_version()
+        if self._text_rows is None or version != self._text_version:
+            self._text_rows = self.sourceModel().search_scans(self._texts)
+            self._text_version = version
+        return self._text_rows
+
+    def _get_scan_key(self, scan):
+        key = self._keys.get(scan)
+        if key is None:
+            if not scan.hasChildren():  # key is not known yet
+                return False, scan.get_sample_type()
+            key = (scan.first_child_data(7) > 1, scan.get_sample_type())
+            self._keys[scan] = key
+        return key
+
+    def set_filters(self, texts=(), is_tof=None, sampletypes=None):
+        """
+        shows only scans with all texts in the scan command, with tof
+        channels if is_tof and without if not and of one of the sampletypes,
+        None disables the filter, the filter is invalidated once
+        """
+        texts = tuple(texts)
+        if sampletypes is not None:
+            sampletypes = frozenset(sampletypes)
+        filters = (texts, is_tof, sampletypes)
+        version = self.sourceModel().get_scan_index_version()
+        if (filters == (self._texts, self._is_tof, self._sampletypes)
+                and (not texts or version == self._text_version)):
+            return  # texts of the scans can have changed
+        self._texts, self._is_tof, self._sampletypes = filters
+        self._text_rows = None
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        # overrides QT function
+        if source_parent.isValid():  # datafile
+            return True
+        scan = self.sourceModel().scan_from_row(source_row)
+        is_tof, sampletype = self._get_scan_key(scan)
+        if self._is_tof is not None and is_tof != self._is_tof:
+            return False
+        if self._sampletypes is not None and \
+                sampletype not in self._sampletypes:
+            return False
+        return not self._texts or source_row in self._get_text_rows()
+
+    def get_hidden_rows(self):
+        """
+        returns the set of rows of the scans in the source model which are
+        filtered out
+        """
+        root = QModelIndex()
+        return {
+            row
+            for row in range(self.sourceModel().number_of_scans())
+            if not self.filterAcceptsRow(row, root)
+        }
+
+    def get_shown_rows(self):
+        """
+        returns the sorted rows of the scans in the source model which are
+        shown
+        """
+        root = QModelIndex()
+        return [
+            row for row in range(self.sourceModel().number_of_scans())
+            if self.filterAcceptsRow(row, root)
+        ]
@@ -0,0 +1,95 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+"""
+Trigram index of the texts of the scans in a DNSTreeModel
+"""
+
+_EMPTY = frozenset()
+
+
+def get_trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class DNSScanIndex:
+    """
+    index of the texts (scannumber, sample and scan command) of the scans
+    by their rows, scans are only appended or all removed
+    for every trigram the rows of the texts containing it are stored, the
+    rows of a search are the intersection of the rows of the trigrams of
+    the searched text, the results are kept until the index changes
+    """
+    def __init__(self):
+        self._texts = []
+        self._trigrams = {}
+        self._results = {}
+        self.version = 0
+
+    def __len__(self):
+        return len(self._texts)
+
+    def _changed(self):
+        self._results = {}
+        self.version += 1
+
+    def clear(self):
+        self._texts = []
+        self._trigrams = {}
+        self._changed()
+
+    def add(self, text):
+        """
+        adds the text of the next scan row
+        """
+        row = len(self._texts)
+        self._texts.append(text)
+        for trigram in get_trigrams(text):
+            self._trigrams.setdefault(trigram, set()).add(row)
+        self._changed()
+
+    def update(self, row, text):
+        old_text = self._texts[row]
+        if text == old_text:
+            return
+        old_trigrams = get_trigrams(old_text)
+        new_trigrams = get_trigrams(text)
+        for trigram in old_trigrams - new_trigrams:
+            self._trigrams[trigram].discard(row)
+        for trigram in new_trigrams - old_trigrams:
+            self._trigrams.setdefault(trigram, set()).add(row)
+        self._texts[row] = text
+        self._changed()
+
+    def search(self, text):
+        """
+        returns the frozenset of rows of the scans containing text
+        """
+        rows = self._results.get(text)
+        if rows is not None:
+            return rows
+        if len(text) < 3:  # shorter texts have no trigrams
+            candidates = range(len(self._texts))
+        else:
+            postings = sorted(
+                (self._trigrams.get(trigram, _EMPTY)
+                 for trigram in get_trigrams(text)),
+                key=len)
+            candidates = postings[0].intersection(*postings[1:])
+        # trigrams can be found in a different order than in text
+        rows = frozenset(row for row in candidates
+                         if text in self._texts[row])
+        self._results[text] = rows
+        return rows
+
+    def search_all(self, texts):
+        """
+        returns the frozenset of rows of the scans containing all texts
+        """
+        if not texts:
+            return frozenset(range(len(self._texts)))
+        results = sorted((self.search(text) for text in texts), key=len)
+        return results[0].intersection(*results[1:])
@@ -9,6 +9,11 @@ Class which loads and stores a single DNS datafile in a dictionary
 """
 
 import os
+
+import numpy as np
+
+from mantidqtinterfaces.DNSReduction.data_structures.dns_catalog import \
+    DNSCatalog
 from mantidqtinterfaces.DNSReduction.data_structures.object_dict import \
     ObjectDict
 from mantidqtinterfaces.DNSReduction.helpers.list_range_converters import \
@@ -87,13 +92,22 @@ def _create_new_datatype(dataset, datatype, det_rot, entry, path):
     }
 
 
-def _add_or_create_filelist(dataset, datatype, det_rot, entry):
-    compare = _get_closest_bank_key(dataset[datatype], det_rot)
-    fnlist = dataset[datatype].get(compare, None)
-    if fnlist is not None:
-        fnlist.append(entry['filenumber'])
-    else:
-        dataset[datatype][compare] = [entry['filenumber']]
+def _get_bank_filelists(det_rots, filenumbers):
+    """
+    groups filenumbers by banks, the closest bank key is only determined
+    once per distinct det_rot in the order the det_rots appear
+    """
+    values, first_rows, inverse = np.unique(det_rots,
+                                            return_index=True,
+                                            return_inverse=True)
+    banks = {}
+    for value_index in np.argsort(first_rows, kind='stable'):
+        key = _get_closest_bank_key(banks, float(values[value_index]))
+        banks.setdefault(key, []).append(value_index)
+    return {
+        key: filenumbers[np.isin(inverse, value_indexes)].tolist()
+        for key, value_indexes in banks.items()
+    }
 
 
 class DNSTofDataset(ObjectDict):
@@ -170,13 +184,19 @@ class DNSTofDataset(ObjectDict):
             of the form
             dict[datatype][path/det_rot] = list(filenumbers)
         """
+        catalog = DNSCatalog.from_entries(
+            data, ('filenumber', 'det_rot', 'samplename', 'filename'))
         dataset = {}
-        for entry in data:
-            datatype = entry['samplename']
-            det_rot = entry['det_rot']
-            if datatype in dataset.keys():
-                _add_or_create_filelist(dataset, datatype, det_rot, entry)
-            else:
-                _create_new_datatype(dataset, datatype, det_rot, entry, path)
+        for rows in catalog['samplename'].groups():
+            filelists = _get_bank_filelists(catalog['det_rot'][rows],
+                                            catalog['filenumber'][rows])
+            entry = {
+                'filename': catalog['filename'][rows[0]],
+                'filenumber': int(catalog['filenumber'][rows[0]])
+            }
+            datatype = catalog['samplename'][rows[0]]
+            det_rot = next(iter(filelists))
+            _create_new_datatype(dataset, datatype, det_rot, entry, path)
+            dataset[datatype].update(filelists)
         dataset = _convert_list_to_range(dataset)
         return dataset
@@ -8,35 +8,79 @@
 Custum Tree Item for DNS which is either a Scan or a File in DnsTreeModel
 """
 
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file_meta import \
+    FILE_META_FIELDS
+from mantidqtinterfaces.DNSReduction.data_structures.dns_sample_type import \
+    classify_sample
+
 
 class DNSTreeItem:
     """
     Custom Tree Item Class for DNS which is either a Scan
     or a File in DnsTreeModel
+    the files of a scan are kept as DNSFileMeta records in pending_records
+    until the DnsTreeModel creates the child items
     """
     def __init__(self, data, parent=None, checked=0):
         self.parent_item = parent
         self.item_data = data
         self.child_items = []
         self._checkstate = 0
+        self._row = 0  # position in the childs of parent, kept by parent
+        self._checked_childs = 0  # number of childs with checkstate > 0
+        self.pending_records = []
         self.setChecked(checked)
 
     def clearChilds(self):
         self.child_items = []
+        self._checked_childs = 0
+        self.pending_records = []
 
     def appendChild(self, item):
+        item._row = len(self.child_items)
         self.child_items.append(item)
         return item
 
+    def appendChildren(self, items):
+        for row, item in enumerate(items, len(self.child_items)):
+            item._row = row
+        self.child_items.extend(items)
+
     def child(self, row):
         return self.child_items[row]
 
     def removeChild(self, row):
-        self.child_items.pop(row)
+        child = self.child_items.pop(row)
+        if child.isChecked():
+            self._checked_childs -= 1
+        for index in range(row, len(self.child_items)):
+            self.child_items[index]._row = index
 
     def childCount(self):
         return len(self.child_items)
 
+    def checkedChildCount(self):
+        return self._checked_childs
+
+    def totalChildCount(self):
+        """
+        number of childs including the not yet created ones
+        """
+        return len(self.child_items) + len(self.pending_records)
+
+    def canFetchMore(self):
+        return bool(self.pending_records)
+
+    def take_pending_records(self):
+        records = self.pending_records
+        self.pending_records = []
+        return records
+
+    def first_child_data(self, column):
+        if self.child_items:
+            return self.child_items[0].data(column)
+        return self.pending_records[0][FILE_META_FIELDS[column]]
+
     def get_childs(self):
         return self.child_items
 
@@ -54,24 +98,21 @@ class DNSTreeItem:
 
     def get_sample(self):
         if self.hasChildren():  # if its a scan get sample from first datafile
-            return self.child(0).data(5)
+            return self.first_child_data(5)
         return self.data(5)
 
     def get_sample_type(self):
-        sample = self.get_sample()
-        if 'vanadium' in sample or 'vana' in sample:
-            return 'vanadium'
-        if 'nicr' in sample or 'NiCr' in sample:
-            return 'nicr'
-        if 'empty' in sample or 'leer' in sample:
-            return 'empty'
-        return 'sample'
+        # files have the sample type of their scan, which was classified
+        # by the classifier of the model
+        if isinstance(self.parent_item, DNSScanItem):
+            return self.parent_item.get_sample_type()
+        return classify_sample(self.get_sample()).value
 
     def is_type(self, sampletype):
         return sampletype == self.get_sample_type()
 
     def hasChildren(self):
-        return bool(self.childCount() > 0)
+        return bool(self.child_items or self.pending_records)
 
     def isChecked(self):
         return self._checkstate
@@ -81,11 +122,73 @@ class DNSTreeItem:
 
     def row(self):
         if self.parent_item:
-            return self.parent_item.child_items.index(self)
+            childs = self.parent_item.child_items
+            if self._row >= len(childs) or childs[self._row] is not self:
+                # child list was changed without appendChild
+                self._row = childs.index(self)
+            return self._row
         return 0
 
     def setChecked(self, checked=2):
+        if self.parent_item is not None:
+            self.parent_item._checked_childs += (bool(checked) -
+                                                 bool(self._checkstate))
         self._checkstate = checked
 
     def setData(self, data, column):
         self.item_data[column] = data
+
+
+class DNSScanItem(DNSTreeItem):
+    """
+    Scan in DnsTreeModel, the label in the first column is created from the
+    metadata of the scan when it is needed
+    counted_childs is the number of childs shown in the label, None if the
+    childs were not counted yet
+    sampletype is the DNSSampleType of the sample, all files of a scan have
+    the same sample
+    """
+    def __init__(self,
+                 scannumber,
+                 sample,
+                 scancommand,
+                 scanpoints,
+                 parent=None,
+                 checked=0,
+                 sampletype=None):
+        # pylint: disable=too-many-arguments
+        super().__init__(10 * [''], parent=parent, checked=checked)
+        self.scannumber = scannumber
+        self.sample = sample
+        self.scancommand = scancommand
+        self.scanpoints = scanpoints
+        self.counted_childs = None
+        if sampletype is None:
+            sampletype = classify_sample(sample)
+        self.sampletype = sampletype
+
+    def get_sample_type(self):
+        return self.sampletype.value
+
+    def get_expected_points(self):
+        """
+        number of scanpoints expected from the scan command, can be larger
+        than the number of childs if the scan did not run completly
+        """
+        points = str(self.scanpoints).strip()
+        if points:
+            return int(points)
+        return 0
+
+    def get_label(self):
+        points = self.scanpoints
+        if self.counted_childs is not None:
+            points = '{}/{}'.format(self.counted_childs, points)
+        parts = [self.scannumber, self.sample, self.scancommand]
+        return ' '.join([str(part) for part in parts if str(part)] +
+                        ['#{}'.format(points)])
+
+    def data(self, column=None):
+        if column == 0:
+            return self.get_label()
+        return super().data(column)
@@ -7,11 +7,27 @@
 """
 Custom Tree Model for DNS to store list of Scans with files as children
 """
-import numpy as np
+from bisect import insort
+
 from qtpy.QtCore import QAbstractItemModel, QModelIndex, Qt
 
+from mantidqtinterfaces.DNSReduction.data_structures.dns_directory_index \
+    import select_filenumber_range
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file_meta import \
+    DNSFileMeta
+from mantidqtinterfaces.DNSReduction.data_structures.dns_sample_type import \
+    DNSSampleType, classify_sample
+from mantidqtinterfaces.DNSReduction.data_structures.dns_scan_index import \
+    DNSScanIndex
 from mantidqtinterfaces.DNSReduction.data_structures.dns_treeitem import \
-    DNSTreeItem
+    DNSScanItem, DNSTreeItem
+
+# sampletypes in the datasets, samples are given by their name
+_SAMPLETYPE_NAMES = {
+    DNSSampleType.VANADIUM: 'vana',
+    DNSSampleType.NICR: 'nicr',
+    DNSSampleType.EMPTY: 'empty',
+}
 
 
 class DNSTreeModel(QAbstractItemModel):
@@ -19,10 +35,16 @@ class DNSTreeModel(QAbstractItemModel):
     """
     QT Model to store DNS scan structure consisting of scans with files as
     children
+    the sampletype of a scan is determined by classifier, a
+    DNSSampleClassifier, when the scan is created
     """
 
-    def __init__(self, data=None, parent=None):
+    def __init__(self, data=None, parent=None, classifier=None):
         super().__init__(parent)
+        if classifier is None:
+            self._classify_sample = classify_sample
+        else:
+            self._classify_sample = classifier.classify
         self._scan = None
         self.rootItem = DNSTreeItem(
             ('number', 'det_rot', 'sample_rot', 'field', 'temperature',
@@ -31,6 +53,18 @@ class DNSTreeModel(QAbstractItemModel):
         self._last_tof_time = None
         self._last_tof = None
         self._last_sample = None
+        # filenumber -> (scan row, child row) and sorted filenumbers of the
+        # files in the model
+        self._filenumber_rows = {}
+        self._filenumbers = []
+        # checked files and their list in tree order, build on demand
+        self._checked_files = set()
+        self._sorted_checked_files = None
+        # texts of the scans for filtering
+        self._scan_index = DNSScanIndex()
+        # scans with files added since the last add_number_of_childs
+        self._changed_scans = set()
+        self._number_of_files = 0
         if data is not None:
             self.setup_model_data(data)
 
@@ -65,22 +99,13 @@ class DNSTreeModel(QAbstractItemModel):
             return parent.internalPointer().columnCount()
         return self.rootItem.columnCount()
 
-    def _scan_command_from_row(self, row):
-        return self.rootItem.child(row).data(0)
-
     def _scan_expected_points_from_row(self, row):
         """
         returns the number of the scanpoints which are expected from the scan
         command can be smaller than number of childs if scan did not run
         completly
         """
-        scancommand = self._scan_command_from_row(row)
-        scancommand = scancommand.split('#')[1]
-        if '/' in scancommand:
-            scancommand = scancommand.split('/')[1]
-        if scancommand:
-            return int(scancommand.strip())
-        return 0
+        return self.scan_from_row(row).get_expected_points()
 
     def number_of_scans(self):
         return self.rootItem.childCount()
@@ -88,30 +113,28 @@ class DNSTreeModel(QAbstractItemModel):
     def _scan_range(self):
         return range(self.number_of_scans())
 
-    @staticmethod
-    def _get_sampletype(sample):
-        if 'vanadium' in sample or 'vana' in sample:
-            return 'vana'
-        if 'nicr' in sample or 'NiCr' in sample:
-            return 'nicr'
-        if 'empty' in sample or 'leer' in sample:
-            return 'empty'
-        return sample
+    def _get_sampletype(self, sample, sampletype=None):
+        if sampletype is None:
+            sampletype = self._classify_sample(sample)
+        return _SAMPLETYPE_NAMES.get(sampletype, sample)
 
     # complex getting
 
-    def _get_scan_rows(self):
-        return [
-            row for row in self._scan_range()
-            if 'scan' in self._scan_command_from_row(row)
-        ]
-
     def _is_scan_complete(self, row):
-        return (self.scan_from_row(row).childCount() >=
+        return (self.scan_from_row(row).totalChildCount() >=
                 self._scan_expected_points_from_row(row))
 
-    def text_in_scan(self, row, text):
-        return text in self._scan_command_from_row(row)
+    def search_scans(self, texts):
+        """
+        returns the frozenset of rows of the scans containing all texts
+        """
+        return self._scan_index.search_all(texts)
+
+    def get_scan_index_version(self):
+        """
+        changes if scans are added or their texts change
+        """
+        return self._scan_index.version
 
     def _get_last_row(self):
         return self.number_of_scans() - 1
@@ -169,6 +192,30 @@ class DNSTreeModel(QAbstractItemModel):
             return 0
         return parent_item.childCount()
 
+    def hasChildren(self, parent=None):  # overrides QT function
+        if parent is not None and parent.column() > 0:
+            return False
+        return self._get_or_create_parent_item(parent).hasChildren()
+
+    def canFetchMore(self, parent):  # overrides QT function
+        if not parent.isValid():
+            return False
+        return parent.internalPointer().canFetchMore()
+
+    def fetchMore(self, parent):  # overrides QT function
+        if parent.isValid():
+            self._fetch_childs(parent.internalPointer())
+
+    def _fetch_childs(self, scan):
+        """
+        creates the child items of the files of scan which are kept as
+        records
+        """
+        records = scan.take_pending_records()
+        if records:
+            self._insert_childs(
+                scan, [self._create_child(scan, record) for record in records])
+
     def _get_or_create_parent_item(self, parent):
         if parent is None or not parent.isValid():
             return self.rootItem
@@ -176,38 +223,52 @@ class DNSTreeModel(QAbstractItemModel):
 
     def is_scan_tof(self, row):
         scan = self.scan_from_row(row)
-        tof = scan.child(0).data(7) > 1
+        tof = scan.first_child_data(7) > 1
         return tof
 
+    def _set_file_checked(self, item, value=2):
+        if item.isChecked() == value:
+            return
+        item.setChecked(value)
+        if value:
+            self._checked_files.add(item)
+        else:
+            self._checked_files.discard(item)
+        self._sorted_checked_files = None
+
+    def _get_checked_files(self):
+        if self._sorted_checked_files is None:
+            self._sorted_checked_files = sorted(
+                self._checked_files,
+                key=lambda item: (item.parent().row(), item.row()))
+        return self._sorted_checked_files
+
     def get_checked(self, fullinfo=False):
         """
         returns a list of all checked items which do not have children
         List of dns datafiles
         """
-        checked = self.match(self.index(0, 0, QModelIndex()),
-                             Qt.CheckStateRole, Qt.Checked, -1,
-                             Qt.MatchExactly | Qt.MatchRecursive)
         nchecked = []
-        for index in checked:
-            item = self._item_from_index(index)
-            if not item.hasChildren():
-                if fullinfo:
-                    nchecked.append({
-                        'filenumber': int(item.data(0)),
-                        'det_rot': float(item.data(1)),
-                        'sample_rot': float(item.data(2)),
-                        'field': item.data(3),
-                        'temperature': float(item.data(4)),
-                        'samplename': item.data(5),
-                        'tofchannels': int(item.data(7)),
-                        'channelwidth': float(item.data(8)),
-                        'filename': item.data(9),
-                        'wavelength': float(item.data(10)) * 10,
-                        'sampletype': self._get_sampletype(item.data(5)),
-                        'selector_speed': float(item.data(11))
-                    })
-                else:
-                    nchecked.append(int(item.data(0)))
+        for item in self._get_checked_files():
+            if fullinfo:
+                nchecked.append({
+                    'filenumber': int(item.data(0)),
+                    'det_rot': float(item.data(1)),
+                    'sample_rot': float(item.data(2)),
+                    'field': item.data(3),
+                    'temperature': float(item.data(4)),
+                    'samplename': item.data(5),
+                    'tofchannels': int(item.data(7)),
+                    'channelwidth': float(item.data(8)),
+                    'filename': item.data(9),
+                    'wavelength': float(item.data(10)) * 10,
+                    'sampletype': self._get_sampletype(
+                        item.data(5),
+                        item.parent().sampletype),
+                    'selector_speed': float(item.data(11))
+                })
+            else:
+                nchecked.append(int(item.data(0)))
         return nchecked
 
     # def get_filenames(self):
@@ -241,7 +302,10 @@ class DNSTreeModel(QAbstractItemModel):
                 return False
             if role == Qt.CheckStateRole:
                 item = self._item_from_index(index)
-                item.setChecked(value)
+                if item.hasChildren():
+                    item.setChecked(value)
+                else:
+                    self._set_file_checked(item, value)
                 self._item_checked(index)
                 self.dataChanged.emit(index, index)
         return True
@@ -261,29 +325,29 @@ class DNSTreeModel(QAbstractItemModel):
         """
         item = self._item_from_index(index)
         if item.hasChildren():
-            for row in range(item.childCount()):
-                child = item.child(row)
-                child.setChecked(item.isChecked())
-                childindex = self.index(row, 0, index)
-                self.dataChanged.emit(childindex, childindex)
+            self._fetch_childs(item)
+            for child in item.get_childs():
+                self._set_file_checked(child, item.isChecked())
+            self.dataChanged.emit(
+                self.index(0, 0, index),
+                self.index(item.childCount() - 1, 0, index))
         else:
             parent = item.parent()
-            status = 0
-            for row in range(parent.childCount()):
-                child = parent.child(row)
-                status = status + child.isChecked()
-                if status == 0:  # unchecked
-                    parent.setChecked(0)
-                elif status < 2 * (parent.childCount()):  # partially checked
-                    parent.setChecked(1)
-                else:  # all checked
-                    parent.setChecked(2)
+            checked = parent.checkedChildCount()
+            if checked == 0:  # unchecked
+                parent.setChecked(0)
+            elif checked < parent.childCount():  # partially checked
+                parent.setChecked(1)
+            else:  # all checked
+                parent.setChecked(2)
             parentindex = self._index_from_scan(parent)
             self.dataChanged.emit(parentindex, parentindex)
 
     def uncheck_all_scans(self):
+        # scans without checked files are unchecked already
         for row in self._scan_range():
-            self.set_checked_scan(row, 0)
+            if self.scan_from_row(row).isChecked():
+                self.set_checked_scan(row, 0)
 
     def clear_scans(self):
         """
@@ -292,7 +356,15 @@ class DNSTreeModel(QAbstractItemModel):
         self.beginRemoveRows(QModelIndex(), 0, self.number_of_scans() - 1)
         self.rootItem.clearChilds()
         self.endRemoveRows()
+        self._scan = None
         self._lastscan_number = None
+        self._filenumber_rows = {}
+        self._filenumbers = []
+        self._checked_files = set()
+        self._sorted_checked_files = None
+        self._scan_index.clear()
+        self._changed_scans = set()
+        self._number_of_files = 0
 
     def _new_scan_check(self, dnsfile):
         # seperates scans and measurements with different tof-channels
@@ -302,97 +374,138 @@ class DNSTreeModel(QAbstractItemModel):
                 or self._last_tof_time != dnsfile.channelwidth
                 or self._last_sample != dnsfile.sample)
 
-    @staticmethod
-    def _get_scantext(dnsfile):
-        return [
-                   '{} {} {} #{}'.format(dnsfile.scannumber, dnsfile.sample,
-                                         dnsfile.scancommand,
-                                         dnsfile.scanpoints)
-               ] + 9 * ['']
+    def _create_scan(self, dnsfile):
+        return DNSScanItem(dnsfile.scannumber,
+                           dnsfile.sample,
+                           dnsfile.scancommand,
+                           dnsfile.scanpoints,
+                           self.rootItem,
+                           sampletype=self._classify_sample(dnsfile.sample))
 
     @staticmethod
     def _get_data_from_dnsfile(dnsfile):
-        return [
-            dnsfile.filenumber, dnsfile.det_rot, dnsfile.sample_rot,
-            dnsfile.field, dnsfile.temp_samp, dnsfile.sample, dnsfile.endtime,
-            dnsfile.tofchannels, dnsfile.channelwidth, dnsfile.filename,
-            dnsfile.wavelength, dnsfile.selector_speed, dnsfile.scannumber,
-            dnsfile.scancommand, dnsfile.scanpoints
-        ]
+        return DNSFileMeta.from_dnsfile(dnsfile).to_list()
 
-    @staticmethod
-    def _check_child_if_scan_is_checked(scan, child):
+    def _check_child_if_scan_is_checked(self, scan, child):
         if scan.isChecked():
-            child.setChecked()
+            self._set_file_checked(child)
+
+    def _create_child(self, scan, record):
+        child = DNSTreeItem(self._get_data_from_dnsfile(record), scan)
+        self._check_child_if_scan_is_checked(scan, child)
+        return child
 
     def check_fn_range(self, start, end):
-        fndict = self.get_filenumber_dict()
-        for i in np.arange(start, end + 1, 1):
-            self.set_checked_from_index(fndict[i])
+        """
+        checks the files with start <= filenumber <= end, filenumbers
+        which are not in the model are skipped
+        """
+        for filenb in self._filenumbers[select_filenumber_range(
+                self._filenumbers, start, end)]:
+            self.set_checked_from_index(self.index_from_filenumber(filenb))
 
     def setup_model_data(self, dnsfiles):
         """
-        Adding data to the model accepts a list of dnsfile objects
+        Adding data to the model accepts a list of dnsfile objects,
+        DNSFileMeta records or dictionaries with the same keys
+        the files are grouped into scans first, views are notified once for
+        the files added to the last existing scan and once for the new scans
+        child items are only created for scans which are fetched, the files
+        of the other scans are kept as records
         """
         rootitem = self.rootItem
+        last_scan = self._scan
+        continued = []  # files added to last_scan
+        new_scans = []
         for dnsfile in dnsfiles:
+            dnsfile = DNSFileMeta.from_dnsfile(dnsfile)
             if self._new_scan_check(dnsfile):
-                self._scan = DNSTreeItem(self._get_scantext(dnsfile), rootitem)
-                self.beginInsertRows(QModelIndex(), self.number_of_scans(),
-                                     self.number_of_scans())
-                rootitem.appendChild(self._scan)
-                self.endInsertRows()
+                self._scan = self._create_scan(dnsfile)
+                new_scans.append(self._scan)
                 self._lastscan_number = dnsfile.scannumber
-            file_data = self._get_data_from_dnsfile(dnsfile)
             self._last_tof = dnsfile.tofchannels
             self._last_tof_time = dnsfile.channelwidth
             self._last_sample = dnsfile.sample
-            self.beginInsertRows(self._index_from_scan(self._scan),
-                                 self._scan.childCount(),
-                                 self._scan.childCount())
-            child = self._scan.appendChild(DNSTreeItem(file_data, self._scan))
-            self._check_child_if_scan_is_checked(self._scan, child)
-            self.endInsertRows()
+            if new_scans:  # scan is not yet in the model
+                self._scan.pending_records.append(dnsfile)
+            else:
+                continued.append(dnsfile)
+            self._number_of_files += 1
+        if continued:
+            self._continue_scan(last_scan, continued)
+            self._changed_scans.add(last_scan)
+        if new_scans:
+            self._changed_scans.update(new_scans)
+            # views can filter the new scans when they are inserted
+            for scan in new_scans:
+                self._scan_index.add(scan.data(0))
+            self._insert_childs(rootitem, new_scans)
+            for scan in new_scans:
+                self._add_filenumbers(scan, scan.pending_records, 0)
+
+    def _continue_scan(self, scan, records):
+        first = scan.totalChildCount()
+        if scan.canFetchMore():  # childs were not created yet
+            scan.pending_records.extend(records)
+        else:
+            self._insert_childs(
+                scan, [self._create_child(scan, record) for record in records])
+        self._add_filenumbers(scan, records, first)
+
+    def _insert_childs(self, item, childs):
+        if item is self.rootItem:
+            parent = QModelIndex()
+        else:
+            parent = self._index_from_scan(item)
+        first = item.childCount()
+        self.beginInsertRows(parent, first, first + len(childs) - 1)
+        item.appendChildren(childs)
+        self.endInsertRows()
+
+    def _add_filenumbers(self, scan, records, first):
+        """
+        records are the files of scan starting at row first
+        """
+        scan_row = scan.row()
+        for row, record in enumerate(records, first):
+            filenumber = int(record.filenumber)
+            if filenumber not in self._filenumber_rows:
+                if self._filenumbers and filenumber < self._filenumbers[-1]:
+                    insort(self._filenumbers, filenumber)
+                else:  # files are usually added in order
+                    self._filenumbers.append(filenumber)
+            self._filenumber_rows[filenumber] = (scan_row, row)
+
+    def index_from_filenumber(self, filenumber):
+        """
+        returns the modelindex of the file with filenumber or None
+        """
+        try:
+            scan_row, row = self._filenumber_rows[filenumber]
+        except KeyError:
+            return None
+        self._fetch_childs(self.scan_from_row(scan_row))
+        return self.index(row, 0, self._scan_index_from_row(scan_row))
+
+    def get_filenumbers(self):
+        """
+        returns the sorted filenumbers of the files in the model
+        """
+        return self._filenumbers
 
     def add_number_of_childs(self):
         """
-        Adding the number of present dns datafiles to a scan
-        """
-        total_files = 0
-        for row in range(self.number_of_scans()):
-            scan = self.scan_from_row(row)
-            prefix, postfix = scan.data(0).split('#')
-            prefix = prefix.strip()
-            if '/' in postfix:  # multiple run
-                postfix = postfix.split('/')[1]
-            scan.setData(
-                '{} #{}/{}'.format(prefix, scan.childCount(), postfix), 0)
-            total_files += scan.childCount()
-        return total_files
-
-    def get_txt(self):
-        """
-        return a list of dnsdatfiles used for quick loading
-        """
-        txt = []
-        for row in range(self.number_of_scans()):
-            scan = self.scan_from_row(row)
-            for crow in range(scan.childCount()):
-                child = scan.child(crow)
-                txt.append(" ; ".join([str(x) for x in child.data()]) + "\n")
-        return txt
-
-    def get_filenumber_dict(self):
-        """
-        return a dictionary with  filnumbers as keys and modelindex as value
-        used to mark loaded filenumbers are in the model
-        """
-        filenb_dict = {}
-        for scannb in self._scan_range():
-            scan = self.scan_from_row(scannb)
-            scanindex = self._index_from_scan(scan)
-            for row in range(scan.childCount()):
-                filenb = int(scan.child(row).data(0))
-                index = self.index(row, 0, scanindex)
-                filenb_dict[filenb] = index
-        return filenb_dict
+        Adding the number of present dns datafiles to the labels of the
+        scans which changed since the last call, returns the number of files
+        """
+        rows = []
+        for scan in self._changed_scans:
+            if scan.counted_childs != scan.totalChildCount():
+                scan.counted_childs = scan.totalChildCount()
+                rows.append(scan.row())
+                self._scan_index.update(rows[-1], scan.data(0))
+        self._changed_scans = set()
+        if rows:
+            self.dataChanged.emit(self._scan_index_from_row(min(rows)),
+                                  self._scan_index_from_row(max(rows)))
+        return self._number_of_files
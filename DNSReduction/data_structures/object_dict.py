@@ -14,9 +14,11 @@ class ObjectDict(dict):
     class for storing data as a dictionary but you can access atributes
     """
     def __getattr__(self, name):
-        if name in self:
+        try:
             return self[name]
-        raise AttributeError("No such attribute: {}".format(name))
+        except KeyError:
+            raise AttributeError(
+                "No such attribute: {}".format(name)) from None
 
     def __setattr__(self, name, value):
         self[name] = value
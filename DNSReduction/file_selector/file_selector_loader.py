@@ -0,0 +1,54 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+"""
+DNS File selector loader - reads datafiles in a background thread
+"""
+
+from qtpy.QtCore import QObject, Signal
+
+# number of files send to the treemodel at once
+BATCH_SIZE = 200
+
+
+class DNSFileLoader(QObject):
+    """
+    worker object which is moved to a QThread, it takes the dnsfiles from
+    the generator files and sends the ones with the new format in batches
+    to the gui thread
+    is_canceled is called for every file, loading stops if it returns True
+    """
+    def __init__(self, files, number_of_files, is_canceled,
+                 batch_size=BATCH_SIZE):
+        super().__init__()
+        self._files = files
+        self._number_of_files = number_of_files
+        self._is_canceled = is_canceled
+        self._batch_size = batch_size
+
+    sig_batch_loaded = Signal(list)
+    sig_progress = Signal(int, int)
+    sig_finished = Signal()
+
+    def run(self):
+        batch = []
+        try:
+            for i, dnsfile in enumerate(self._files):
+                if self._is_canceled():
+                    break
+                if dnsfile.new_format:  # ignore files with old format
+                    batch.append(dnsfile)
+                if len(batch) >= self._batch_size:
+                    self.sig_batch_loaded.emit(batch)
+                    batch = []
+                if i % 100 == 0 or i >= self._number_of_files - 1:
+                    self.sig_progress.emit(i, self._number_of_files)
+        finally:
+            # the gui is notified also if reading failed
+            self._files.close()
+            if batch:
+                self.sig_batch_loaded.emit(batch)
+            self.sig_finished.emit()
@@ -8,17 +8,47 @@
 presenter for dns path panel
 """
 
+import os
+import sqlite3
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing
+
+from mantidqtinterfaces.DNSReduction.data_structures.dns_directory_index \
+    import get_directory_index
 from mantidqtinterfaces.DNSReduction.data_structures.dns_file import \
     DNSFile
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file_cache import \
+    DNSFileCache
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file_ingest import \
+    INGEST_CHUNK_SIZE, ingest_files, record_to_meta
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file_index import \
+    INDEX_FILENAME, DNSFileIndex
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file_meta import \
+    DNSFileMeta
 from mantidqtinterfaces.DNSReduction.data_structures.dns_obs_model import \
     DNSObsModel
+from mantidqtinterfaces.DNSReduction.data_structures.dns_scan_filter_model \
+    import DNSScanFilterModel
 from mantidqtinterfaces.DNSReduction.data_structures.dns_treemodel import \
     DNSTreeModel
-from mantidqtinterfaces.DNSReduction.data_structures.object_dict import \
-    ObjectDict
+from mantidqtinterfaces.DNSReduction.file_selector.file_selector_loader \
+    import BATCH_SIZE
+from mantidqtinterfaces.DNSReduction.helpers.cache_dirs import (
+    get_data_cache_dir, mark_cache_used, enforce_cache_budget)
 from mantidqtinterfaces.DNSReduction.helpers.file_processing import (
-    filter_filenames, return_filelist, unzip_latest_standard, save_txt,
-    load_txt, open_editor)
+    filter_filenames, return_filelist, unzip_latest_standard, open_editor,
+    return_file_stats)
+
+# number of threads reading datafiles, reading is limited by the latency of
+# the file system and not by the cpu
+LOADING_THREADS = 8
+# number of files read ahead per thread
+_PREFETCH_PER_THREAD = 4
+# if at least this number of files and most of the files to load are not in
+# the file index, e.g. if a directory is opened the first time, they are
+# parsed by a pool of processes instead of threads
+INGEST_MIN_FILES = 1000
 
 
 class DNSFileSelectorModel(DNSObsModel):
@@ -31,9 +61,26 @@ class DNSFileSelectorModel(DNSObsModel):
         self.treemodel = DNSTreeModel()
         self.standard_data = DNSTreeModel()
         self.active_model = self.treemodel
+        # the treeviews show the models through filters
+        self.treemodel_filter = DNSScanFilterModel()
+        self.treemodel_filter.setSourceModel(self.treemodel)
+        self.standard_data_filter = DNSScanFilterModel()
+        self.standard_data_filter.setSourceModel(self.standard_data)
         self.old_data_set = None
         self.alldatafiles = None
         self.loading_canceled = False
+        # parsed standard files are cached outside of the standard
+        # directory, one cache per directory
+        self._file_caches = {}
+        # files parsed since the last save of the file index
+        self._new_records = []
+        # data directories for which the cache budget was enforced, it is
+        # only enforced once per directory as it walks all caches
+        self._budget_enforced = set()
+        # files are read sequentially if smaller than 2
+        self.loading_threads = LOADING_THREADS
+        # number of processes parsing new directories, None is one per cpu
+        self.ingest_workers = None
 
     def _filter_out_already_loaded(self, alldatafiles, watcher):
         if watcher:
@@ -59,19 +106,20 @@ class DNSFileSelectorModel(DNSObsModel):
         self.alldatafiles = return_filelist(datapath)
         datafiles = self._filter_out_already_loaded(self.alldatafiles, watcher)
         loaded = self._get_list_of_loaded_files(datapath, watcher)
-        datafiles, fn_range = self._filter_range(datafiles, fn_range, filtered)
+        datafiles, fn_range = self._filter_range(datapath, datafiles, fn_range,
+                                                 filtered)
         number_of_datafiles = len(datafiles)
         return number_of_datafiles, loaded, datafiles, fn_range
 
-    def _get_start_end_filenumbers(self):
-        start = int(self.alldatafiles[0].split('_')[-2][:-2])
-        end = int(self.alldatafiles[-1].split('_')[-2][:-2])
-        return [start, end]
+    @staticmethod
+    def _get_start_end_filenumbers(datapath):
+        # first and last entry of the index sorted by filenumber
+        return get_directory_index(datapath).get_filenumber_range()
 
-    def _filter_range(self, datafiles, fn_range, filtered=False):
+    def _filter_range(self, datapath, datafiles, fn_range, filtered=False):
         start, end = fn_range
         if start is None or end is None:
-            fn_range = self._get_start_end_filenumbers()
+            fn_range = self._get_start_end_filenumbers(datapath)
         if filtered:
             datafiles = filter_filenames(datafiles, start, end)
         return datafiles, fn_range
@@ -81,20 +129,123 @@ class DNSFileSelectorModel(DNSObsModel):
         Reading of new files, if filtered is True, only the files in the
         range specified
         """
+        self.start_loading(watcher)
+        batch = []
+        with closing(self.load_files(datafiles, datapath, loaded)) as files:
+            for i, dnsfile in enumerate(files):
+                self.update_progress(i, len(datafiles))
+                if self.loading_canceled:
+                    break
+                if dnsfile.new_format:  # ignore files with old format
+                    batch.append(dnsfile)
+                if len(batch) >= BATCH_SIZE:
+                    self.add_loaded_files(batch)
+                    batch = []
+        if batch:
+            self.add_loaded_files(batch)
+        self.finish_loading(datapath)
+
+    # the steps of read_all, used by the background loading of the presenter
+
+    def start_loading(self, watcher=False):
         self.loading_canceled = False
         self._clear_scans_if_not_sequential(watcher)
-        for i, filename in enumerate(datafiles):
-            self.update_progress(i, len(datafiles))
-            if self.loading_canceled:
-                break
-            dnsfile = self._load_file_from_chache_or_new(
-                loaded, filename, datapath)
-            if dnsfile.new_format:  # ignore files with old format
-                self.treemodel.setup_model_data([dnsfile])
+
+    def add_loaded_files(self, dnsfiles):
+        """
+        adds dnsfiles to the treemodel, returns the rows of the new scans
+        """
+        first_row = self.treemodel.number_of_scans()
+        self.treemodel.setup_model_data(dnsfiles)
+        return range(first_row, self.treemodel.number_of_scans())
+
+    def finish_loading(self, datapath):
         self.old_data_set = set(self.alldatafiles)
         self._add_number_of_files_per_scan()
         self._save_filelist(datapath)
 
+    def is_loading_canceled(self):
+        return self.loading_canceled
+
+    def load_files(self, datafiles, datapath, loaded):
+        """
+        generator of the dnsfiles in the order of datafiles, files which are
+        not in loaded are read ahead by a pool of loading_threads threads,
+        files not yet read are skipped if the generator is closed
+        if most files are not in loaded they are parsed by processes, see
+        INGEST_MIN_FILES
+        """
+        new_files = [
+            filename for filename in datafiles if filename not in loaded
+        ]
+        if (len(new_files) >= INGEST_MIN_FILES
+                and 2 * len(new_files) > len(datafiles)):
+            yield from self._ingest_files(datafiles, datapath, loaded,
+                                          new_files)
+            return
+        if self.loading_threads < 2:
+            for filename in datafiles:
+                yield self._load_file_from_chache_or_new(
+                    loaded, filename, datapath)
+            return
+        window = deque()
+        window_size = self.loading_threads * _PREFETCH_PER_THREAD
+        with ThreadPoolExecutor(max_workers=self.loading_threads) as executor:
+            try:
+                for filename in datafiles:
+                    window.append(
+                        self._submit_file(executor, loaded, filename,
+                                          datapath))
+                    if len(window) >= window_size:
+                        yield window.popleft().result()
+                while window:
+                    yield window.popleft().result()
+            finally:
+                for future in window:
+                    future.cancel()
+
+    def _submit_file(self, executor, loaded, filename, datapath):
+        if filename in loaded:
+            future = Future()
+            future.set_result(loaded[filename])
+            return future
+        return executor.submit(self._load_file_from_chache_or_new, loaded,
+                               filename, datapath)
+
+    def _ingest_files(self, datafiles, datapath, loaded, new_files):
+        """
+        generator like load_files, new_files are parsed in chunks by a pool
+        of processes, a chunk is only waited for when its first file is
+        needed, for unreadable files or files with old format a record
+        with new_format False is returned
+        """
+        chunks = ingest_files(datapath, new_files, self.ingest_workers,
+                              INGEST_CHUNK_SIZE)
+        parsed = {}
+        position = 0  # of the next new file in new_files
+        try:
+            for filename in datafiles:
+                if filename in loaded:
+                    yield loaded[filename]
+                    continue
+                if position % INGEST_CHUNK_SIZE == 0:  # first of a chunk
+                    parsed = self._add_ingested(next(chunks))
+                position += 1
+                yield parsed.pop(
+                    filename, DNSFileMeta(filename=filename,
+                                          new_format=False))
+        finally:
+            chunks.close()
+
+    def _add_ingested(self, records):
+        # returns the parsed files of a chunk by filename
+        metas = {}
+        for record in records:
+            meta = record_to_meta(record)
+            self._new_records.append((meta, record[1], record[2]))
+            metas[meta.filename] = meta
+        return metas
+
     def read_standard(self, standardpath):
         """
         Reeding of standard files
@@ -102,9 +253,13 @@ class DNSFileSelectorModel(DNSObsModel):
         model = self.standard_data
         datafiles = return_filelist(standardpath)
         model.clear_scans()
-        for filename in datafiles:
-            dnsfile = DNSFile(standardpath, filename)
-            model.setup_model_data([dnsfile])
+        model.setup_model_data([
+            DNSFile(standardpath,
+                    filename,
+                    header_only=True,
+                    cache=self.get_file_cache(standardpath))
+            for filename in datafiles
+        ])
         model.add_number_of_childs()
         return model.rowCount()
 
@@ -128,41 +283,27 @@ class DNSFileSelectorModel(DNSObsModel):
         return self._load_saved_filelist(datapath)
 
     @staticmethod
-    def _load_saved_filelist(path):
+    def _get_index_path(datapath):
+        return os.path.join(get_data_cache_dir(datapath), INDEX_FILENAME)
+
+    def _load_saved_filelist(self, path):
         """
         we save the list of loaed files so we have to read the files only once
+        files which changed since they were saved are not returned and will
+        be parsed again
         """
-        loaded = {}
-        try:
-            txt = load_txt('last_filelist.txt', path)
-        except IOError:
-            return loaded
+        index_path = self._get_index_path(path)
+        if not os.path.isfile(index_path):
+            return {}
         try:
-            for line in txt:
-                dnsfile = ObjectDict()
-                data = line[0:-1].split(' ; ')
-                if len(data) < 15:
-                    continue
-                dnsfile.filenumber = data[0]
-                dnsfile.det_rot = float(data[1])
-                dnsfile.sample_rot = float(data[2])
-                dnsfile.field = data[3]
-                dnsfile.temp_samp = float(data[4])
-                dnsfile.sample = data[5]
-                dnsfile.endtime = data[6]
-                dnsfile.tofchannels = int(data[7])
-                dnsfile.channelwidth = float(data[8])
-                dnsfile.filename = data[9]
-                dnsfile.wavelength = float(data[10])
-                dnsfile.selector_speed = float(data[11])
-                dnsfile.scannumber = data[12]
-                dnsfile.scancommand = data[13]
-                dnsfile.scanpoints = data[14]
-                dnsfile.new_format = True
-                loaded[dnsfile.filename] = dnsfile
-        except IndexError:
+            mark_cache_used(path)
+        except OSError:  # the index can still be read
             pass
-        return loaded
+        try:
+            return DNSFileIndex(index_path).load(
+                stats=return_file_stats(path))
+        except (sqlite3.Error, OSError):
+            return {}
 
     def get_number_of_scans(self):
         return self.active_model.number_of_scans()
@@ -191,12 +332,12 @@ class DNSFileSelectorModel(DNSObsModel):
 
     def check_by_filenumbers(self, filenumbers):
         notfound = 0
-        filenb_dict = self.treemodel.get_filenumber_dict()
         for filenb in filenumbers:
-            try:
-                self.treemodel.set_checked_from_index(filenb_dict[filenb])
-            except KeyError:
+            index = self.treemodel.index_from_filenumber(filenb)
+            if index is None:
                 notfound += 1
+            else:
+                self.treemodel.set_checked_from_index(index)
         return notfound
 
     def check_fn_range(self, ffnmb, lfnmb):
@@ -210,6 +351,11 @@ class DNSFileSelectorModel(DNSObsModel):
             return self.standard_data
         return self.treemodel
 
+    def get_filter_model(self, standard=False):
+        if standard:
+            return self.standard_data_filter
+        return self.treemodel_filter
+
     # data receiving
 
     def model_is_standard(self):
@@ -228,35 +374,55 @@ class DNSFileSelectorModel(DNSObsModel):
 
     # scan filtering:
 
+    def _get_active_filter_model(self):
+        return self.get_filter_model(standard=self.model_is_standard())
+
+    def get_non_hidden_rows(self):
+        return self._get_active_filter_model().get_shown_rows()
+
+    def _uncheck_scans(self, rows, model=None):
+        if model is None:
+            model = self.active_model
+        for row in rows:
+            if model.scan_from_row(row).isChecked():
+                model.set_checked_scan(row, 0)
+
     def filter_scans_for_boxes(self, filters, is_tof):
-        model = self.active_model
-        hidescans = self._filter_tof_scans(is_tof)
-        for row in self.get_scan_range():
-            for text, filter_condition in filters:
-                if filter_condition and not model.text_in_scan(row, text):
-                    model.set_checked_scan(row, 0)
-                    hidescans.add(row)
+        """
+        filters the scans of the data model, also if the standard model is
+        active, returns the hidden rows which are unchecked
+        """
+        texts = [text for text, filter_condition in filters
+                 if filter_condition]
+        self.treemodel_filter.set_filters(texts=texts, is_tof=is_tof)
+        hidescans = self.treemodel_filter.get_hidden_rows()
+        self._uncheck_scans(hidescans, self.treemodel)
         return hidescans
 
     def _filter_tof_scans(self, is_tof):
-        hidescans = set()
-        for row in self.get_scan_range():
-            if is_tof != self.active_model.is_scan_tof(row):
-                hidescans.add(row)
-                self.active_model.set_checked_scan(row, 0)
+        hidescans = {
+            row
+            for row in self.get_scan_range()
+            if is_tof != self.active_model.is_scan_tof(row)
+        }
+        self._uncheck_scans(hidescans)
         return hidescans
 
     def filter_standard_types(self, filters, active, is_tof):
-        hidescans = self._filter_tof_scans(is_tof)
-        for row in self.get_scan_range():
-            scan = self.active_model.scan_from_row(row)
-            hidden = [
-                filters[sampletype] and scan.is_type(sampletype)
-                for sampletype in ['vanadium', 'nicr', 'empty']
+        """
+        filters the scans of the active model by sample type if active,
+        returns the hidden rows, scans hidden due to tof are unchecked
+        """
+        sampletypes = None
+        if active:
+            sampletypes = [
+                sampletype for sampletype in ['vanadium', 'nicr', 'empty']
+                if filters[sampletype]
             ]
-            if not any(hidden) and active:
-                hidescans.add(row)
-        return hidescans
+        filter_model = self._get_active_filter_model()
+        filter_model.set_filters(is_tof=is_tof, sampletypes=sampletypes)
+        self._filter_tof_scans(is_tof)
+        return filter_model.get_hidden_rows()
 
     # opening data files in external editor
 
@@ -270,16 +436,51 @@ class DNSFileSelectorModel(DNSObsModel):
             open_editor(filename, path)
 
     # Chaching of filelist
-    @staticmethod
-    def _load_file_from_chache_or_new(loaded, filename, datapath):
+    def get_file_cache(self, datapath):
+        """
+        returns the cache of parsed files of datapath, it is stored in the
+        cache directory of datapath
+        """
+        if datapath not in self._file_caches:
+            self._file_caches[datapath] = DNSFileCache(
+                os.path.join(get_data_cache_dir(datapath), 'parsed_files'))
+        return self._file_caches[datapath]
+
+    def _load_file_from_chache_or_new(self, loaded, filename, datapath):
+        # files are only parsed if they are not in the file index, the
+        # parse cache would miss as well, so it is not used here
         dnsfile = loaded.get(filename, False)
         if not dnsfile:
-            dnsfile = DNSFile(datapath, filename)
+            dnsfile = DNSFile(datapath, filename, header_only=True)
+            if dnsfile.new_format:
+                self._new_records.append(
+                    (DNSFileMeta.from_dnsfile(dnsfile), ) +
+                    self._get_file_stat(datapath, filename))
         return dnsfile
 
+    @staticmethod
+    def _get_file_stat(datapath, filename):
+        try:
+            stat = os.stat(os.path.join(datapath, filename))
+        except OSError:
+            return None, None
+        return stat.st_size, stat.st_mtime_ns
+
     def _save_filelist(self, datapath):
-        txt = "".join(self.treemodel.get_txt())
+        """
+        only files which were parsed during the last loading are added to the
+        index of the directory, at the first save of a directory caches of
+        other data directories are removed if the total cache size exceeds
+        the budget
+        """
+        new_records, self._new_records = self._new_records, []
+        if not new_records:
+            return
         try:
-            save_txt(txt, 'last_filelist.txt', datapath)
-        except PermissionError:
+            mark_cache_used(datapath)
+            DNSFileIndex(self._get_index_path(datapath)).upsert(new_records)
+            if datapath not in self._budget_enforced:
+                self._budget_enforced.add(datapath)
+                enforce_cache_budget(keep=datapath)
+        except (sqlite3.Error, OSError):  # e.g. cache is not writable
             pass
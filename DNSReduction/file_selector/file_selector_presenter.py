@@ -9,8 +9,14 @@
 DNS File selector Presenter - Tab of DNS Reduction GUI
 """
 
+from functools import partial
+
+from qtpy.QtCore import QCoreApplication, QEventLoop, QThread
+
 from mantidqtinterfaces.DNSReduction.data_structures.dns_observer import\
     DNSObserver
+from mantidqtinterfaces.DNSReduction.file_selector.file_selector_loader \
+    import DNSFileLoader
 
 
 class DNSFileSelectorPresenter(DNSObserver):
@@ -23,10 +29,16 @@ class DNSFileSelectorPresenter(DNSObserver):
         # pylint: disable=too-many-arguments
         super().__init__(parent=parent, name=name, view=view, model=model)
         self.watcher = watcher
-        self.view.set_tree_model(self.model.get_model())
-        self.view.set_tree_model(self.model.get_model(standard=True),
+        self.view.set_tree_model(self.model.get_filter_model())
+        self.view.set_tree_model(self.model.get_filter_model(standard=True),
                                  standard=True)
         self._old_data_set = set()
+        # files are read in a QThread, so the gui can be used while loading
+        self.background_loading = True
+        self._loading_thread = None
+        self._loader = None
+        # reads requested while loading are done afterwards
+        self._pending_read = None
 
         # connect signals
         self.view.sig_read_all.connect(self._read_all)
@@ -45,31 +57,116 @@ class DNSFileSelectorPresenter(DNSObserver):
 
     # loading
 
-    def _read_all(self, filtered=False, watcher=False, start=None, end=None):
+    def _read_all(self,
+                  filtered=False,
+                  watcher=False,
+                  start=None,
+                  end=None,
+                  background=None):
         """
         Reading of new files, if filtered is True, only the files in the
         range specified by start and end
+        if background the files are read in a QThread, default is
+        background_loading
         """
+        # pylint: disable=too-many-arguments
+        if self.is_loading():
+            if background is not False:
+                self._queue_read(filtered=filtered, watcher=watcher,
+                                 start=start, end=end)
+                return
+            self._wait_for_loading()
+        if background is None:
+            background = self.background_loading
         fn_range = [start, end]
         datapath = self.param_dict['paths']['data_dir']
         nbfiles, loaded, datafiles, fn_range = \
             self.model.set_datafiles_to_load(datapath, fn_range, filtered,
                                              watcher)
-
+        if background:
+            self._start_background_loading(datafiles, datapath, loaded,
+                                           watcher)
+            self._loader.sig_finished.connect(
+                partial(self._background_loading_finished, datapath,
+                        filtered, fn_range))
+            self.view.open_progress_dialog(nbfiles, modal=False)
+            self._loading_thread.start()
+            return
         self.view.open_progress_dialog(nbfiles)
         self.model.read_all(datafiles, datapath, loaded, watcher)
-        self.view.set_first_column_spanned(self.model.get_scan_range())
+        self._loading_finished(filtered, fn_range)
+
+    def _loading_finished(self, filtered, fn_range):
+        # files are loaded into the data model, the standard model can be
+        # active if the user changed to it while loading
         self._filter_scans()
-        if self.model.get_number_of_scans() == 1:
+        if (not self.model.model_is_standard()
+                and self.model.get_number_of_scans() == 1):
             self.view.expand_all()
         if not filtered:
             self._set_start_end(fn_range)
 
-    def _read_filtered(self):
+    def is_loading(self):
+        return self._loading_thread is not None
+
+    def _queue_read(self, **kwargs):
+        """
+        reads requested while loading are done when loading finished,
+        a read requested by the user replaces a read of the watcher
+        """
+        if not kwargs['watcher'] or self._pending_read is None:
+            self._pending_read = kwargs
+
+    def _wait_for_loading(self):
+        """
+        blocks until the background loading and the reads queued meanwhile
+        finished, the loaded files are added by the event loop
+        """
+        while self.is_loading():
+            QCoreApplication.processEvents(QEventLoop.AllEvents
+                                           | QEventLoop.WaitForMoreEvents)
+
+    def _start_background_loading(self, datafiles, datapath, loaded,
+                                  watcher):
+        self.model.start_loading(watcher)
+        self._loader = DNSFileLoader(
+            self.model.load_files(datafiles, datapath, loaded),
+            len(datafiles), self.model.is_loading_canceled)
+        self._loading_thread = QThread()
+        self._loader.moveToThread(self._loading_thread)
+        self._loading_thread.started.connect(self._loader.run)
+        # slots of the presenter are called in the gui thread
+        self._loader.sig_batch_loaded.connect(self._files_loaded)
+        self._loader.sig_progress.connect(self.update_progress)
+        self._loader.sig_finished.connect(self._loading_thread.quit)
+
+    def _files_loaded(self, dnsfiles):
+        """
+        adds a batch of files read in the background to the treemodel, the
+        filter model filters the new scans itself, so only they are spanned
+        all scans are filtered again when loading finished
+        """
+        new_rows = self.model.add_loaded_files(dnsfiles)
+        if not self.model.model_is_standard():
+            self.view.set_first_column_spanned(new_rows)
+
+    def _background_loading_finished(self, datapath, filtered, fn_range):
+        self._loading_thread.wait()
+        self._loading_thread = None
+        self._loader = None
+        self.model.finish_loading(datapath)
+        self._loading_finished(filtered, fn_range)
+        if self._pending_read is not None:
+            pending_read = self._pending_read
+            self._pending_read = None
+            self._read_all(**pending_read)
+
+    def _read_filtered(self, background=None):
         """ reads only the files in the range given by start and stop fields
             in the view """
         start, end = self.view.get_start_end_filenumbers()
-        self._read_all(filtered=True, start=start, end=end)
+        self._read_all(filtered=True, start=start, end=end,
+                       background=background)
 
     def _read_standard(self, selfcall=False):
         """
@@ -80,7 +177,6 @@ class DNSFileSelectorPresenter(DNSObserver):
         if not standardpath:
             self.raise_error('No path set for standard data')
         standard_found = self.model.read_standard(standardpath)
-        self.view.set_first_column_spanned(self.model.get_scan_range())
         self._filter_standard()
         if not standard_found and not selfcall:
             if self.model.try_unzip(datapath, standardpath):
@@ -137,40 +233,30 @@ class DNSFileSelectorPresenter(DNSObserver):
     def _uncheck_all_scans(self):
         self.model.uncheck_all_scans()
 
-    def _show_all_scans(self):
-        scan_range = self.model.get_scan_range()
-        for row in scan_range:
-            self.view.show_scan(row)
-
     def _get_non_hidden_rows(self):
-        hidden = self.view.is_scan_hidden
-        scan_range = self.model.get_scan_range()
-        nonhidden_rows = [row for row in scan_range if not hidden(row)]
-        return nonhidden_rows
+        return self.model.get_non_hidden_rows()
 
     def _filter_scans(self):
         """
         Hide and uncheck the scans in the treeview which do not
         match filters from get_filters
         """
-        self._show_all_scans()
         filters = self.view.get_filters().items()
-        hidescans = self.model.filter_scans_for_boxes(filters,
-                                                      self._is_modus_tof())
-        for row in hidescans:
-            self.view.hide_scan(row, hidden=True)
+        self.model.filter_scans_for_boxes(filters, self._is_modus_tof())
+        # scans shown again by the filter are new rows of the treeview, the
+        # view shows the data model only if the standard model is not active
+        if not self.model.model_is_standard():
+            self.view.set_first_column_spanned(self.model.get_scan_range())
 
     def _filter_standard(self):
         """
         Hide and uncheck the standard files which do not match filters
         """
-        self._show_all_scans()
         filters = self.view.get_standard_filters()
         active = filters['vanadium'] or filters['empty'] or filters['nicr']
-        hidescans = self.model.filter_standard_types(filters, active,
-                                                     self._is_modus_tof())
-        for row in hidescans:
-            self.view.hide_scan(row, hidden=True)
+        self.model.filter_standard_types(filters, active,
+                                         self._is_modus_tof())
+        self.view.set_first_column_spanned(self.model.get_scan_range())
 
     # Change of datasets
 
@@ -253,5 +339,6 @@ class DNSFileSelectorPresenter(DNSObserver):
         ffnmb = int(command_dict['files'][0]['ffnmb'])
         lfnmb = int(command_dict['files'][0]['lfnmb'])
         self.view.set_start_end_filenumbers_from_arguments(ffnmb, lfnmb)
-        self._read_filtered()
+        # files have to be loaded before they can be checked
+        self._read_filtered(background=False)
         self.model.check_fn_range(ffnmb, lfnmb)
@@ -10,7 +10,7 @@ DNS File selector View - Tab of DNS Reduction GUI
 
 from mantidqt.utils.qt import load_ui
 
-from qtpy.QtCore import QModelIndex, Qt, Signal
+from qtpy.QtCore import QModelIndex, Qt, QTimer, Signal
 from qtpy.QtWidgets import QProgressDialog
 
 from mantidqtinterfaces.DNSReduction.data_structures.dns_view import DNSView
@@ -19,8 +19,11 @@ from mantidqtinterfaces.DNSReduction.data_structures.dns_view import DNSView
 class DNSFileSelectorView(DNSView):
     """
        lets user select DNS data data files for further reduction
+       the treeviews show the scans through a DNSScanFilterModel
     """
     NAME = 'Data'
+    # ms after the last keystroke in the free text filter until filtering
+    FILTER_DELAY = 300
 
     def __init__(self, parent):
         super().__init__(parent)
@@ -71,8 +74,13 @@ class DNSFileSelectorView(DNSView):
             self._filter_scans_checked)
         self._content.cB_filter_free.stateChanged.connect(
             self._filter_scans_checked)
+        # filtering is delayed while the free text is typed
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(self.FILTER_DELAY)
+        self._filter_timer.timeout.connect(self._filter_scans_checked)
         self._content.lE_filter_free_text.textChanged.connect(
-            self._filter_scans_checked)
+            self._filter_timer.start)
         self._content.pB_expand_all.clicked.connect(self.expand_all)
         self._content.pB_expand_none.clicked.connect(self._un_expand_all)
         self._content.pB_check_all.clicked.connect(self._check_all)
@@ -118,8 +126,12 @@ class DNSFileSelectorView(DNSView):
 
     # Signal reactions
 
+    def _map_to_source(self, index):
+        return self._treeview.model().mapToSource(index)
+
     def _treeview_clicked(self, point):
-        self.sig_right_click.emit(self._treeview.indexAt(point))
+        self.sig_right_click.emit(
+            self._map_to_source(self._treeview.indexAt(point)))
 
     def _autoload_checked(self, state):
         self.sig_autoload_clicked.emit(state)
@@ -202,7 +214,13 @@ class DNSFileSelectorView(DNSView):
         return self._content.sB_last_scans.value()
 
     def get_selected_indexes(self):
-        return self._treeview.selectedIndexes()
+        """
+        returns the selected indexes of the source model
+        """
+        return [
+            self._map_to_source(index)
+            for index in self._treeview.selectedIndexes()
+        ]
 
     def get_standard_filters(self):
         state_dict = self.get_state()
@@ -218,29 +236,27 @@ class DNSFileSelectorView(DNSView):
         end = self._map['file_to'].value()
         return [start, end]
 
-    def hide_scan(self, row, hidden=True):
-        self._treeview.setRowHidden(row, self._treeview.rootIndex(), hidden)
-
-    def show_scan(self, row):
-        self._treeview.setRowHidden(row, self._treeview.rootIndex(), False)
-
     def hide_tof(self, hidden=True):
         self._standard_treeview.setColumnHidden(7, hidden)
         self._standard_treeview.setColumnHidden(8, hidden)
         self._sample_treeview.setColumnHidden(7, hidden)
         self._sample_treeview.setColumnHidden(8, hidden)
 
-    def is_scan_hidden(self, row):
-        return self._treeview.isRowHidden(row, self._treeview.rootIndex())
-
     # progress dialog
 
-    def open_progress_dialog(self, numofsteps):
+    def open_progress_dialog(self, numofsteps, modal=True):
+        """
+        the dialog is not modal if files are loaded in the background, so
+        the loaded scans can be used
+        """
         if numofsteps:
             self.progress = QProgressDialog(
                 "Loading {} files...".format(numofsteps), "Abort Loading", 0,
                 numofsteps)
-            self.progress.setWindowModality(Qt.WindowModal)
+            if modal:
+                self.progress.setWindowModality(Qt.WindowModal)
+            else:
+                self.progress.setWindowModality(Qt.NonModal)
             self.progress.setMinimumDuration(200)
             self.progress.open(self._progress_canceled)
 
@@ -253,9 +269,18 @@ class DNSFileSelectorView(DNSView):
     # manipulating view
 
     def set_first_column_spanned(self, scanrange):
-        for i in scanrange:
-            self._treeview.setFirstColumnSpanned(i, self._treeview.rootIndex(),
-                                                 True)
+        """
+        scanrange are rows of the source model, filtered out scans are
+        skipped
+        """
+        filter_model = self._treeview.model()
+        source_model = filter_model.sourceModel()
+        for row in scanrange:
+            index = filter_model.mapFromSource(
+                source_model.index(row, 0, QModelIndex()))
+            if index.isValid():
+                self._treeview.setFirstColumnSpanned(
+                    index.row(), self._treeview.rootIndex(), True)
 
     def set_start_end_filenumbers_from_arguments(self, start, end):
         self.set_single_state(self._map['file_nb'], start)
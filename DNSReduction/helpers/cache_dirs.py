@@ -0,0 +1,124 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+"""
+DNS cache directories of data directories
+"""
+
+import hashlib
+import os
+import shutil
+
+from mantidqtinterfaces.DNSReduction.helpers.file_processing import \
+    get_cache_root
+
+# total size of all data directory caches in bytes
+CACHE_BUDGET = 2 * 1024**3
+DATADIRS = 'datadirs'
+# file in every cache directory containing the path of the data directory,
+# its mtime is the time of the last use of the cache
+DATAPATH_FILENAME = 'datapath.txt'
+
+
+def get_data_cache_dir(datapath, cache_root=None):
+    """
+    Return cache directory of a data directory, the name is a hash of the
+    absolute data path, the directory is not created
+    """
+    if cache_root is None:
+        cache_root = get_cache_root()
+    key = hashlib.sha1(os.path.abspath(datapath).encode()).hexdigest()
+    return os.path.join(cache_root, DATADIRS, key[:16])
+
+
+def mark_cache_used(datapath, cache_root=None):
+    """
+    Create cache directory of datapath if necessary and mark it as
+    recently used, returns the cache directory
+    """
+    cache_dir = get_data_cache_dir(datapath, cache_root)
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(os.path.join(cache_dir, DATAPATH_FILENAME), 'w') as f:
+        f.write(os.path.abspath(datapath))
+    return cache_dir
+
+
+def _get_dir_size(directory):
+    size = 0
+    for root, _dirs, files in os.walk(directory):
+        for filename in files:
+            try:
+                size += os.path.getsize(os.path.join(root, filename))
+            except OSError:
+                pass
+    return size
+
+
+def get_cache_usage(cache_root=None):
+    """
+    Return list of dictionaries with datapath, cache_dir, size and
+    last_used (timestamp) of all data directory caches, least recently used
+    first
+    """
+    if cache_root is None:
+        cache_root = get_cache_root()
+    usage = []
+    try:
+        entries = list(os.scandir(os.path.join(cache_root, DATADIRS)))
+    except OSError:
+        return usage
+    for entry in entries:
+        if not entry.is_dir():
+            continue
+        marker = os.path.join(entry.path, DATAPATH_FILENAME)
+        try:
+            with open(marker, 'r') as f:
+                datapath = f.read()
+            last_used = os.path.getmtime(marker)
+        except OSError:
+            datapath = ''
+            last_used = 0
+        usage.append({
+            'datapath': datapath,
+            'cache_dir': entry.path,
+            'size': _get_dir_size(entry.path),
+            'last_used': last_used
+        })
+    return sorted(usage, key=lambda cache: cache['last_used'])
+
+
+def purge_cache(datapath=None, cache_root=None):
+    """
+    Remove the cache of datapath or the caches of all data directories
+    """
+    if datapath is None:
+        if cache_root is None:
+            cache_root = get_cache_root()
+        shutil.rmtree(os.path.join(cache_root, DATADIRS), ignore_errors=True)
+    else:
+        shutil.rmtree(get_data_cache_dir(datapath, cache_root),
+                      ignore_errors=True)
+
+
+def enforce_cache_budget(budget=CACHE_BUDGET, cache_root=None, keep=None):
+    """
+    Remove least recently used data directory caches until all caches
+    together are smaller than budget, the cache of datapath keep is not
+    removed
+    """
+    usage = get_cache_usage(cache_root)
+    total = sum(cache['size'] for cache in usage)
+    keep_dir = None
+    if keep is not None:
+        keep_dir = get_data_cache_dir(keep, cache_root)
+    for cache in usage:
+        if total <= budget:
+            break
+        if cache['cache_dir'] == keep_dir:
+            continue
+        shutil.rmtree(cache['cache_dir'], ignore_errors=True)
+        total -= cache['size']
+    return total
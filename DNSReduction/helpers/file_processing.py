@@ -10,33 +10,58 @@ DNS file helpers
 
 import glob
 import os
-import re
 import zipfile
 
+from mantidqtinterfaces.DNSReduction.data_structures.dns_directory_index \
+    import get_directory_index, get_filenumber, select_filenumber_range
+
+
+class _Filenumbers:
+    # filenumbers of a list of filenames, only the filenumbers of the names
+    # visited by the binary search are parsed
+    def __init__(self, filenames):
+        self.filenames = filenames
+
+    def __len__(self):
+        return len(self.filenames)
+
+    def __getitem__(self, i):
+        return get_filenumber(self.filenames[i])
+
 
 def filter_filenames(alldatafiles, start, end):
     """
-    Filter datafilenames to the range given
+    Filter datafilenames to the range given, alldatafiles has to be sorted
+    by filenumber like the list returned by return_filelist, start or end
+    None means no limit
     """
-    filtered = []
-    for filename in alldatafiles:
-        number = int(filename.split('_')[-2][:-2])
-        if end >= number >= start:
-            filtered.append(filename)
-    return filtered
+    return alldatafiles[select_filenumber_range(_Filenumbers(alldatafiles),
+                                                start, end)]
 
 
 def return_filelist(datadir):
     """
-    Return list of names of dnsfiles in datadir
+    Return list of names of dnsfiles in datadir sorted by filenumber,
+    the list is shared with the directory index and must not be changed
     """
-    filelist = []
     if not os.path.isdir(datadir):
         return []
-    for fname in os.listdir(datadir):
-        if re.match(r".*?_[0-9]+.d_dat", fname):
-            filelist.append(fname)
-    return filelist
+    return get_directory_index(datadir).filenames
+
+
+def return_file_stats(datadir):
+    """
+    Return dictionary with names of dnsfiles in datadir as keys and
+    (size, mtime in ns) as values
+    """
+    stats = {}
+    for filename in get_directory_index(datadir).filenames:
+        try:
+            stat = os.stat(os.path.join(datadir, filename))
+        except OSError:  # removed since the directory was scanned
+            continue
+        stats[filename] = (stat.st_size, stat.st_mtime_ns)
+    return stats
 
 
 def return_standard_zip(datadir):
@@ -99,6 +124,19 @@ def open_editor(filename, crdir=None):
         os.startfile(crpath)
 
 
+def get_cache_root():
+    """
+    Return directory for caches of the DNS reduction gui, either set by
+    DNS_REDUCTION_CACHE_DIR or in the XDG cache directory
+    """
+    cache_root = os.environ.get('DNS_REDUCTION_CACHE_DIR')
+    if cache_root:
+        return cache_root
+    xdg_cache = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache')
+    return os.path.join(xdg_cache, 'dns_reduction')
+
+
 def get_path_and_prefix(path):
     prefix = os.path.basename(path)
     path = os.path.dirname(path)
@@ -13,8 +13,12 @@ import os
 from os.path import expanduser
 
 from mantidqtinterfaces.DNSReduction.data_structures.dns_file import DNSFile
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file_index import \
+    INDEX_FILENAME
 from mantidqtinterfaces.DNSReduction.data_structures.dns_obs_model import \
     DNSObsModel
+from mantidqtinterfaces.DNSReduction.helpers.cache_dirs import \
+    get_cache_usage, purge_cache
 
 
 class DNSPathModel(DNSObsModel):
@@ -24,13 +28,27 @@ class DNSPathModel(DNSObsModel):
             firstfilename = next(glob.iglob('{}/*.d_dat'.format(dir_name)))
         except StopIteration:
             return ['', '']
-        dns_file = DNSFile(dir_name, firstfilename)
+        dns_file = DNSFile(dir_name, firstfilename, header_only=True)
         return [dns_file['users'], dns_file['proposal']]
 
     @staticmethod
     def clear_cache(path):
-        if path and os.path.isfile(path + '/last_filelist.txt'):
-            os.remove(path + '/last_filelist.txt')
+        if not path:
+            return
+        purge_cache(path)
+        # files in the data directory are caches of older versions
+        for filename in (INDEX_FILENAME, INDEX_FILENAME + '-wal',
+                         INDEX_FILENAME + '-shm', 'last_filelist.txt'):
+            if os.path.isfile(path + '/' + filename):
+                os.remove(path + '/' + filename)
+
+    @staticmethod
+    def get_cache_usage():
+        """
+        returns datapath, size and time of last use of the caches of all
+        data directories
+        """
+        return get_cache_usage()
 
     @staticmethod
     def get_startpath_for_dialog(path):
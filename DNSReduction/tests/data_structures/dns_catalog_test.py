@@ -0,0 +1,98 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+
+import unittest
+
+import numpy as np
+
+from mantidqtinterfaces.DNSReduction.data_structures.dns_catalog import (
+    DNSCatalog, DNSStringColumn)
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file_meta import \
+    DNSFileMeta
+from mantidqtinterfaces.DNSReduction.tests.helpers_for_testing import \
+    get_dataset
+
+
+class DNSStringColumnTest(unittest.TestCase):
+    def setUp(self):
+        self.column = DNSStringColumn(['vana', 'x', 'vana', 'empty'])
+
+    def test___init__(self):
+        self.assertEqual(list(self.column.categories), ['empty', 'vana', 'x'])
+        self.assertEqual(list(self.column.codes), [1, 2, 1, 0])
+        self.assertEqual(len(DNSStringColumn()), 0)
+
+    def test___getitem__(self):
+        self.assertEqual(self.column[1], 'x')
+
+    def test_equals(self):
+        self.assertEqual(list(self.column.equals('vana')),
+                         [True, False, True, False])
+        self.assertFalse(self.column.equals('nicr').any())
+
+    def test_contains(self):
+        self.assertEqual(list(self.column.contains('a')),
+                         [True, False, True, False])
+        self.assertEqual(len(DNSStringColumn().contains('a')), 0)
+
+    def test_take(self):
+        testv = self.column.take(np.array([False, True, True, False]))
+        self.assertEqual(testv.tolist(), ['x', 'vana'])
+
+    def test_groups(self):
+        testv = self.column.groups()
+        self.assertEqual([list(rows) for rows in testv], [[0, 2], [1], [3]])
+        self.assertEqual(DNSStringColumn().groups(), [])
+
+
+class DNSCatalogTest(unittest.TestCase):
+    def setUp(self):
+        self.data = get_dataset()
+        self.catalog = DNSCatalog.from_records(self.data)
+
+    def test_from_records(self):
+        self.assertEqual(len(self.catalog), 2)
+        self.assertEqual(self.catalog['filenumber'].dtype, np.int64)
+        self.assertEqual(list(self.catalog['filenumber']), [787463, 788058])
+        self.assertIsInstance(self.catalog['sample'], DNSStringColumn)
+        self.assertEqual(len(DNSCatalog.from_records([])), 0)
+
+    def test_from_entries(self):
+        entries = [{'filenumber': 2, 'samplename': 'vana', 'x': 1},
+                   {'filenumber': 1, 'samplename': 'x', 'x': 1}]
+        testv = DNSCatalog.from_entries(entries, ('filenumber', 'samplename'))
+        self.assertEqual(len(testv), 2)
+        self.assertEqual(testv['filenumber'].dtype, np.int64)
+        self.assertEqual(testv.get_values('samplename'), ['vana', 'x'])
+        self.assertNotIn('x', testv.columns)
+        self.assertEqual(len(DNSCatalog.from_entries([], ('filenumber', ))),
+                         0)
+
+    def test_select(self):
+        testv = self.catalog.select(self.catalog.filenumber_range(0, 787463))
+        self.assertEqual(len(testv), 1)
+        self.assertEqual(testv.get_values('field'), ['z7_sf'])
+        self.assertEqual(len(self.catalog.select([])), 0)
+
+    def test_queries(self):
+        self.assertEqual(list(self.catalog.equals('field', 'z7_nsf')),
+                         [False, True])
+        self.assertEqual(list(self.catalog.equals('tofchannels', 1)),
+                         [True, False])
+        self.assertEqual(list(self.catalog.contains('sample', 'map')),
+                         [True, True])
+        self.assertEqual(list(self.catalog.is_tof()), [False, True])
+
+    def test_to_records(self):
+        testv = self.catalog.to_records()
+        self.assertIsInstance(testv[0], DNSFileMeta)
+        self.assertEqual(testv[0], DNSFileMeta.from_dnsfile(self.data[0]))
+        self.assertEqual(testv[1].filenumber, '788058')
+
+
+if __name__ == '__main__':
+    unittest.main()
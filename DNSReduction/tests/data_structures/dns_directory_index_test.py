@@ -0,0 +1,106 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+"""
+Index of the DNS datafiles in a directory sorted by filenumber
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from mantidqtinterfaces.DNSReduction.data_structures.dns_directory_index \
+    import DNSDirectoryIndex, get_directory_index, get_filenumber, \
+    select_filenumber_range
+
+
+class DNSDirectoryIndexTest(unittest.TestCase):
+    # pylint: disable=protected-access
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.datadir = self.tmpdir.name
+        for filename in ['p_788058.d_dat', 'p_774714.d_dat', 'p_787463.d_dat',
+                         'a.d_dat', 'p_1.txt']:
+            self.write(filename)
+        self.index = DNSDirectoryIndex(self.datadir)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, filename):
+        with open(os.path.join(self.datadir, filename), 'w') as f:
+            f.write('123')
+
+    def test_get_filenumber(self):
+        self.assertEqual(get_filenumber('service_774714.d_dat'), 774714)
+        self.assertEqual(get_filenumber('p_1_000012.d_dat'), 12)
+        self.assertIsNone(get_filenumber('a.d_dat'))
+        self.assertIsNone(get_filenumber('x_123Xd_dat'))
+        self.assertIsNone(get_filenumber('x_123.d_dat.bak'))
+
+    def test_refresh(self):
+        os.utime(self.datadir, ns=(10**9, 10**9))
+        self.assertTrue(self.index.refresh())
+        self.assertEqual(
+            self.index.filenames,
+            ['p_774714.d_dat', 'p_787463.d_dat', 'p_788058.d_dat'])
+        self.assertTrue(
+            np.array_equal(self.index.filenumbers, [774714, 787463, 788058]))
+        self.assertEqual(len(self.index), 3)
+        # unchanged directory is not scanned again
+        with patch.object(self.index, '_scan') as mock_scan:
+            self.assertFalse(self.index.refresh())
+            mock_scan.assert_not_called()
+        self.write('p_1.d_dat')
+        os.utime(self.datadir, ns=(2 * 10**9, 2 * 10**9))
+        self.assertTrue(self.index.refresh())
+        self.assertEqual(self.index.filenames[0], 'p_1.d_dat')
+
+    def test_refresh_recently_modified(self):
+        # files can be added in the same mtime tick after the scan
+        self.assertTrue(self.index.refresh())
+        self.write('p_1.d_dat')
+        os.utime(self.datadir, ns=(self.index._dir_mtime, ) * 2)
+        self.assertTrue(self.index.refresh())
+        self.assertEqual(self.index.filenames[0], 'p_1.d_dat')
+
+    def test_not_existing_directory(self):
+        index = DNSDirectoryIndex('not_existing/123')
+        self.assertTrue(index.refresh())
+        self.assertEqual(index.filenames, [])
+        self.assertEqual(index.get_filenumber_range(), [0, 0])
+
+    def test_select_filenumber_range(self):
+        filenumbers = np.array([1, 3, 3, 7, 9])
+        self.assertEqual(select_filenumber_range(filenumbers, 3, 7),
+                         slice(1, 4))
+        self.assertEqual(select_filenumber_range(filenumbers, 4, 6),
+                         slice(3, 3))
+        self.assertEqual(select_filenumber_range(filenumbers, 0, 100),
+                         slice(0, 5))
+        self.assertEqual(select_filenumber_range(filenumbers, 9, 1),
+                         slice(4, 4))
+        self.assertEqual(select_filenumber_range([1, 3], None, 2),
+                         slice(0, 1))
+        self.assertEqual(select_filenumber_range([1, 3], 2, None),
+                         slice(1, 2))
+
+    def test_get_filenumber_range(self):
+        self.index.refresh()
+        self.assertEqual(self.index.get_filenumber_range(), [774714, 788058])
+
+    def test_get_directory_index(self):
+        testv = get_directory_index(self.datadir)
+        self.assertIsInstance(testv, DNSDirectoryIndex)
+        self.assertIs(get_directory_index(self.datadir + '/'), testv)
+        self.assertEqual(len(testv), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file import DNSFile
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file_cache import \
+    DNSFileCache
+from mantidqtinterfaces.DNSReduction.tests.helpers_for_testing import \
+    write_fake_dnsfile
+
+
+class DNSFileCacheTest(unittest.TestCase):
+    # pylint: disable=protected-access
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.datapath = os.path.join(self.tmpdir.name, 'data')
+        os.makedirs(self.datapath)
+        self.cache = DNSFileCache(os.path.join(self.tmpdir.name, 'cache'))
+        self.counts = write_fake_dnsfile(self.datapath, 'p123_788058.d_dat')
+        self.path = os.path.join(self.datapath, 'p123_788058.d_dat')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_get_key(self):
+        key = DNSFileCache.get_key(self.path)
+        self.assertEqual(key, DNSFileCache.get_key(self.path))
+        os.utime(self.path, ns=(0, 0))
+        self.assertNotEqual(key, DNSFileCache.get_key(self.path))
+
+    def test_store_and_load(self):
+        self.assertIsNone(self.cache.load_header(self.path))
+        self.cache.store(self.path, {'a': 1})
+        self.assertEqual(self.cache.load_header(self.path), {'a': 1})
+        self.assertIsNone(self.cache.load_counts(self.path))
+        self.cache.store(self.path, {'a': 1}, self.counts)
+        self.assertTrue(
+            np.array_equal(self.cache.load_counts(self.path), self.counts))
+        self.assertIsNone(self.cache.load_header('not_existing'))
+
+    def test_evict(self):
+        write_fake_dnsfile(self.datapath, 'p123_788059.d_dat')
+        second_path = os.path.join(self.datapath, 'p123_788059.d_dat')
+        self.cache.store(self.path, {'a': 1}, self.counts)
+        self.cache.store(second_path, {'a': 2}, self.counts)
+        os.utime(self.cache._entry_path(self.path), ns=(0, 0))
+        self.cache.evict(max_size=self.cache.get_size() - 1)
+        self.assertIsNone(self.cache.load_header(self.path))
+        self.assertEqual(self.cache.load_header(second_path), {'a': 2})
+        self.cache.clear()
+        self.assertEqual(self.cache.get_size(), 0)
+
+    def test_size_bound(self):
+        self.cache.max_size = 1
+        self.cache.store(self.path, {'a': 1}, self.counts)
+        self.assertEqual(self.cache.get_size(), 0)
+
+    def test_dnsfile_with_cache(self):
+        dnsfile = DNSFile(self.datapath, 'p123_788058.d_dat', cache=self.cache)
+        self.assertEqual(self.cache.load_header(self.path),
+                         dnsfile.get_header())
+        with patch('mantidqtinterfaces.DNSReduction.data_structures.'
+                   'dns_file.parse_counts_block') as mock_parse:
+            cached = DNSFile(self.datapath,
+                             'p123_788058.d_dat',
+                             cache=self.cache)
+            mock_parse.assert_not_called()
+        self.assertTrue(cached.new_format)
+        self.assertEqual(cached.get_header(), dnsfile.get_header())
+        self.assertTrue(np.array_equal(cached.counts, self.counts))
+
+    def test_dnsfile_header_only_with_cache(self):
+        DNSFile(self.datapath,
+                'p123_788058.d_dat',
+                header_only=True,
+                cache=self.cache)
+        self.assertIsNone(self.cache.load_counts(self.path))
+        dnsfile = DNSFile(self.datapath,
+                          'p123_788058.d_dat',
+                          header_only=True,
+                          cache=self.cache)
+        self.assertEqual(dnsfile.det_rot, -9.0)
+        self.assertTrue(np.array_equal(dnsfile.counts, self.counts))
+        self.assertTrue(
+            np.array_equal(self.cache.load_counts(self.path), self.counts))
+
+
+if __name__ == '__main__':
+    unittest.main()
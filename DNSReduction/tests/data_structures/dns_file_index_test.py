@@ -0,0 +1,82 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file_index import \
+    DNSFileIndex
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file_meta import \
+    DNSFileMeta
+from mantidqtinterfaces.DNSReduction.tests.helpers_for_testing import \
+    dns_file, get_3filenames
+
+
+class DNSFileIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.index = DNSFileIndex(
+            os.path.join(self.tmpdir.name, 'last_filelist.sqlite'))
+        self.records = [
+            DNSFileMeta.from_dnsfile(dns_file('', filename))
+            for filename in get_3filenames()
+        ]
+        self.index.upsert([(record, 10 + i, 20 + i)
+                           for i, record in enumerate(self.records)])
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_load(self):
+        testv = self.index.load()
+        self.assertEqual(len(testv), 3)
+        self.assertEqual(testv['service_788058.d_dat'], self.records[2])
+        self.assertEqual(len(self.index), 3)
+
+    def test_load_unchanged(self):
+        stats = {
+            'service_774714.d_dat': (10, 20),
+            'service_787463.d_dat': (11, 22),
+        }
+        testv = self.index.load(stats=stats)
+        self.assertEqual(list(testv), ['service_774714.d_dat'])
+        # entries of removed files are deleted, changed files are kept
+        self.assertEqual(sorted(self.index.load()), [
+            'service_774714.d_dat', 'service_787463.d_dat'])
+        self.index.load(stats={})
+        self.assertEqual(len(self.index), 2)
+
+    def test_upsert(self):
+        record = DNSFileMeta.from_dnsfile(self.records[0])
+        record.sample = 'changed'
+        self.index.upsert([(record, 1, 2)])
+        testv = self.index.load()
+        self.assertEqual(len(testv), 3)
+        self.assertEqual(testv['service_774714.d_dat'].sample, 'changed')
+        testv = self.index.load(stats={'service_774714.d_dat': (1, 2)})
+        self.assertEqual(list(testv), ['service_774714.d_dat'])
+
+    def test_filenumber_range(self):
+        testv = self.index.filenumber_range(780000, 790000)
+        self.assertEqual([record.filenumber for record in testv],
+                         ['787463', '788058'])
+        self.assertEqual(self.index.filenumber_range(0, 1), [])
+
+    def test_remove(self):
+        self.index.remove(['service_774714.d_dat'])
+        self.assertEqual(len(self.index), 2)
+
+    def test_not_writable(self):
+        index = DNSFileIndex('not_existing/123/last_filelist.sqlite')
+        with self.assertRaises(sqlite3.Error):
+            index.upsert([(self.records[0], 1, 2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+"""
+Parsing of many DNS datafiles in worker processes
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file import \
+    DNSFile
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file_ingest \
+    import parse_file_records, record_to_meta, ingest_files
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file_meta import \
+    DNSFileMeta
+from mantidqtinterfaces.DNSReduction.tests.helpers_for_testing import \
+    write_fake_dnsfile
+
+
+class DNSFileIngestTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.datapath = cls.tmpdir.name
+        cls.filenames = []
+        for i in range(200):
+            filename = 'p123_{:06d}.d_dat'.format(788000 + i)
+            write_fake_dnsfile(cls.datapath, filename, 788000 + i, 10, i)
+            cls.filenames.append(filename)
+        with open(os.path.join(cls.datapath, 'p123_000001.d_dat'), 'w') as f:
+            f.write('not a dns file')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+
+    def test_parse_file_records(self):
+        testv = parse_file_records(self.datapath,
+                                   self.filenames[:2] + ['p123_000001.d_dat'])
+        self.assertEqual(len(testv), 2)
+        values, size, mtime, counts = testv[0]
+        self.assertIsInstance(values, tuple)
+        stat = os.stat(os.path.join(self.datapath, self.filenames[0]))
+        self.assertEqual((size, mtime), (stat.st_size, stat.st_mtime_ns))
+        self.assertIsNone(counts)
+        dnsfile = DNSFile(self.datapath, self.filenames[0], header_only=True)
+        self.assertEqual(record_to_meta(testv[0]),
+                         DNSFileMeta.from_dnsfile(dnsfile))
+        testv = parse_file_records(self.datapath,
+                                   self.filenames[:1],
+                                   with_counts=True)
+        self.assertEqual(testv[0][3].shape, (24, 10))
+
+    def test_ingest_files(self):
+        testv = list(ingest_files(self.datapath, self.filenames[:30],
+                                  workers=2, chunk_size=7))
+        self.assertEqual(len(testv), 5)
+        self.assertEqual([record[0][9] for chunk in testv
+                          for record in chunk], self.filenames[:30])
+        self.assertEqual(list(ingest_files(self.datapath, [], workers=2)),
+                         [])
+
+    def test_ingest_files_workers(self):
+        # several processes give the same records as one
+        results = [[
+            record[:3] for chunk in ingest_files(
+                self.datapath, self.filenames, workers, chunk_size=25)
+            for record in chunk
+        ] for workers in [1, 3]]
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(len(results[0]), len(self.filenames))
+
+    @patch('mantidqtinterfaces.DNSReduction.data_structures.dns_file_ingest.'
+           'ProcessPoolExecutor')
+    def test_ingest_files_spawn(self, mock_executor):
+        list(ingest_files(self.datapath, self.filenames[:4], workers=2,
+                          chunk_size=2))
+        context = mock_executor.call_args[1]['mp_context']
+        self.assertEqual(context.get_start_method(), 'spawn')
+
+
+if __name__ == '__main__':
+    unittest.main()
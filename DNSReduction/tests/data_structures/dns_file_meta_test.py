@@ -0,0 +1,56 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+
+import unittest
+
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file_meta import (
+    FILE_META_FIELDS, DNSFileMeta)
+from mantidqtinterfaces.DNSReduction.tests.helpers_for_testing import \
+    get_dataset
+
+
+class DNSFileMetaTest(unittest.TestCase):
+    def setUp(self):
+        self.data = get_dataset()[0]
+        self.meta = DNSFileMeta.from_dnsfile(self.data)
+
+    def test___init__(self):
+        self.assertFalse(hasattr(self.meta, '__dict__'))
+        meta = DNSFileMeta()
+        self.assertEqual(meta.filenumber, '')
+        self.assertTrue(meta.new_format)
+
+    def test_from_dnsfile(self):
+        self.assertEqual(self.meta.filenumber, '787463')
+        self.assertEqual(self.meta.tofchannels, 1)
+        self.assertIs(DNSFileMeta.from_dnsfile(self.meta), self.meta)
+        self.assertEqual(self.meta, self.data)
+
+    def test_to_list(self):
+        testv = self.meta.to_list()
+        self.assertEqual(testv, [self.data[key] for key in FILE_META_FIELDS])
+
+    def test_dictionary_access(self):
+        self.assertEqual(self.meta['det_rot'], -8.0)
+        self.meta['det_rot'] = 1.0
+        self.assertEqual(self.meta.det_rot, 1.0)
+        self.assertIn('sample', self.meta)
+        self.assertNotIn('counts', self.meta)
+        self.assertIsNone(self.meta.get('counts'))
+        self.assertEqual(len(self.meta), 16)
+        self.assertEqual(list(self.meta.keys()), list(self.meta))
+        self.assertEqual(dict(self.meta.items())['sample'], '4p1K_map')
+        with self.assertRaises(KeyError):
+            self.meta['counts']  # pylint: disable=pointless-statement
+        with self.assertRaises(KeyError):
+            self.meta['counts'] = 1
+        with self.assertRaises(AttributeError):
+            self.meta.counts = 1  # pylint: disable=assigning-non-slot
+
+
+if __name__ == '__main__':
+    unittest.main()
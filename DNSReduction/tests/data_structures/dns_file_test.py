@@ -9,13 +9,22 @@ Class which loads and stores a single DNS datafile in a dictionary
 """
 
 import os
+import tempfile
 import unittest
+from unittest.mock import patch
 
-from mantidqtinterfaces.DNSReduction.data_structures.dns_file import DNSFile
+import numpy as np
+
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file import (
+    DATA_LINE, DNSFile, format_counts_block, get_counts_sidecar_path,
+    parse_counts_block, parse_counts_by_line, write_dnsfiles)
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file_meta import \
+    DNSFileMeta
 from mantidqtinterfaces.DNSReduction.data_structures.object_dict import \
     ObjectDict
 from mantidqtinterfaces.DNSReduction.tests.helpers_for_testing import \
-    get_dataset, get_filepath
+    get_dataset, get_fake_dnsfile_header, get_filepath, write_fake_dnsfile
+from mantidqtinterfaces.DNSReduction.data_structures import dns_file
 
 
 class DNSFileTest(unittest.TestCase):
@@ -41,5 +50,171 @@ class DNSFileTest(unittest.TestCase):
         self.assertEqual(self.file.counts[3, 0], 22805)
 
 
+class DNSFileParserTest(unittest.TestCase):
+    # pylint: disable=protected-access
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.filepath = cls.tmpdir.name
+        cls.counts = write_fake_dnsfile(cls.filepath, 'p123_788058.d_dat')
+        with open(os.path.join(cls.filepath, 'p123_788058.d_dat')) as f:
+            lines = f.readlines()
+        cls.header = lines[:DATA_LINE]
+        cls.lines = lines[DATA_LINE:]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+
+    def test_parse_counts_block(self):
+        testv = parse_counts_block(self.lines, 1000)
+        reference = parse_counts_by_line(self.lines, 1000)
+        self.assertEqual(testv.dtype, reference.dtype)
+        self.assertTrue(testv.flags['C_CONTIGUOUS'])
+        self.assertTrue(np.array_equal(testv, reference))
+        self.assertTrue(np.array_equal(testv, self.counts))
+
+    def test_parse_counts_block_malformed(self):
+        lines = list(self.lines)
+        lines[3] = lines[3].replace(' ', ' x', 3)
+        with self.assertRaises(ValueError):
+            parse_counts_block(lines, 1000)
+
+    def test_read_counts(self):
+        dnsfile = DNSFile(self.filepath, 'p123_788058.d_dat')
+        self.assertTrue(dnsfile.new_format)
+        self.assertEqual(dnsfile.counts.shape, (24, 1000))
+        self.assertTrue(np.array_equal(dnsfile.counts, self.counts))
+
+    def test_get_meta(self):
+        dnsfile = DNSFile(self.filepath, 'p123_788058.d_dat',
+                          header_only=True)
+        testv = dnsfile.get_meta()
+        self.assertIsInstance(testv, DNSFileMeta)
+        self.assertEqual(testv.filenumber, '788058')
+        self.assertEqual(testv.scanpoints, '170')
+
+    def test_read_header_only(self):
+        dnsfile = DNSFile(self.filepath, 'p123_788058.d_dat',
+                          header_only=True)
+        self.assertTrue(dnsfile.new_format)
+        self.assertAlmostEqual(dnsfile['det_rot'], -9.0)
+        self.assertEqual(dnsfile.tofchannels, 1000)
+        self.assertNotIn('counts', dnsfile)
+        self.assertTrue(np.array_equal(dnsfile.counts, self.counts))
+        self.assertIn('counts', dnsfile)
+        with self.assertRaises(KeyError):
+            dnsfile['no_key']  # pylint: disable=pointless-statement
+        self.assertFalse(hasattr(dnsfile, 'no_key'))
+
+    def test_read_header_only_invalid(self):
+        with open(os.path.join(self.filepath, 'p123_000001.d_dat'),
+                  'w') as f:
+            f.write('# no DNS file\n')
+        dnsfile = DNSFile(self.filepath, 'p123_000001.d_dat',
+                          header_only=True)
+        self.assertFalse(dnsfile.new_format)
+        with self.assertRaises(KeyError):
+            dnsfile['counts']  # pylint: disable=pointless-statement
+
+    def test_read_header_only_truncated(self):
+        with open(os.path.join(self.filepath, 'p123_000002.d_dat'),
+                  'w') as f:
+            f.writelines(self.header + self.lines[:10])
+        dnsfile = DNSFile(self.filepath, 'p123_000002.d_dat',
+                          header_only=True)
+        self.assertFalse(dnsfile.new_format)
+        with open(os.path.join(self.filepath, 'p123_000002.d_dat'),
+                  'w') as f:
+            f.writelines(self.header + self.lines[:-1])
+        dnsfile = DNSFile(self.filepath, 'p123_000002.d_dat',
+                          header_only=True)
+        self.assertFalse(dnsfile.new_format)
+
+    def test__ends_with_last_data_line(self):
+        path = os.path.join(self.filepath, 'p123_788058.d_dat')
+        with open(path, 'rb') as f:
+            self.assertTrue(dns_file._ends_with_last_data_line(f))
+        path = os.path.join(self.filepath, 'p123_000003.d_dat')
+        for text, reference in [(b'', False), (b'63 1', True),
+                                (b'1\n2\n\n', False)]:
+            with open(path, 'wb') as f:
+                f.write(text)
+            with open(path, 'rb') as f:
+                self.assertEqual(dns_file._ends_with_last_data_line(f),
+                                 reference)
+
+    def test_get_counts_sidecar_path(self):
+        path = os.path.join(self.filepath, 'p123_788058.d_dat')
+        testv = get_counts_sidecar_path('memmap', path)
+        self.assertTrue(testv.startswith(
+            os.path.join('memmap', 'p123_788058.d_dat.')))
+        self.assertTrue(testv.endswith('.npy'))
+        with tempfile.TemporaryDirectory() as datapath:
+            write_fake_dnsfile(datapath, 'p123_788058.d_dat')
+            self.assertNotEqual(
+                get_counts_sidecar_path(
+                    'memmap', os.path.join(datapath, 'p123_788058.d_dat')),
+                testv)
+        with self.assertRaises(OSError):
+            get_counts_sidecar_path('memmap', 'no_dir/p123_1.d_dat')
+
+    def test_read_memmap(self):
+        path = os.path.join(self.filepath, 'p123_788058.d_dat')
+        with tempfile.TemporaryDirectory() as memmap_dir:
+            sidecar = get_counts_sidecar_path(memmap_dir, path)
+            dnsfile = DNSFile(self.filepath, 'p123_788058.d_dat',
+                              memmap_dir=memmap_dir)
+            self.assertTrue(os.path.isfile(sidecar))
+            self.assertIsInstance(dnsfile.counts, np.memmap)
+            self.assertFalse(dnsfile.counts.flags['WRITEABLE'])
+            self.assertTrue(np.array_equal(dnsfile.counts, self.counts))
+            with patch('mantidqtinterfaces.DNSReduction.data_structures.'
+                       'dns_file.parse_counts_block') as mock_parse:
+                dnsfile = DNSFile(self.filepath, 'p123_788058.d_dat',
+                                  header_only=True, memmap_dir=memmap_dir)
+                self.assertTrue(np.array_equal(dnsfile.counts, self.counts))
+                mock_parse.assert_not_called()
+            del dnsfile
+
+    def test_read_memmap_rewritten_file(self):
+        with tempfile.TemporaryDirectory() as datapath, \
+                tempfile.TemporaryDirectory() as memmap_dir:
+            path = os.path.join(datapath, 'p123_788058.d_dat')
+            write_fake_dnsfile(datapath, 'p123_788058.d_dat', seed=1)
+            DNSFile(datapath, 'p123_788058.d_dat', memmap_dir=memmap_dir)
+            mtime = os.stat(path).st_mtime_ns
+            counts = write_fake_dnsfile(datapath, 'p123_788058.d_dat',
+                                        seed=2)
+            # replaced by a file with an older mtime
+            os.utime(path, ns=(mtime - 10**9, mtime - 10**9))
+            dnsfile = DNSFile(datapath, 'p123_788058.d_dat',
+                              header_only=True, memmap_dir=memmap_dir)
+            self.assertTrue(np.array_equal(dnsfile.counts, counts))
+            self.assertEqual(len(os.listdir(memmap_dir)), 2)
+            del dnsfile
+
+    def test_format_counts_block(self):
+        testv = format_counts_block(np.array([[1, 22]] * 24)).splitlines()
+        self.assertEqual(len(testv), 64)
+        self.assertEqual(testv[0], ' 0         1       22')
+        self.assertEqual(testv[63], '63         0        0')
+        self.assertEqual(format_counts_block(self.counts),
+                         ''.join(self.lines))
+
+    def test_write_dnsfiles(self):
+        headers = [get_fake_dnsfile_header(788058 + i, 10) for i in range(3)]
+        counts = [np.full((24, 10), i) for i in range(3)]
+        filenames = ['p123_{}.d_dat'.format(788058 + i) for i in range(3)]
+        with tempfile.TemporaryDirectory() as datapath:
+            write_dnsfiles(datapath, filenames, headers, counts)
+            for i, filename in enumerate(filenames):
+                dnsfile = DNSFile(datapath, filename)
+                self.assertEqual(dnsfile.filenumber, str(788058 + i))
+                self.assertTrue(np.array_equal(dnsfile.counts, counts[i]))
+        with self.assertRaises(ValueError):
+            write_dnsfiles('', filenames, headers, counts[1:])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,40 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+
+import unittest
+
+from mantidqtinterfaces.DNSReduction.data_structures.dns_sample_type \
+    import DNSSampleClassifier, DNSSampleType, classify_sample
+
+
+class DNSSampleTypeTest(unittest.TestCase):
+    # pylint: disable=protected-access
+
+    def test_classify_sample(self):
+        self.assertEqual(classify_sample('vana_4K'), DNSSampleType.VANADIUM)
+        self.assertEqual(classify_sample('NiCr'), DNSSampleType.NICR)
+        self.assertEqual(classify_sample('leer'), DNSSampleType.EMPTY)
+        self.assertEqual(classify_sample('4p1K_map'), DNSSampleType.SAMPLE)
+        self.assertEqual(classify_sample('').value, 'sample')
+
+    def test_rule_order(self):
+        # the first matching rule is used
+        self.assertEqual(classify_sample('empty_vanadium_can'),
+                         DNSSampleType.VANADIUM)
+        self.assertEqual(classify_sample('nicr_empty'), DNSSampleType.NICR)
+
+    def test_classifier(self):
+        classifier = DNSSampleClassifier(
+            rules=((DNSSampleType.EMPTY, ('can', 'e.c.')), ))
+        self.assertEqual(classifier.classify('e.c.'), DNSSampleType.EMPTY)
+        self.assertEqual(classifier.classify('ec'), DNSSampleType.SAMPLE)
+        self.assertEqual(classifier.classify('vana'), DNSSampleType.SAMPLE)
+        self.assertEqual(classifier._types['ec'], DNSSampleType.SAMPLE)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+
+import unittest
+from unittest.mock import patch
+
+from qtpy.QtCore import QModelIndex, QSortFilterProxyModel
+
+from mantidqtinterfaces.DNSReduction.data_structures.dns_scan_filter_model \
+    import DNSScanFilterModel
+from mantidqtinterfaces.DNSReduction.data_structures.dns_treemodel \
+    import DNSTreeModel
+from mantidqtinterfaces.DNSReduction.tests.helpers_for_testing \
+    import get_dataset
+
+
+class DNSScanFilterModelTest(unittest.TestCase):
+    # pylint: disable=protected-access
+
+    def setUp(self):
+        self.treemodel = DNSTreeModel(data=get_dataset())
+        self.model = DNSScanFilterModel()
+        self.model.setSourceModel(self.treemodel)
+
+    def test___init__(self):
+        self.assertIsInstance(self.model, QSortFilterProxyModel)
+        self.assertEqual(self.model.rowCount(), 2)
+
+    def test_set_filters(self):
+        self.model.set_filters(texts=['14933'])
+        self.assertEqual(self.model.rowCount(), 1)
+        self.assertEqual(self.model.get_shown_rows(), [1])
+        self.model.set_filters(is_tof=False)
+        self.assertEqual(self.model.get_shown_rows(), [0])
+        self.model.set_filters(texts=['scan', 'det_rot'])
+        self.assertEqual(self.model.rowCount(), 2)
+        self.model.set_filters(sampletypes=['vanadium'])
+        self.assertEqual(self.model.rowCount(), 0)
+        self.model.set_filters(sampletypes=['sample'], is_tof=True)
+        self.assertEqual(self.model.get_hidden_rows(), {0})
+        # unchanged filters are not applied again
+        with patch.object(self.model, 'invalidateFilter') as mock_invalid:
+            self.model.set_filters(sampletypes=['sample'], is_tof=True)
+            mock_invalid.assert_not_called()
+
+    def test_set_filters_changed_texts(self):
+        self.model.set_filters(texts=['#1/'])
+        self.assertEqual(self.model.rowCount(), 0)
+        self.treemodel.add_number_of_childs()
+        # same filters are applied again if the texts of the scans changed
+        self.model.set_filters(texts=['#1/'])
+        self.assertEqual(self.model.rowCount(), 2)
+        # new scans are filtered when inserted
+        self.treemodel.clear_scans()
+        self.treemodel.setup_model_data(get_dataset())
+        self.assertEqual(self.model.rowCount(), 0)
+
+    def test_filterAcceptsRow(self):
+        self.model.set_filters(texts=['no_scan'])
+        self.assertFalse(self.model.filterAcceptsRow(0, QModelIndex()))
+        # datafiles are not filtered
+        scanindex = self.treemodel.index(0, 0, QModelIndex())
+        self.assertTrue(self.model.filterAcceptsRow(0, scanindex))
+
+    def test_get_scan_key(self):
+        scan = self.treemodel.scan_from_row(1)
+        self.assertEqual(self.model._get_scan_key(scan), (True, 'sample'))
+        self.assertIn(scan, self.model._keys)
+        self.treemodel.clear_scans()
+        self.assertEqual(self.model._keys, {})
+
+    def test_mapping(self):
+        self.model.set_filters(is_tof=True)
+        index = self.model.index(0, 0)
+        self.assertEqual(self.model.mapToSource(index).row(), 1)
+        self.assertTrue(self.model.canFetchMore(index))
+        self.model.fetchMore(index)
+        childindex = self.model.index(0, 0, index)
+        self.assertEqual(
+            self.treemodel.get_filename_from_index(
+                self.model.mapToSource(childindex)), 'service_788058.d_dat')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+
+import unittest
+
+from mantidqtinterfaces.DNSReduction.data_structures.dns_scan_index \
+    import DNSScanIndex, get_trigrams
+
+
+class DNSScanIndexTest(unittest.TestCase):
+    # pylint: disable=protected-access
+
+    def setUp(self):
+        self.index = DNSScanIndex()
+        for text in ['1 vana scan(det_rot) #10', '2 nicr cscan(sample_rot) #5',
+                     '3 sample scan(det_rot, sample_rot) #20', '4 empty #1']:
+            self.index.add(text)
+
+    def test_get_trigrams(self):
+        self.assertEqual(get_trigrams('scan'), {'sca', 'can'})
+        self.assertEqual(get_trigrams('ab'), set())
+
+    def test_add(self):
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.index._trigrams['can'], {0, 1, 2})
+        self.assertEqual(self.index.version, 4)
+
+    def test_search(self):
+        self.assertEqual(self.index.search(' scan'), {0, 2})
+        self.assertEqual(self.index.search('cscan'), {1})
+        self.assertEqual(self.index.search('sample_rot'), {1, 2})
+        self.assertEqual(self.index.search('#'), {0, 1, 2, 3})
+        self.assertEqual(self.index.search('xyz'), set())
+        # all trigrams in the text but not the text
+        self.assertEqual(self.index.search('scancan'), set())
+        self.assertIs(self.index.search('cscan'), self.index.search('cscan'))
+
+    def test_search_all(self):
+        self.assertEqual(self.index.search_all(['scan', 'det_rot']), {0, 2})
+        self.assertEqual(self.index.search_all(['nicr', 'det_rot']), set())
+        self.assertEqual(self.index.search_all([]), {0, 1, 2, 3})
+
+    def test_update(self):
+        self.index.search('#10')
+        self.index.update(0, '1 vana scan(det_rot) #2/10')
+        self.assertEqual(self.index.search('#10'), set())
+        self.assertEqual(self.index.search('#2/10'), {0})
+        self.assertEqual(self.index.version, 5)
+        self.index.update(0, '1 vana scan(det_rot) #2/10')
+        self.assertEqual(self.index.version, 5)
+
+    def test_clear(self):
+        self.index.clear()
+        self.assertEqual(len(self.index), 0)
+        self.assertEqual(self.index.search('scan'), set())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,8 +5,11 @@
 #     & Institut Laue - Langevin
 # SPDX - License - Identifier: GPL - 3.0 +
 
+import os
 import unittest
 
+import numpy as np
+
 from mantidqtinterfaces.DNSReduction.data_structures.dns_tof_powder_dataset \
     import DNSTofDataset
 from mantidqtinterfaces.DNSReduction.data_structures.object_dict import \
@@ -122,19 +125,12 @@ class DNSTofDatasetTest(unittest.TestCase):
             }
         })
 
-    def test__add_or_create_filelist(self):
-        entry = self.fulldata[0]
-        dataset = get_fake_tof_datadic()
-        det_rot = 0.0
-        datatype = 'knso'
-        dns_tof_powder_dataset._add_or_create_filelist(dataset, datatype,
-                                                       det_rot, entry)
-        self.assertTrue(0.0 in dataset['knso'])
-        self.assertEqual(dataset['knso'][0], [788058])
-        det_rot = -5.005
-        dns_tof_powder_dataset._add_or_create_filelist(dataset, datatype,
-                                                       det_rot, entry)
-        self.assertEqual(dataset['knso'][-5], [2, 3, 4, 788058])
+    def test__get_bank_filelists(self):
+        testv = dns_tof_powder_dataset._get_bank_filelists(
+            np.array([-5.0, 0.0, -5.005, -4.96, -5.0]),
+            np.array([1, 2, 3, 4, 5]))
+        self.assertEqual(testv, {-5.0: [1, 3, 4, 5], 0.0: [2]})
+        self.assertEqual(list(testv), [-5.0, 0.0])
 
     def test_create_dataset(self):
         data = self.fulldata
@@ -147,6 +143,33 @@ class DNSTofDatasetTest(unittest.TestCase):
                 'path': 'a\\service'
             }})
 
+    def test_create_dataset_grouped(self):
+        det_rots = [-9.0, -9.01, -8.0, -7.96, -9.04, -8.0, -6.0]
+        samples = ['vana', 'vana', 'vana', 'x', 'x', 'vana', 'x']
+        data = [{
+            'filenumber': 788058 + i,
+            'det_rot': det_rot,
+            'samplename': sample,
+            'filename': 'service_{}.d_dat'.format(788058 + i)
+        } for i, (det_rot, sample) in enumerate(zip(det_rots, samples))]
+        path = os.path.join('a', 'service')
+        testv = self.ds.create_dataset(data, 'a')
+        self.assertEqual(testv, {
+            'vana': {
+                -9.0: '[788058, 788059]',
+                'path': path,
+                -8.0: '[788060, 788063]'
+            },
+            'x': {
+                -7.96: '[788061]',
+                'path': path,
+                -9.04: '[788062]',
+                -6.0: '[788064]'
+            }
+        })
+        self.assertEqual(list(testv['vana']), [-9.0, 'path', -8.0])
+        self.assertEqual(self.ds.create_dataset([], 'a'), {})
+
     def test__create_new_datatype(self):
         entry = self.fulldata[0]
         dataset = get_fake_tof_datadic()
@@ -6,8 +6,17 @@
 # SPDX - License - Identifier: GPL - 3.0 +
 import unittest
 
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file_meta import \
+    DNSFileMeta
+from mantidqtinterfaces.DNSReduction.data_structures.dns_sample_type import \
+    DNSSampleType
 from mantidqtinterfaces.DNSReduction.data_structures.dns_treeitem import \
-    DNSTreeItem
+    DNSScanItem, DNSTreeItem
+
+
+class NoIndexList(list):
+    def index(self, *args):
+        raise AssertionError('row must not be searched')
 
 
 class DNSTreeItemTest(unittest.TestCase):
@@ -35,10 +44,19 @@ class DNSTreeItemTest(unittest.TestCase):
         self.assertEqual(self.item.child_items, [])
 
     def test_appendChild(self):
-        self.item.child_items = [1, 2, 3]
-        testv = self.item.appendChild(4)
-        self.assertEqual(self.item.child_items, [1, 2, 3, 4])
-        self.assertEqual(testv, 4)
+        childs = [DNSTreeItem([i], parent=self.item) for i in range(4)]
+        self.item.child_items = childs[:3]
+        testv = self.item.appendChild(childs[3])
+        self.assertEqual(self.item.child_items, childs)
+        self.assertEqual(testv, childs[3])
+        self.assertEqual(testv._row, 3)
+
+    def test_appendChildren(self):
+        childs = [DNSTreeItem([i], parent=self.item) for i in range(4)]
+        self.item.child_items = childs[:1]
+        self.item.appendChildren(childs[1:])
+        self.assertEqual(self.item.child_items, childs)
+        self.assertEqual([child._row for child in childs[1:]], [1, 2, 3])
 
     def test_child(self):
         self.item.child_items = [1, 2, 3]
@@ -46,9 +64,44 @@ class DNSTreeItemTest(unittest.TestCase):
         self.assertEqual(testv, 2)
 
     def test_removeChild(self):
-        self.item.child_items = [1, 2, 3]
+        self.item.clearChilds()
+        childs = [DNSTreeItem([i], parent=self.item) for i in range(3)]
+        self.item.appendChildren(childs)
         self.item.removeChild(1)
-        self.assertEqual(self.item.child_items, [1, 3])
+        self.assertEqual(self.item.child_items, [childs[0], childs[2]])
+        self.assertEqual(childs[2]._row, 1)
+        self.assertEqual(childs[2].row(), 1)
+
+    def test_checkedChildCount(self):
+        self.item.clearChilds()
+        self.assertEqual(self.item.checkedChildCount(), 0)
+        childs = [DNSTreeItem([i], parent=self.item) for i in range(3)]
+        self.item.appendChildren(childs)
+        childs[0].setChecked(2)
+        childs[1].setChecked(1)
+        childs[1].setChecked(2)
+        self.assertEqual(self.item.checkedChildCount(), 2)
+        self.item.removeChild(0)
+        self.assertEqual(self.item.checkedChildCount(), 1)
+        childs[1].setChecked(0)
+        self.assertEqual(self.item.checkedChildCount(), 0)
+
+    def test_pending_records(self):
+        self.item.clearChilds()
+        self.assertFalse(self.item.hasChildren())
+        self.assertFalse(self.item.canFetchMore())
+        self.item.pending_records = [DNSFileMeta(sample='vana', tofchannels=3)]
+        self.assertTrue(self.item.hasChildren())
+        self.assertTrue(self.item.canFetchMore())
+        self.assertEqual(self.item.totalChildCount(), 1)
+        self.assertEqual(self.item.first_child_data(7), 3)
+        self.assertEqual(self.item.get_sample_type(), 'vanadium')
+        records = self.item.take_pending_records()
+        self.assertEqual(len(records), 1)
+        self.assertFalse(self.item.canFetchMore())
+        self.item.appendChild(DNSTreeItem(records[0].to_list(), self.item))
+        self.assertEqual(self.item.totalChildCount(), 1)
+        self.assertEqual(self.item.first_child_data(7), 3)
 
     def test_childCount(self):
         self.item.child_items = [1, 2, 3]
@@ -122,6 +175,12 @@ class DNSTreeItemTest(unittest.TestCase):
         self.item.child_items = [child, child2]
         testv = child2.row()
         self.assertEqual(testv, 1)
+        # row of appended childs is not searched
+        self.item.clearChilds()
+        self.item.appendChildren([child, child2])
+        self.item.child_items = NoIndexList(self.item.child_items)
+        self.assertEqual(child2.row(), 1)
+        self.assertEqual(child.row(), 0)
 
     def test_setChecked(self):
         self.item.setChecked()
@@ -136,5 +195,47 @@ class DNSTreeItemTest(unittest.TestCase):
             self.item.setData('x', 100)
 
 
+class DNSScanItemTest(unittest.TestCase):
+    def setUp(self):
+        self.item = DNSScanItem('14932', 'vana', 'scan(det_rot)', ' 340 ')
+
+    def test___init__(self):
+        self.assertIsInstance(self.item, DNSTreeItem)
+        self.assertEqual(self.item.columnCount(), 10)
+        self.assertIsNone(self.item.counted_childs)
+
+    def test_get_expected_points(self):
+        self.assertEqual(self.item.get_expected_points(), 340)
+        self.item.scanpoints = ''
+        self.assertEqual(self.item.get_expected_points(), 0)
+
+    def test_get_label(self):
+        self.assertEqual(self.item.get_label(),
+                         '14932 vana scan(det_rot) # 340 ')
+        self.item.counted_childs = 3
+        self.assertEqual(self.item.get_label(),
+                         '14932 vana scan(det_rot) #3/ 340 ')
+        item = DNSScanItem('103', 'sample', '', '4')
+        item.counted_childs = 4
+        self.assertEqual(item.get_label(), '103 sample #4/4')
+
+    def test_get_sample_type(self):
+        self.assertEqual(self.item.sampletype, DNSSampleType.VANADIUM)
+        self.assertEqual(self.item.get_sample_type(), 'vanadium')
+        self.assertTrue(self.item.is_type('vanadium'))
+        item = DNSScanItem('1', 'vana', 'scan', '1',
+                           sampletype=DNSSampleType.EMPTY)
+        self.assertEqual(item.get_sample_type(), 'empty')
+        # files have the sample type of their scan
+        child = item.appendChild(DNSTreeItem(
+            [1, 2, 3, 4, 5, 'vana'], parent=item))
+        self.assertEqual(child.get_sample_type(), 'empty')
+        self.assertTrue(child.is_type('empty'))
+
+    def test_data(self):
+        self.assertEqual(self.item.data(0), self.item.get_label())
+        self.assertEqual(self.item.data(1), '')
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -9,8 +9,10 @@ import unittest
 
 from qtpy.QtCore import QAbstractItemModel, QModelIndex, Qt
 
+from mantidqtinterfaces.DNSReduction.data_structures.dns_sample_type \
+    import DNSSampleClassifier, DNSSampleType
 from mantidqtinterfaces.DNSReduction.data_structures.dns_treeitem \
-    import DNSTreeItem
+    import DNSScanItem, DNSTreeItem
 from mantidqtinterfaces.DNSReduction.data_structures.dns_treemodel \
     import DNSTreeModel
 from mantidqtinterfaces.DNSReduction.tests.helpers_for_testing \
@@ -34,10 +36,13 @@ class DNSTreeModelTest(unittest.TestCase):
         testv = self.model.index(0, 1, QModelIndex())
         self.assertIsInstance(testv, QModelIndex)
         self.assertTrue(testv.isValid())
-        testv = self.model.index(100, 1, self.model._scan_index_from_row(0))
+        scanindex = self.model._scan_index_from_row(0)
+        self.assertFalse(self.model.index(0, 1, scanindex).isValid())
+        self.model.fetchMore(scanindex)
+        testv = self.model.index(100, 1, scanindex)
         self.assertIsInstance(testv, QModelIndex)
         self.assertFalse(testv.isValid())
-        testv = self.model.index(0, 1, self.model._scan_index_from_row(0))
+        testv = self.model.index(0, 1, scanindex)
         self.assertIsInstance(testv, QModelIndex)
         self.assertTrue(testv.isValid())
 
@@ -61,10 +66,6 @@ class DNSTreeModelTest(unittest.TestCase):
         parent = self.model._scan_index_from_row(1)
         self.assertEqual(self.model.columnCount(parent), 10)
 
-    def test_scan_command_from_row(self):
-        tesv = self.model._scan_command_from_row(0)
-        self.assertEqual(tesv, self.first_scancommand)
-
     def test_scan_expected_points_from_row(self):
         tesv = self.model._scan_expected_points_from_row(0)
         self.assertEqual(tesv, 340)
@@ -81,18 +82,33 @@ class DNSTreeModelTest(unittest.TestCase):
     def test_get_sampletype(self):
         self.assertEqual(self.model._get_sampletype('123_vanadium'), 'vana')
         self.assertEqual(self.model._get_sampletype('123_hui'), '123_hui')
-
-    def test_get_scan_rows(self):
-        testv = self.model._get_scan_rows()
-        self.assertEqual(testv, [0, 1])
+        self.assertEqual(
+            self.model._get_sampletype('123_hui', DNSSampleType.NICR), 'nicr')
+
+    def test_classifier(self):
+        classifier = DNSSampleClassifier(
+            rules=((DNSSampleType.VANADIUM, ('4p1K', )), ))
+        model = DNSTreeModel(data=self.data, classifier=classifier)
+        self.assertTrue(model.scan_from_row(0).is_type('vanadium'))
+        self.assertEqual(self.model.scan_from_row(0).sampletype,
+                         DNSSampleType.SAMPLE)
+        model.check_scans_by_rows([0])
+        self.assertEqual(model.get_checked(fullinfo=True)[0]['sampletype'],
+                         'vana')
 
     def test_is_scan_complete(self):
         self.assertFalse(self.model._is_scan_complete(0))
         self.assertTrue(self.model._is_scan_complete(1))
 
-    def test_text_in_scan(self):
-        self.assertTrue(self.model.text_in_scan(0, 'scan'))
-        self.assertFalse(self.model.text_in_scan(0, 'hui'))
+    def test_search_scans(self):
+        self.assertEqual(self.model.search_scans(['14933', 'scan']), {1})
+        self.assertEqual(self.model.search_scans(['4p1K_map']), {0, 1})
+        version = self.model.get_scan_index_version()
+        self.model.add_number_of_childs()
+        self.assertEqual(self.model.search_scans(['#1/340']), {0})
+        self.assertNotEqual(self.model.get_scan_index_version(), version)
+        self.model.clear_scans()
+        self.assertEqual(self.model.search_scans([]), set())
 
     def test_get_last_row(self):
         self.assertEqual(self.model._get_last_row(), 1)
@@ -139,12 +155,14 @@ class DNSTreeModelTest(unittest.TestCase):
         index = self.model._scan_index_from_row(0)
         testv = self.model.get_filename_from_index(index)
         self.assertEqual(testv, '')
+        self.model.fetchMore(index)
         index = self.model._index_from_row(0, index)
         testv = self.model.get_filename_from_index(index)
         self.assertEqual(testv, 'service_787463.d_dat')
 
     def test_index_from_row(self):
         index = self.model._scan_index_from_row(0)
+        self.model.fetchMore(index)
         index = self.model._index_from_row(0, index)
         self.assertIsInstance(index, QModelIndex)
         self.assertTrue(index.isValid())
@@ -159,8 +177,47 @@ class DNSTreeModelTest(unittest.TestCase):
         testv = self.model.rowCount(parent=QModelIndex())
         self.assertEqual(testv, 2)  # scans
         testv = self.model.rowCount(parent=index)
+        self.assertEqual(testv, 0)  # datafiles are not fetched
+        self.model.fetchMore(index)
+        testv = self.model.rowCount(parent=index)
         self.assertEqual(testv, 1)  # datafiles in first scan
 
+    def test_hasChildren(self):
+        index = self.model._scan_index_from_row(0)
+        self.assertTrue(self.model.hasChildren(QModelIndex()))
+        self.assertTrue(self.model.hasChildren(index))
+        self.model.fetchMore(index)
+        self.assertTrue(self.model.hasChildren(index))
+        self.assertFalse(self.model.hasChildren(self.model.index(0, 0, index)))
+
+    def test_fetchMore(self):
+        index = self.model._scan_index_from_row(0)
+        inserted = []
+        self.model.rowsInserted.connect(
+            lambda parent, first, last: inserted.append((first, last)))
+        self.assertTrue(self.model.canFetchMore(index))
+        self.assertFalse(self.model.canFetchMore(QModelIndex()))
+        self.model.fetchMore(index)
+        self.assertFalse(self.model.canFetchMore(index))
+        self.assertEqual(inserted, [(0, 0)])
+        self.model.fetchMore(index)
+        self.assertEqual(inserted, [(0, 0)])
+        # files of a fetched scan are added as childs
+        self.model.fetchMore(self.model._scan_index_from_row(1))
+        dnsfile = get_dataset()[1]
+        dnsfile['filenumber'] = '788059'
+        self.model.setup_model_data([dnsfile])
+        self.assertEqual(inserted, [(0, 0), (0, 0), (1, 1)])
+        self.assertEqual(self.model.scan_from_row(1).childCount(), 2)
+
+    def test_item_checked_fetches_childs(self):
+        self.model.set_checked_scan(1, 2)
+        scan = self.model.scan_from_row(1)
+        self.assertEqual(scan.childCount(), 1)
+        self.assertEqual(self.model.get_checked(), [788058])
+        self.assertTrue(self.model.canFetchMore(
+            self.model._scan_index_from_row(0)))
+
     def test_get_or_create_parent_item(self):
         index = self.model._scan_index_from_row(0)
         testv = self.model._get_or_create_parent_item(parent=None)
@@ -182,6 +239,21 @@ class DNSTreeModelTest(unittest.TestCase):
         self.assertIsInstance(testv[0], dict)
         self.model.set_checked_scan(1, 0)
 
+    def test_get_checked_tracked(self):
+        # checked files are tracked, the tree is not searched
+        self.model.match = None
+        self.model.set_checked_scan(1, 2)
+        self.model.set_checked_scan(0, 2)
+        self.assertEqual(self.model.get_checked(), [787463, 788058])
+        self.assertEqual(self.model._checked_files,
+                         {self.model.scan_from_row(0).child(0),
+                          self.model.scan_from_row(1).child(0)})
+        self.model.set_checked_from_index(
+            self.model.index_from_filenumber(787463), 0)
+        self.assertEqual(self.model.get_checked(), [788058])
+        self.model.clear_scans()
+        self.assertEqual(self.model.get_checked(), [])
+
     def test_check_scans_by_indexes(self):
         index = self.model._scan_index_from_row(0)
         self.model.check_scans_by_indexes([])
@@ -240,6 +312,26 @@ class DNSTreeModelTest(unittest.TestCase):
         self.model._item_checked(childindex)
         self.assertFalse(item.isChecked())
 
+    def test_item_checked_emits_ranges(self):
+        changed = []
+        self.model.dataChanged.connect(
+            lambda first, last: changed.append(
+                (first.parent().isValid(), first.row(), last.row())))
+        self.model.check_scans_by_rows([0, 1])
+        # one range of the childs and the scan itself per scan
+        self.assertEqual(changed, [(True, 0, 0), (False, 0, 0),
+                                   (True, 0, 0), (False, 1, 1)])
+        scan = self.model.scan_from_row(0)
+        self.assertEqual(scan.checkedChildCount(), scan.childCount())
+        changed.clear()
+        self.model.uncheck_all_scans()
+        self.assertEqual(len(changed), 4)
+        self.assertEqual(self.model.get_checked(), [])
+        changed.clear()
+        # unchecked scans are skipped
+        self.model.uncheck_all_scans()
+        self.assertEqual(changed, [])
+
     def test_uncheck_all_scans(self):
         index = self.model._scan_index_from_row(0)
         self.model.set_checked_from_index(index)
@@ -260,9 +352,11 @@ class DNSTreeModelTest(unittest.TestCase):
         self.assertFalse(self.model._new_scan_check(self.data[0]))
         self.assertTrue(self.model._new_scan_check(self.data[1]))
 
-    def test_get_scantext(self):
-        testv = self.model._get_scantext(self.data[0])
-        self.assertEqual(testv[0], self.first_scancommand)
+    def test_create_scan(self):
+        testv = self.model._create_scan(self.data[0])
+        self.assertIsInstance(testv, DNSScanItem)
+        self.assertEqual(testv.data(0), self.first_scancommand)
+        self.assertEqual(testv.get_expected_points(), 340)
 
     def test_get_data_from_dnsfile(self):
         testv = self.model._get_data_from_dnsfile(self.data[0])[0]
@@ -270,6 +364,7 @@ class DNSTreeModelTest(unittest.TestCase):
 
     def test_check_child_if_scan_is_checked(self):
         index = self.model._scan_index_from_row(0)
+        self.model.fetchMore(index)
         scan = self.model._item_from_index(index)
         child = scan.child(0)
         scan.setChecked(0)
@@ -285,6 +380,11 @@ class DNSTreeModelTest(unittest.TestCase):
         self.assertFalse(scan.isChecked())
         self.model.check_fn_range(787463, 787463)
         self.assertTrue(scan.isChecked())
+        # filenumbers missing in the model are skipped
+        self.model.uncheck_all_scans()
+        self.model.check_fn_range(0, 1000000)
+        self.assertEqual(len(self.model.get_checked()),
+                         len(self.model.get_filenumbers()))
 
     def test_setup_model_data(self):
         self.assertEqual(self.model._lastscan_number, '14933')
@@ -293,23 +393,93 @@ class DNSTreeModelTest(unittest.TestCase):
         self.assertEqual(self.model._last_sample, '4p1K_map')
         self.assertEqual(self.model.rowCount(), 2)
 
+    def test_setup_model_data_batched(self):
+        def get_files(filenumbers):
+            files = []
+            for filenumber in filenumbers:
+                dnsfile = get_dataset()[1]
+                dnsfile['filenumber'] = str(filenumber)
+                files.append(dnsfile)
+            return files
+
+        inserted = []
+        self.model.rowsInserted.connect(
+            lambda parent, first, last: inserted.append(
+                (parent.isValid(), first, last)))
+        # files of the last scan and a new scan with three files
+        new_scan = get_files([788061, 788062, 788063])
+        for dnsfile in new_scan:
+            dnsfile['scannumber'] = '14934'
+        self.model.set_checked_scan(1, 2)
+        self.assertEqual(inserted, [(True, 0, 0)])  # fetched for checking
+        inserted.clear()
+        self.model.setup_model_data(get_files([788059, 788060]) + new_scan)
+        self.assertEqual(inserted, [(True, 1, 2), (False, 2, 2)])
+        self.assertEqual(self.model.rowCount(), 3)
+        scan = self.model.scan_from_row(1)
+        self.assertEqual([child.data(0) for child in scan.get_childs()],
+                         ['788058', '788059', '788060'])
+        self.assertEqual(scan.child(2).isChecked(), 2)
+        # childs of the new scan are created when fetched
+        self.assertEqual(self.model.scan_from_row(2).childCount(), 0)
+        self.assertEqual(self.model.scan_from_row(2).totalChildCount(), 3)
+        self.assertEqual(self.model.index_from_filenumber(788062).row(), 1)
+        self.assertEqual(self.model.scan_from_row(2).childCount(), 3)
+        # same model as adding the files one by one
+        model = DNSTreeModel()
+        for dnsfile in get_dataset() + get_files([788059, 788060]) + new_scan:
+            model.setup_model_data([dnsfile])
+        self.assertEqual(
+            [model.scan_from_row(row).data(0) for row in range(3)],
+            [self.model.scan_from_row(row).data(0) for row in range(3)])
+        model.check_scans_by_rows(range(3))
+        self.model.check_scans_by_rows(range(3))
+        self.assertEqual(model.get_checked(fullinfo=True),
+                         self.model.get_checked(fullinfo=True))
+
     def test_add_number_of_childs(self):
         index = self.model._scan_index_from_row(0)
         scan = self.model._item_from_index(index)
+        changed = []
+        self.model.dataChanged.connect(
+            lambda first, last: changed.append((first.row(), last.row())))
         testv = self.model.add_number_of_childs()
         self.assertEqual(testv, 2)
         postfix = scan.data(0).split('#')[1].split('/')[0]
         self.assertEqual(postfix, '1')
-
-    def test_get_txt(self):
-        testv = self.model.get_txt()
-        self.assertEqual(testv[0][0:10], '787463 ; -')
-
-    def test_get_filenumber_dict(self):
-        testv = self.model.get_filenumber_dict()
-        self.assertIsInstance(testv, dict)
-        self.assertIsInstance(testv[788058], QModelIndex)
-        self.assertTrue(testv[788058].isValid())
+        self.assertEqual(changed, [(0, 1)])
+        # only scans with new files are updated
+        testv = self.model.add_number_of_childs()
+        self.assertEqual(testv, 2)
+        self.assertEqual(changed, [(0, 1)])
+        dnsfile = self.data[1]
+        dnsfile['filenumber'] = '788059'
+        self.model.setup_model_data([dnsfile])
+        self.model.add_number_of_childs()
+        self.assertEqual(changed, [(0, 1), (1, 1)])
+        self.assertTrue(self.model.scan_from_row(1).data(0).endswith('#2/1'))
+
+    def test_index_from_filenumber(self):
+        testv = self.model.index_from_filenumber(788058)
+        self.assertEqual(testv.row(), 0)
+        self.assertEqual(testv.parent().row(), 1)
+        self.assertEqual(self.model._item_from_index(testv).data(0),
+                         '788058')
+        self.assertIsNone(self.model.index_from_filenumber(1))
+
+    def test_get_filenumbers(self):
+        self.assertEqual(self.model.get_filenumbers(), [787463, 788058])
+        dnsfile = get_dataset()[0]
+        dnsfile['filenumber'] = '787000'
+        self.model.setup_model_data([dnsfile, get_dataset()[1]])
+        self.assertEqual(self.model.get_filenumbers(),
+                         [787000, 787463, 788058])
+        # a file loaded again refers to its last position
+        self.assertEqual(
+            self.model.index_from_filenumber(788058).parent().row(), 3)
+        self.model.clear_scans()
+        self.assertEqual(self.model.get_filenumbers(), [])
+        self.assertIsNone(self.model.index_from_filenumber(788058))
 
 
 if __name__ == '__main__':
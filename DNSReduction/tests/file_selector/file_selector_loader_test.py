@@ -0,0 +1,59 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+import unittest
+from unittest import mock
+
+from mantidqtinterfaces.DNSReduction.data_structures.object_dict \
+    import ObjectDict
+from mantidqtinterfaces.DNSReduction.file_selector.file_selector_loader \
+    import DNSFileLoader
+
+
+def get_files(number):
+    files = []
+    for i in range(number):
+        dnsfile = ObjectDict()
+        dnsfile.filenumber = i
+        dnsfile.new_format = i != 1
+        files.append(dnsfile)
+    return files
+
+
+class DNSFileLoaderTest(unittest.TestCase):
+    def setUp(self):
+        self.batches = []
+        self.progress = mock.Mock()
+        self.finished = mock.Mock()
+
+    def get_loader(self, files, is_canceled):
+        loader = DNSFileLoader((dnsfile for dnsfile in files), len(files),
+                               is_canceled, batch_size=3)
+        loader.sig_batch_loaded.connect(self.batches.append)
+        loader.sig_progress.connect(self.progress)
+        loader.sig_finished.connect(self.finished)
+        return loader
+
+    def test_run(self):
+        files = get_files(8)
+        self.get_loader(files, lambda: False).run()
+        self.assertEqual(self.batches,
+                         [[files[0], files[2], files[3]],
+                          [files[4], files[5], files[6]], [files[7]]])
+        self.progress.assert_any_call(0, 8)
+        self.progress.assert_called_with(7, 8)
+        self.finished.assert_called_once()
+
+    def test_run_canceled(self):
+        files = get_files(8)
+        is_canceled = mock.Mock(side_effect=[False, False, True])
+        self.get_loader(files, is_canceled).run()
+        self.assertEqual(self.batches, [[files[0]]])
+        self.finished.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
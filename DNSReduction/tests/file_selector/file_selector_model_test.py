@@ -8,20 +8,34 @@
 presenter for dns path panel
 """
 
+import os
+import random
+import tempfile
+import time
 import unittest
 from unittest import mock
 from unittest.mock import patch
 
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file_cache \
+    import DNSFileCache
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file_index \
+    import DNSFileIndex
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file_meta \
+    import DNSFileMeta
 from mantidqtinterfaces.DNSReduction.data_structures.dns_obs_model \
     import DNSObsModel
+from mantidqtinterfaces.DNSReduction.data_structures.dns_scan_filter_model \
+    import DNSScanFilterModel
 from mantidqtinterfaces.DNSReduction.data_structures.dns_treemodel \
     import DNSTreeModel
 from mantidqtinterfaces.DNSReduction.data_structures.object_dict \
     import ObjectDict
 from mantidqtinterfaces.DNSReduction.file_selector.file_selector_model \
     import DNSFileSelectorModel
+from mantidqtinterfaces.DNSReduction.helpers.cache_dirs import \
+    get_data_cache_dir
 from mantidqtinterfaces.DNSReduction.tests.helpers_for_testing \
-    import get_filepath, dns_file
+    import get_filepath, dns_file, write_fake_dnsfile
 
 
 class DNSFileSelectorModelTest(unittest.TestCase):
@@ -31,6 +45,16 @@ class DNSFileSelectorModelTest(unittest.TestCase):
         cls.parent.update_progress = mock.Mock()
         cls.model = DNSFileSelectorModel(cls.parent)
         cls.filepath = get_filepath()
+        # caches are written to a temporary cache root
+        cls.cache_root = tempfile.TemporaryDirectory()
+        cls.environ = patch.dict(
+            'os.environ', {'DNS_REDUCTION_CACHE_DIR': cls.cache_root.name})
+        cls.environ.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.environ.stop()
+        cls.cache_root.cleanup()
 
     def setUp(self):
         self.parent.update_progress.reset_mock()
@@ -67,6 +91,7 @@ class DNSFileSelectorModelTest(unittest.TestCase):
         self.assertTrue(hasattr(self.model, 'old_data_set'))
         self.assertTrue(hasattr(self.model, 'active_model'))
         self.assertTrue(hasattr(self.model, 'loading_canceled'))
+        self.assertTrue(hasattr(self.model, '_file_caches'))
 
     def test_filter_out_already_loaded(self):
         self.model.old_data_set = [1]
@@ -93,24 +118,35 @@ class DNSFileSelectorModelTest(unittest.TestCase):
             (2, [1, 2], ['service_787463.d_dat', 'service_788058.d_dat'
                          ], [0, 1000000]))
 
+    def write_empty_files(self, datapath, filenames):
+        for filename in filenames:
+            with open(os.path.join(datapath, filename), 'w'):
+                pass
+
     def test_get_start_end_filenumbers(self):
-        self.model.alldatafiles = self.get2files()
-        testv = self.model._get_start_end_filenumbers()
-        self.assertEqual(testv, [787463, 788058])
+        with tempfile.TemporaryDirectory() as path:
+            testv = self.model._get_start_end_filenumbers(path)
+            self.assertEqual(testv, [0, 0])
+            self.write_empty_files(path, self.get3files()[::-1])
+            os.utime(path, ns=(0, 0))  # directory is scanned again
+            testv = self.model._get_start_end_filenumbers(path)
+            self.assertEqual(testv, [774714, 788058])
 
     def test_filter_range(self):
-        self.model.alldatafiles = self.get3files()
-        testv = self.model._filter_range(self.get2files(), [0, 1],
-                                         filtered=False)
-        self.assertEqual(testv, (self.get2files(), [0, 1]))
-
-        testv = self.model._filter_range(self.get2files(), [None, 1],
-                                         filtered=True)
-        self.assertEqual(testv, ([], [774714, 788058]))
-        testv = self.model._filter_range(self.get3files(),
-                                         filtered=True,
-                                         fn_range=[787463, 787463])
-        self.assertEqual(testv, ([self.get2files()[0]], [787463, 787463]))
+        with tempfile.TemporaryDirectory() as path:
+            self.write_empty_files(path, self.get3files())
+            testv = self.model._filter_range(path, self.get2files(), [0, 1],
+                                             filtered=False)
+            self.assertEqual(testv, (self.get2files(), [0, 1]))
+            testv = self.model._filter_range(path, self.get2files(),
+                                             [None, 1],
+                                             filtered=True)
+            self.assertEqual(testv, ([], [774714, 788058]))
+            testv = self.model._filter_range(path, self.get3files(),
+                                             filtered=True,
+                                             fn_range=[787463, 787463])
+            self.assertEqual(testv,
+                             ([self.get2files()[0]], [787463, 787463]))
 
     def test_read_all(self):
         self.read3files()
@@ -119,6 +155,92 @@ class DNSFileSelectorModelTest(unittest.TestCase):
         self.assertEqual(len(self.model.old_data_set), 3)
         self.assertEqual(self.model.treemodel.rowCount(), 3)  # three scans
 
+    def test_add_loaded_files(self):
+        self.model.treemodel.clear_scans()
+        files = [dns_file('', filename) for filename in self.get3files()]
+        testv = self.model.add_loaded_files(files[:1])
+        self.assertEqual(testv, range(0, 1))
+        testv = self.model.add_loaded_files(files[1:])
+        self.assertEqual(testv, range(1, 3))
+        self.model.treemodel.clear_scans()
+
+    def test_read_all_canceled(self):
+        def cancel(_i, _end):
+            self.model.set_loading_canceled()
+
+        self.parent.update_progress.side_effect = cancel
+        try:
+            self.read3files()
+        finally:
+            self.parent.update_progress.side_effect = None
+        self.assertTrue(self.model.loading_canceled)
+        self.assertEqual(self.parent.update_progress.call_count, 1)
+        self.assertEqual(self.model.treemodel.rowCount(), 0)
+
+    @patch('mantidqtinterfaces.DNSReduction.file_selector.file_selector_model.'
+           'DNSFile')
+    def test_load_files(self, mock_dnsfile):
+        def slow_dns_file(datapath, filename, header_only=False, cache=None):
+            time.sleep(random.random() * 0.005)
+            return dns_file(datapath, filename, header_only, cache)
+
+        mock_dnsfile.side_effect = slow_dns_file
+        datafiles = self.get3files() * 20
+        loaded = {self.get3files()[1]: dns_file('', self.get3files()[1])}
+        for threads in [1, 4]:
+            self.model.loading_threads = threads
+            mock_dnsfile.reset_mock()
+            testv = list(self.model.load_files(datafiles, 'a', loaded))
+            self.assertEqual([dnsfile['filename'] for dnsfile in testv],
+                             datafiles)
+            self.assertEqual(mock_dnsfile.call_count, 40)
+        # files not yet read are skipped if the generator is closed
+        mock_dnsfile.reset_mock()
+        files = self.model.load_files(datafiles, 'a', {})
+        next(files)
+        files.close()
+        self.assertLess(mock_dnsfile.call_count, len(datafiles))
+        self.model.loading_threads = 8
+        self.model._new_records = []
+
+    @patch('mantidqtinterfaces.DNSReduction.file_selector.file_selector_model.'
+           'INGEST_CHUNK_SIZE', 2)
+    @patch('mantidqtinterfaces.DNSReduction.file_selector.file_selector_model.'
+           'INGEST_MIN_FILES', 3)
+    def test_load_files_ingest(self):
+        self.model._new_records = []
+        self.model.ingest_workers = 1  # parsed in this process
+        filenames = ['p_{}.d_dat'.format(788000 + i) for i in range(6)]
+        with tempfile.TemporaryDirectory() as path:
+            for i, filename in enumerate(filenames):
+                write_fake_dnsfile(path, filename, 788000 + i, 10)
+            with open(os.path.join(path, filenames[3]), 'w') as f:
+                f.write('# old format')
+            loaded = {filenames[1]: dns_file('', self.get3files()[0])}
+            with patch('mantidqtinterfaces.DNSReduction.file_selector.'
+                       'file_selector_model.DNSFile') as mock_dnsfile:
+                testv = list(self.model.load_files(filenames, path, loaded))
+                mock_dnsfile.assert_not_called()
+        self.assertIs(testv[1], loaded[filenames[1]])
+        self.assertEqual([dnsfile.filename for dnsfile in testv],
+                         [filenames[0]] + [self.get3files()[0]] +
+                         filenames[2:])
+        self.assertEqual([dnsfile.new_format for dnsfile in testv],
+                         [True, True, True, False, True, True])
+        self.assertEqual(len(self.model._new_records), 4)
+        self.assertEqual(self.model._new_records[0][0], testv[0])
+        # files in the index are not parsed by processes
+        with patch('mantidqtinterfaces.DNSReduction.file_selector.'
+                   'file_selector_model.ingest_files') as mock_ingest:
+            with patch('mantidqtinterfaces.DNSReduction.file_selector.'
+                       'file_selector_model.DNSFile', new=dns_file):
+                list(self.model.load_files(
+                    self.get3files(), 'a',
+                    {self.get3files()[0]: dns_file('', self.get3files()[0])}))
+            mock_ingest.assert_not_called()
+        self.model.ingest_workers = None
+        self.model._new_records = []
+
     @patch('mantidqtinterfaces.DNSReduction.file_selector.file_selector_model.'
            'return_filelist')
     @patch('mantidqtinterfaces.DNSReduction.file_selector.file_selector_model.'
@@ -159,23 +281,42 @@ class DNSFileSelectorModelTest(unittest.TestCase):
         mock_load.assert_called_once_with('a')
         self.assertEqual(testv, 'x')
 
-    @patch('mantidqtinterfaces.DNSReduction.file_selector.file_selector_model.'
-           'load_txt')
-    def test_load_saved_filelist(self, mock_load):
-        mock_load.return_value = [" ; 0" * 14]
-        testv = self.model._load_saved_filelist('123')
-        mock_load.assert_called_once_with('last_filelist.txt', '123')
-        self.assertIsInstance(testv['0'], ObjectDict)
+    def test_load_saved_filelist(self):
+        with tempfile.TemporaryDirectory() as path:
+            records = []
+            for filename in self.get3files():
+                with open(os.path.join(path, filename), 'w') as datafile:
+                    datafile.write(filename)
+                records.append(
+                    (DNSFileMeta.from_dnsfile(dns_file('', filename)), ) +
+                    self.model._get_file_stat(path, filename))
+            # the index is stored in the cache directory of the datapath
+            os.makedirs(get_data_cache_dir(path))
+            DNSFileIndex(os.path.join(get_data_cache_dir(path),
+                                      'last_filelist.sqlite')).upsert(records)
+            # rewritten files are not taken from the saved list
+            with open(os.path.join(path, self.get3files()[1]), 'a') as f:
+                f.write('changed')
+            testv = self.model._load_saved_filelist(path)
+            # a cache which cannot be marked as used is still read
+            with patch('mantidqtinterfaces.DNSReduction.file_selector.'
+                       'file_selector_model.mark_cache_used',
+                       side_effect=OSError):
+                self.assertEqual(self.model._load_saved_filelist(path),
+                                 testv)
+        self.assertEqual(sorted(testv),
+                         [self.get3files()[0], self.get3files()[2]])
+        testv = testv['service_774714.d_dat']
+        self.assertIsInstance(testv, DNSFileMeta)
         for name in [
                 'filenumber', 'det_rot', 'sample_rot', 'field', 'temp_samp',
                 'sample', 'endtime', 'tofchannels', 'channelwidth', 'filename',
                 'wavelength', 'selector_speed', 'scannumber', 'scancommand',
                 'scanpoints', 'new_format'
         ]:
-            self.assertTrue(hasattr(testv['0'], name))
-        self.assertEqual(len(testv), 1)
-        mock_load.side_effect = IOError
-        testv = self.model._load_saved_filelist('123')
+            self.assertTrue(hasattr(testv, name))
+        self.assertEqual(testv, dns_file('', 'service_774714.d_dat'))
+        testv = self.model._load_saved_filelist('not_existing/123')
         self.assertEqual(testv, {})
 
     # def test_get_number_of_scans(self):
@@ -223,13 +364,29 @@ class DNSFileSelectorModelTest(unittest.TestCase):
         self.assertIsInstance(treemodel, DNSTreeModel)
         self.assertEqual(self.model.standard_data, treemodel)
 
+    def test_get_filter_model(self):
+        testv = self.model.get_filter_model()
+        self.assertIsInstance(testv, DNSScanFilterModel)
+        self.assertEqual(testv.sourceModel(), self.model.treemodel)
+        testv = self.model.get_filter_model(standard=True)
+        self.assertEqual(testv.sourceModel(), self.model.standard_data)
+
+    def test_get_non_hidden_rows(self):
+        self.read3files()
+        self.model.filter_scans_for_boxes([('scan', True)], is_tof=False)
+        self.assertEqual(self.model.get_non_hidden_rows(), [0, 1])
+        self.assertEqual(self.model.get_filter_model().rowCount(), 2)
+
     def test_model_is_standard(self):
         self.assertFalse(self.model.model_is_standard())
         self.model.active_model = self.model.standard_data
         self.assertTrue(self.model.model_is_standard())
 
-    # def test_get_data(self):
-    # tested in treemodel
+    def test_get_data(self):
+        self.read3files()
+        self.model.check_scans_by_rows([2])
+        self.assertEqual(self.model.get_data(fullinfo=False), [788058])
+        self.assertEqual(self.model.get_data(standard=True), [])
 
     def test_set_model(self):
         self.model.active_model = ''
@@ -248,6 +405,18 @@ class DNSFileSelectorModelTest(unittest.TestCase):
         filters = [('scan', True)]
         testv = self.model.filter_scans_for_boxes(filters, is_tof=True)
         self.assertEqual(testv, {0, 1})
+        # hidden scans are unchecked
+        self.model.check_scans_by_rows([0, 2])
+        self.model.filter_scans_for_boxes(filters, is_tof=True)
+        self.assertEqual(self.model.treemodel.get_checked(False), [788058])
+        # the data model is filtered also if the standard model is active
+        self.model.set_model(standard=True)
+        testv = self.model.filter_scans_for_boxes([('dummy', True)],
+                                                  is_tof=True)
+        self.assertEqual(testv, {0, 1, 2})
+        self.assertEqual(self.model.get_filter_model().rowCount(), 0)
+        self.assertEqual(self.model.treemodel.get_checked(False), [])
+        self.model.set_model()
 
     def test__filter_tof_scans(self):
         self.read3files()
@@ -289,18 +458,59 @@ class DNSFileSelectorModelTest(unittest.TestCase):
         mock_dnsfile.assert_not_called()
         self.assertIsInstance(testv, ObjectDict)
         testv = self.model._load_file_from_chache_or_new({}, filename, 'a')
-        mock_dnsfile.assert_called_once_with('a', filename)
+        mock_dnsfile.assert_called_once_with('a', filename, header_only=True)
+
+    def test_get_file_cache(self):
+        testv = self.model.get_file_cache('a')
+        self.assertIsInstance(testv, DNSFileCache)
+        self.assertEqual(testv.cache_dir,
+                         os.path.join(get_data_cache_dir('a'),
+                                      'parsed_files'))
+        self.assertIs(self.model.get_file_cache('a'), testv)
+        self.assertIsNot(self.model.get_file_cache('b'), testv)
 
     @patch('mantidqtinterfaces.DNSReduction.file_selector.file_selector_model.'
-           'DNSTreeModel.get_txt')
+           'DNSFile',
+           new=dns_file)
+    def test_save_filelist(self):
+        self.model._new_records = []
+        with tempfile.TemporaryDirectory() as path:
+            self.model._load_file_from_chache_or_new({}, self.get2files()[0],
+                                                     path)
+            self.model._load_file_from_chache_or_new({}, self.get2files()[1],
+                                                     path)
+            self.model._save_filelist(path)
+            self.assertEqual(self.model._new_records, [])
+            self.assertFalse(
+                os.path.exists(os.path.join(path, 'last_filelist.sqlite')))
+            index = DNSFileIndex(
+                os.path.join(get_data_cache_dir(path), 'last_filelist.sqlite'))
+            self.assertEqual(sorted(index.load()), self.get2files())
+            self.model._load_file_from_chache_or_new(
+                {}, self.get3files()[0], path)
+            self.model._save_filelist(path)
+            self.assertEqual(len(index.load()), 3)
+        # handled exception if the cache is not writable
+        self.model._load_file_from_chache_or_new({}, self.get3files()[0],
+                                                 'not_existing/123')
+        with patch.dict('os.environ',
+                        {'DNS_REDUCTION_CACHE_DIR': os.devnull}):
+            self.model._save_filelist('not_existing/123')
+        self.assertEqual(self.model._new_records, [])
+
     @patch('mantidqtinterfaces.DNSReduction.file_selector.file_selector_model.'
-           'save_txt')
-    def test_save_filelist(self, mock_save, mock_get_txt):
-        mock_get_txt.return_value = 'c'
-        mock_save.side_effect = PermissionError  # handled exception
-        self.model._save_filelist('a')
-        mock_get_txt.assert_called_once()
-        mock_save.assert_called_once_with('c', 'last_filelist.txt', 'a')
+           'enforce_cache_budget')
+    @patch('mantidqtinterfaces.DNSReduction.file_selector.file_selector_model.'
+           'DNSFile',
+           new=dns_file)
+    def test_save_filelist_budget(self, mock_budget):
+        self.model._budget_enforced = set()
+        with tempfile.TemporaryDirectory() as path:
+            for filename in self.get3files():
+                self.model._load_file_from_chache_or_new({}, filename, path)
+                self.model._save_filelist(path)
+            # the caches are only walked at the first save of a directory
+            mock_budget.assert_called_once_with(keep=path)
 
 
 if __name__ == '__main__':
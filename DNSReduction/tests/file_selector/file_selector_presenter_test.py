@@ -62,15 +62,15 @@ class DNSFileSelectorPresenterTest(unittest.TestCase):
         self.model.reset_mock()
 
     def test___init__(self):
-        self.model.get_model.return_value = 1
+        self.model.get_filter_model.return_value = 1
         self.presenter = DNSFileSelectorPresenter(view=self.view,
                                                   model=self.model,
                                                   name='file_selector',
                                                   watcher=self.watcher)
         self.assertIsInstance(self.presenter, DNSFileSelectorPresenter)
         self.assertIsInstance(self.presenter, DNSObserver)
-        self.model.get_model.assert_any_call(standard=True)
-        self.assertEqual(self.model.get_model.call_count, 2)
+        self.model.get_filter_model.assert_any_call(standard=True)
+        self.assertEqual(self.model.get_filter_model.call_count, 2)
         self.view.set_tree_model.assert_any_call(1)
         self.view.set_tree_model.assert_called_with(1, standard=True)
         self.assertEqual(self.view.set_tree_model.call_count, 2)
@@ -88,25 +88,149 @@ class DNSFileSelectorPresenterTest(unittest.TestCase):
         self.model.set_datafiles_to_load.return_value = 1, ['b'], ['a'], [3, 4]
         self.model.get_scan_range.return_value = [0, 1]
         self.model.get_number_of_scans.return_value = 1
+        self.model.model_is_standard.return_value = False
 
-        self.presenter._read_all(True, False, 0, 100)
+        self.presenter._read_all(True, False, 0, 100, background=False)
         self.model.set_datafiles_to_load.assert_called_once_with(
             'C:/data', [0, 100], True, False)
         self.view.open_progress_dialog.assert_called_once_with(1)
         self.model.read_all.assert_called_once_with(['a'], 'C:/data', ['b'],
                                                     False)
-        self.model.get_scan_range.assert_called_once()
-        self.view.set_first_column_spanned.assert_called_once_with([0, 1])
         mock_filter.assert_called_once()
         self.model.get_number_of_scans.assert_called_once()
         self.view.expand_all.assert_called_once()
         mock_startend.assert_not_called()
         self.view.reset_mock()
         self.model.get_number_of_scans.return_value = 19
-        self.presenter._read_all(False, False, 0, 100)
+        self.presenter._read_all(False, False, 0, 100, background=False)
         self.view.expand_all.assert_not_called()
         mock_startend.assert_called_once_with([3, 4])
 
+    @patch(
+        'mantidqtinterfaces.DNSReduction.file_selector.file_selector_'
+        'presenter.'
+        'DNSFileSelectorPresenter._filter_scans')
+    @patch('mantidqtinterfaces.DNSReduction.file_selector.file_selector_'
+           'presenter.DNSFileLoader')
+    @patch('mantidqtinterfaces.DNSReduction.file_selector.file_selector_'
+           'presenter.QThread')
+    def test_read_all_background(self, mock_thread, mock_loader,
+                                 mock_filter):
+        self.presenter.param_dict = get_fileselector_param_dict()
+        self.model.set_datafiles_to_load.return_value = 1, ['b'], ['a'], [3, 4]
+        self.model.get_scan_range.return_value = [0]
+        self.model.get_number_of_scans.return_value = 1
+        self.presenter._read_all()
+        self.model.read_all.assert_not_called()
+        self.model.start_loading.assert_called_once_with(False)
+        self.model.load_files.assert_called_once_with(['a'], 'C:/data',
+                                                      ['b'])
+        mock_loader.return_value.moveToThread.assert_called_once_with(
+            mock_thread.return_value)
+        mock_loader.return_value.sig_finished.connect.assert_called()
+        self.view.open_progress_dialog.assert_called_once_with(1,
+                                                               modal=False)
+        mock_thread.return_value.start.assert_called_once()
+        self.assertTrue(self.presenter.is_loading())
+        # batches are added to the treemodel, only new scans are spanned
+        self.model.add_loaded_files.return_value = range(3, 5)
+        self.model.model_is_standard.return_value = False
+        self.presenter._files_loaded([1, 2])
+        self.model.add_loaded_files.assert_called_once_with([1, 2])
+        self.view.set_first_column_spanned.assert_called_once_with(
+            range(3, 5))
+        mock_filter.assert_not_called()
+        self.presenter._background_loading_finished('C:/data', False, [3, 4])
+        mock_thread.return_value.wait.assert_called_once()
+        self.model.finish_loading.assert_called_once_with('C:/data')
+        mock_filter.assert_called_once()
+        self.assertFalse(self.presenter.is_loading())
+        self.view.expand_all.assert_called_once()
+        self.model.set_datafiles_to_load.assert_called_once()
+
+    @patch(
+        'mantidqtinterfaces.DNSReduction.file_selector.file_selector_'
+        'presenter.'
+        'DNSFileSelectorPresenter._filter_scans')
+    @patch('mantidqtinterfaces.DNSReduction.file_selector.file_selector_'
+           'presenter.DNSFileLoader')
+    @patch('mantidqtinterfaces.DNSReduction.file_selector.file_selector_'
+           'presenter.QThread')
+    def test_read_all_watcher_while_loading(self, mock_thread, mock_loader,
+                                            mock_filter):
+        # pylint: disable=unused-argument
+        self.presenter.param_dict = get_fileselector_param_dict()
+        self.model.set_datafiles_to_load.return_value = 1, ['b'], ['a'], [3, 4]
+        self.model.get_number_of_scans.return_value = 2
+        self.presenter._read_all()
+        # files changed while loading are read when loading finished
+        self.presenter._read_all(watcher=True)
+        self.model.set_datafiles_to_load.assert_called_once()
+        self.presenter._background_loading_finished('C:/data', False, [3, 4])
+        self.assertEqual(self.model.set_datafiles_to_load.call_count, 2)
+        self.model.set_datafiles_to_load.assert_called_with(
+            'C:/data', [None, None], False, True)
+        self.assertTrue(self.presenter.is_loading())
+        self.presenter._background_loading_finished('C:/data', False, [3, 4])
+        self.assertEqual(self.model.set_datafiles_to_load.call_count, 2)
+        self.assertFalse(self.presenter.is_loading())
+
+    @patch(
+        'mantidqtinterfaces.DNSReduction.file_selector.file_selector_'
+        'presenter.'
+        'DNSFileSelectorPresenter._filter_scans')
+    @patch('mantidqtinterfaces.DNSReduction.file_selector.file_selector_'
+           'presenter.DNSFileLoader')
+    @patch('mantidqtinterfaces.DNSReduction.file_selector.file_selector_'
+           'presenter.QThread')
+    def test_read_all_while_loading(self, mock_thread, mock_loader,
+                                    mock_filter):
+        # pylint: disable=unused-argument
+        self.presenter.param_dict = get_fileselector_param_dict()
+        self.model.set_datafiles_to_load.return_value = 1, ['b'], ['a'], [3, 4]
+        self.model.get_number_of_scans.return_value = 2
+        self.presenter._read_all()
+        # a read of the user replaces a read of the watcher
+        self.presenter._read_all(watcher=True)
+        self.presenter._read_all(filtered=True, start=1, end=2)
+        self.presenter._read_all(watcher=True)
+        self.model.set_datafiles_to_load.assert_called_once()
+        self.presenter._background_loading_finished('C:/data', False, [3, 4])
+        self.assertEqual(self.model.set_datafiles_to_load.call_count, 2)
+        self.model.set_datafiles_to_load.assert_called_with(
+            'C:/data', [1, 2], True, False)
+        self.presenter._background_loading_finished('C:/data', True, [1, 2])
+        self.assertFalse(self.presenter.is_loading())
+
+    @patch('mantidqtinterfaces.DNSReduction.file_selector.file_selector_'
+           'presenter.QCoreApplication')
+    @patch(
+        'mantidqtinterfaces.DNSReduction.file_selector.file_selector_'
+        'presenter.'
+        'DNSFileSelectorPresenter._filter_scans')
+    @patch('mantidqtinterfaces.DNSReduction.file_selector.file_selector_'
+           'presenter.DNSFileLoader')
+    @patch('mantidqtinterfaces.DNSReduction.file_selector.file_selector_'
+           'presenter.QThread')
+    def test_read_all_not_background_while_loading(self, mock_thread,
+                                                   mock_loader, mock_filter,
+                                                   mock_app):
+        # pylint: disable=unused-argument
+        self.presenter.param_dict = get_fileselector_param_dict()
+        self.model.set_datafiles_to_load.return_value = 1, ['b'], ['a'], [3, 4]
+        self.model.get_number_of_scans.return_value = 2
+        self.presenter._read_all()
+        # the event loop runs until the background loading finished
+        mock_app.processEvents.side_effect = lambda flags: \
+            self.presenter._background_loading_finished(
+                'C:/data', False, [3, 4])
+        self.presenter._read_all(filtered=True, start=1, end=2,
+                                 background=False)
+        mock_app.processEvents.assert_called_once()
+        self.assertFalse(self.presenter.is_loading())
+        self.model.read_all.assert_called_once_with(['a'], 'C:/data', ['b'],
+                                                    False)
+
     @patch(
         'mantidqtinterfaces.DNSReduction.file_selector.file_selector_'
         'presenter.'
@@ -115,7 +239,10 @@ class DNSFileSelectorPresenterTest(unittest.TestCase):
         self.view.get_start_end_filenumbers.return_value = [1, 2]
         self.presenter._read_filtered()
         self.view.get_start_end_filenumbers.assert_called_once()
-        mock_read_all.assert_called_once_with(filtered=True, start=1, end=2)
+        mock_read_all.assert_called_once_with(filtered=True,
+                                              start=1,
+                                              end=2,
+                                              background=None)
 
     @patch(
         'mantidqtinterfaces.DNSReduction.file_selector.file_selector_'
@@ -126,8 +253,6 @@ class DNSFileSelectorPresenterTest(unittest.TestCase):
         self.model.read_standard.return_value = True
         self.presenter._read_standard()
         self.model.read_standard.assert_called_once()
-        self.model.get_scan_range.assert_called_once()
-        self.view.set_first_column_spanned.assert_called_once_with([1, 2])
         mock_filter_standard.assert_called_once()
         self.model.try_unzip.assert_not_called()
         self.model.read_standard.return_value = False
@@ -221,41 +346,38 @@ class DNSFileSelectorPresenterTest(unittest.TestCase):
         self.presenter._uncheck_all_scans()
         self.model.uncheck_all_scans.assert_called_once()
 
-    def test_show_all_scans(self):
-        self.model.get_scan_range.return_value = [1, 2]
-        self.presenter._show_all_scans()
-        self.model.get_scan_range.assert_called_once()
-        self.assertEqual(self.view.show_scan.call_count, 2)
-
     def test_get_non_hidden_rows(self):
-        self.model.get_scan_range.return_value = [1, 2]
-        self.view.is_scan_hidden.return_value = False
+        self.model.get_non_hidden_rows.return_value = [1, 2]
         testv = self.presenter._get_non_hidden_rows()
-        self.model.get_scan_range.assert_called_once()
-        self.assertEqual(self.view.is_scan_hidden.call_count, 2)
+        self.model.get_non_hidden_rows.assert_called_once()
         self.assertEqual(testv, [1, 2])
 
     def test_filter_scans(self):
-        self.model.filter_scans_for_boxes.return_value = []
+        self.model.get_scan_range.return_value = [0, 1]
+        self.model.model_is_standard.return_value = False
         self.presenter.modus = 'elastic'
         self.view.get_filters.return_value = {'a': 1}
         self.presenter._filter_scans()
         self.view.get_filters.assert_called_once()
         self.model.filter_scans_for_boxes.assert_called_once_with(
             self.view.get_filters.return_value.items(), False)
-        self.view.hide_scan.assert_not_called()
-        self.model.filter_scans_for_boxes.return_value = [1]
+        self.view.set_first_column_spanned.assert_called_once_with([0, 1])
+        # the data model is filtered but not spanned in the standard view
+        self.view.reset_mock()
+        self.model.model_is_standard.return_value = True
         self.presenter._filter_scans()
-        self.view.hide_scan.assert_called_once_with(1, hidden=True)
+        self.assertEqual(self.model.filter_scans_for_boxes.call_count, 2)
+        self.view.set_first_column_spanned.assert_not_called()
 
     def test_filter_standard(self):
+        self.model.get_scan_range.return_value = [1, 2]
         self.presenter.modus = '123'
         self.view.get_standard_filters.return_value = {'vanadium': True}
         self.presenter._filter_standard()
         self.view.get_standard_filters.assert_called_once()
         self.model.filter_standard_types.assert_called_once_with(
             {'vanadium': True}, True, False)
-        self.view.hide_scan.assert_not_called()
+        self.view.set_first_column_spanned.assert_called_once_with([1, 2])
 
     @patch(
         'mantidqtinterfaces.DNSReduction.file_selector.file_selector_'
@@ -406,7 +528,7 @@ class DNSFileSelectorPresenterTest(unittest.TestCase):
         self.presenter.process_commandline_request(command_dict)
         testf = self.view.set_start_end_filenumbers_from_arguments
         testf.assert_called_once_with(0, 10)
-        mock_read_filtered.assert_called_once()
+        mock_read_filtered.assert_called_once_with(background=False)
         self.model.check_fn_range.assert_called_once_with(0, 10)
 
 
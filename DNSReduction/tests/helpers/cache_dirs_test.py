@@ -0,0 +1,94 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+"""
+DNS cache directories of data directories
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from mantidqtinterfaces.DNSReduction.helpers.cache_dirs import (
+    get_data_cache_dir, mark_cache_used, get_cache_usage, purge_cache,
+    enforce_cache_budget)
+
+
+class DNScache_dirsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = self.tmpdir.name
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def fill_cache(self, datapath, size, last_used):
+        cache_dir = mark_cache_used(datapath, self.root)
+        with open(os.path.join(cache_dir, 'data'), 'wb') as f:
+            f.write(b'0' * size)
+        os.utime(os.path.join(cache_dir, 'datapath.txt'),
+                 (last_used, last_used))
+        return cache_dir
+
+    def test_get_data_cache_dir(self):
+        testv = get_data_cache_dir('/data/p1', self.root)
+        self.assertTrue(testv.startswith(os.path.join(self.root, 'datadirs')))
+        self.assertEqual(testv, get_data_cache_dir('/data/p1/', self.root))
+        self.assertNotEqual(testv, get_data_cache_dir('/data/p2', self.root))
+        self.assertFalse(os.path.exists(testv))
+        with patch.dict('os.environ', {'DNS_REDUCTION_CACHE_DIR': 'c'}):
+            self.assertTrue(get_data_cache_dir('/data/p1').startswith('c'))
+
+    def test_mark_cache_used(self):
+        testv = mark_cache_used('/data/p1', self.root)
+        self.assertTrue(os.path.isdir(testv))
+        with open(os.path.join(testv, 'datapath.txt'), 'r') as f:
+            self.assertEqual(f.read(), os.path.abspath('/data/p1'))
+
+    def test_get_cache_usage(self):
+        self.assertEqual(get_cache_usage(self.root), [])
+        self.fill_cache('/data/p1', 100, 2000)
+        self.fill_cache('/data/p2', 50, 1000)
+        testv = get_cache_usage(self.root)
+        self.assertEqual([cache['datapath'] for cache in testv],
+                         [os.path.abspath('/data/p2'),
+                          os.path.abspath('/data/p1')])
+        self.assertEqual(testv[0]['last_used'], 1000)
+        self.assertEqual(testv[0]['size'],
+                         50 + len(os.path.abspath('/data/p2')))
+
+    def test_purge_cache(self):
+        cache_dir1 = self.fill_cache('/data/p1', 10, 1000)
+        cache_dir2 = self.fill_cache('/data/p2', 10, 1000)
+        purge_cache('/data/p1', self.root)
+        self.assertFalse(os.path.exists(cache_dir1))
+        self.assertTrue(os.path.exists(cache_dir2))
+        purge_cache(cache_root=self.root)
+        self.assertEqual(get_cache_usage(self.root), [])
+        purge_cache('/data/p3', self.root)  # not existing is ignored
+
+    def test_enforce_cache_budget(self):
+        cache_dir1 = self.fill_cache('/data/p1', 1000, 1000)
+        cache_dir2 = self.fill_cache('/data/p2', 1000, 2000)
+        cache_dir3 = self.fill_cache('/data/p3', 1000, 3000)
+        testv = enforce_cache_budget(budget=5000, cache_root=self.root)
+        self.assertGreater(testv, 3000)
+        self.assertEqual(len(get_cache_usage(self.root)), 3)
+        # least recently used are removed first, keep is never removed
+        enforce_cache_budget(budget=2500,
+                             cache_root=self.root,
+                             keep='/data/p1')
+        self.assertTrue(os.path.exists(cache_dir1))
+        self.assertFalse(os.path.exists(cache_dir2))
+        self.assertTrue(os.path.exists(cache_dir3))
+        testv = enforce_cache_budget(budget=0, cache_root=self.root)
+        self.assertEqual(testv, 0)
+        self.assertFalse(os.path.exists(cache_dir1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,13 +8,16 @@
 DNS file helpers
 """
 
+import os
+import tempfile
 import unittest
 from unittest.mock import patch
 
 from mantidqtinterfaces.DNSReduction.helpers.file_processing import (
     create_dir, filter_filenames, return_filelist, return_standard_zip,
     save_txt, unzip_latest_standard, load_txt, open_editor,
-    create_dir_from_filename, get_path_and_prefix)
+    create_dir_from_filename, get_path_and_prefix, get_cache_root,
+    return_file_stats)
 from mantidqtinterfaces.DNSReduction.tests.helpers_for_testing \
     import get_3filenames
 
@@ -35,20 +38,34 @@ class DNSfile_processingTest(unittest.TestCase):
         self.assertEqual(filtered, self.filenames[0:2])
         filtered = filter_filenames(self.filenames, 787464, 788057)
         self.assertEqual(filtered, [])
-
-    @patch('mantidqtinterfaces.DNSReduction.helpers.file_processing.'
-           'os.listdir')
-    @patch('mantidqtinterfaces.DNSReduction.helpers.file_processing.'
-           'os.path.isdir')
-    def test_return_filelist(self, mock_is_dir, mock_listdir):
-        mock_listdir.return_value = self.filenames + ['a.d_dat', '123.d_dat']
-        mock_is_dir.return_value = True
-        filelist = return_filelist('a')
+        filtered = filter_filenames(self.filenames, 787463, 787463)
+        self.assertEqual(filtered, self.filenames[1:2])
+        filtered = filter_filenames(self.filenames, 788058, 774714)
+        self.assertEqual(filtered, [])
+        self.assertEqual(filter_filenames([], 0, 1), [])
+
+    def test_return_filelist(self):
+        with tempfile.TemporaryDirectory() as datadir:
+            for filename in self.filenames[::-1] + ['a.d_dat', '123.d_dat']:
+                with open(os.path.join(datadir, filename), 'w') as f:
+                    f.write('123')
+            filelist = return_filelist(datadir)
         self.assertEqual(filelist, self.filenames)
-        mock_is_dir.return_value = False
-        filelist = return_filelist('a')
+        filelist = return_filelist('not_existing/123')
         self.assertEqual(filelist, [])
 
+    def test_return_file_stats(self):
+        with tempfile.TemporaryDirectory() as datadir:
+            for filename in self.filenames + ['a.d_dat']:
+                with open(os.path.join(datadir, filename), 'w') as f:
+                    f.write('123')
+            testv = return_file_stats(datadir)
+            mtime = os.stat(os.path.join(datadir,
+                                         self.filenames[0])).st_mtime_ns
+        self.assertEqual(sorted(testv), self.filenames)
+        self.assertEqual(testv[self.filenames[0]], (3, mtime))
+        self.assertEqual(return_file_stats('not_existing/123'), {})
+
     @patch('mantidqtinterfaces.DNSReduction.helpers.file_processing.'
            'os.path.getmtime',
            new=mock_mtime)
@@ -142,6 +159,13 @@ class DNSfile_processingTest(unittest.TestCase):
         mock_path_exist.assert_called_once_with('d/123.d_dat')
         mock_startfile.assert_called_once_with('d/123.d_dat')
 
+    def test_get_cache_root(self):
+        with patch.dict('os.environ', {'DNS_REDUCTION_CACHE_DIR': 'c'}):
+            self.assertEqual(get_cache_root(), 'c')
+        with patch.dict('os.environ', {'DNS_REDUCTION_CACHE_DIR': '',
+                                       'XDG_CACHE_HOME': 'x'}):
+            self.assertEqual(get_cache_root(), 'x/dns_reduction')
+
     def test_get_path_and_prefix(self):
         testv = get_path_and_prefix('C:/123')
         self.assertEqual(testv, ('C:/', '123'))
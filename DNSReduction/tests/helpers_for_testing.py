@@ -6,6 +6,8 @@
 # SPDX - License - Identifier: GPL - 3.0 +
 import numpy as np
 
+from mantidqtinterfaces.DNSReduction.data_structures.dns_file \
+    import write_dnsfile
 from mantidqtinterfaces.DNSReduction.data_structures.object_dict \
     import ObjectDict
 
@@ -157,7 +159,8 @@ def get_dataset():
     return newlist
 
 
-def dns_file(_dummy, filename):
+def dns_file(_dummy, filename, header_only=False, cache=None):
+    # pylint: disable=unused-argument
     elm = [
         dataset for dataset in datasetdic if dataset['filename'] == filename
     ][0]
@@ -320,3 +323,63 @@ def get_fake_elastic_sc_dataset():
         'error': np.transpose(
             np.asarray([[14.0, 15.0, 16.0], [17.0, 18.0, 19.0]]))
     }
+
+
+def get_fake_dnsfile_header(filenumber=788058, tofchannels=1000):
+    return {
+        'users': 'Thomas',
+        'proposal': 'p123',
+        'filenumber': str(filenumber),
+        'sample': '4p1K_map',
+        'wavelength': 4.74,
+        'mon_rot': -37.98,
+        'energy': 3.64,
+        'speed': 834.6,
+        'det_rot': -9.0,
+        'sample_rot': 295.0,
+        'cradle_lo': 0.0,
+        'cradle_up': 0.0,
+        'ap_sam_y_upper': 20.0,
+        'ap_sam_y_lower': -20.0,
+        'ap_sam_x_left': -5.0,
+        'ap_sam_x_right': 5.0,
+        'pol_trans_x': 0.0,
+        'pol_trans_y': 0.0,
+        'pol_rot': 0.0,
+        'Co': 0.0,
+        'Fi': 0.0,
+        'A': 0.0,
+        'B': 0.0,
+        'C': -1.5,
+        'ZT': 1.2,
+        'temp_tube': 4.1,
+        'temp_samp': 4.1,
+        'temp_set': 4.0,
+        'tofchannels': tofchannels,
+        'channelwidth': 1.6,
+        'tofdelay': 0.0,
+        'timer': 30.0,
+        'monitor': 1234567,
+        'starttime': '2020-03-12 11:26:50',
+        'endtime': '2020-03-12 11:27:20',
+        'scannumber': '14933',
+        'scancommand': "scan([det_rot, sample_rot], [-9.0000, 126.0000], "
+                       "[0, 1.0000], 170)",
+        'scanposition': '1/170',
+        'field': 'z7_nsf',
+        'selector_lift': 0.0,
+        'selector_speed': 7032.0,
+    }
+
+
+def write_fake_dnsfile(datapath, filename, filenumber=788058,
+                       tofchannels=1000, seed=0):
+    """
+    writes a syntactically valid dns datafile with random counts and
+    returns the written counts
+    """
+    rng = np.random.RandomState(seed)
+    counts = rng.randint(0, 10**6, size=(24, tofchannels))
+    write_dnsfile(datapath, filename,
+                  get_fake_dnsfile_header(filenumber, tofchannels), counts)
+    return counts
@@ -36,12 +36,26 @@ class DNSPathModelTest(unittest.TestCase):
         testv = self.model.get_user_and_propnumber('')
         self.assertEqual(testv, ['', ''])
 
+    @patch('mantidqtinterfaces.DNSReduction.paths.path_model.purge_cache')
     @patch('mantidqtinterfaces.DNSReduction.paths.path_model.os.remove')
     @patch('mantidqtinterfaces.DNSReduction.paths.path_model.os.path.isfile')
-    def test_clear_cache(self, mock_isfile, mock_remove):
+    def test_clear_cache(self, mock_isfile, mock_remove, mock_purge):
         mock_isfile.return_value = True
         self.model.clear_cache(path='123')
-        mock_remove.assert_called_once_with('123/last_filelist.txt')
+        mock_purge.assert_called_once_with('123')
+        self.assertEqual(mock_remove.call_count, 4)
+        mock_remove.assert_any_call('123/last_filelist.sqlite')
+        mock_remove.assert_any_call('123/last_filelist.txt')
+        mock_remove.reset_mock()
+        mock_purge.reset_mock()
+        self.model.clear_cache(path='')
+        mock_remove.assert_not_called()
+        mock_purge.assert_not_called()
+
+    @patch('mantidqtinterfaces.DNSReduction.paths.path_model.get_cache_usage')
+    def test_get_cache_usage(self, mock_usage):
+        mock_usage.return_value = [1]
+        self.assertEqual(self.model.get_cache_usage(), [1])
 
     def test_get_startpath_for_dialog(self):
         testv = self.model.get_startpath_for_dialog('')